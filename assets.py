@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Asset Pipeline
+Builds fingerprinted, precompressed copies of the CSS/JS at startup and holds
+pre-rendered pages, so requests are answered from memory with long-lived
+cache headers (assets) or cheap 304s (pages).
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import logging
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger('suikoden_assets')
+
+# Directories under static/ whose files get fingerprinted
+ASSET_DIRS = ('css', 'js')
+ENCODING_SUFFIXES = {'br': '-br', 'gzip': '-gz', 'identity': ''}
+
+class Asset:
+    """One file held in memory with its precompressed variants."""
+    def __init__(self, data, mimetype):
+        self.data = data
+        self.mimetype = mimetype
+        self.digest = hashlib.sha256(data).hexdigest()
+        self.encoded = {'identity': data}
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data):
+            self.encoded['gzip'] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            if len(compressed) < len(data):
+                self.encoded['br'] = compressed
+
+    def negotiate(self, accept_encodings):
+        """Pick the smallest variant the client accepts. Returns (encoding, data, etag)."""
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encoded and accept_encodings[encoding]:
+                return encoding, self.encoded[encoding], self.digest[:16] + ENCODING_SUFFIXES[encoding]
+        return 'identity', self.data, self.digest[:16]
+
+class AssetPipeline:
+    """Fingerprinted static assets and pre-rendered pages."""
+    def __init__(self, static_dir, url_prefix='/assets/'):
+        self.static_dir = Path(static_dir)
+        self.url_prefix = url_prefix
+        self.manifest = {}  # 'css/styles.css' -> 'css/styles.1a2b3c4d5e.css'
+        self.assets = {}  # fingerprinted path -> Asset
+        self.pages = {}  # template name -> Asset
+
+    def build(self):
+        """Fingerprint and precompress every file in the asset directories"""
+        manifest, assets = {}, {}
+        for directory in ASSET_DIRS:
+            for path in sorted((self.static_dir / directory).rglob('*')):
+                if not path.is_file():
+                    continue
+                logical = path.relative_to(self.static_dir).as_posix()
+                mimetype = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+                asset = Asset(path.read_bytes(), mimetype)
+                fingerprinted = f"{Path(logical).with_suffix('').as_posix()}.{asset.digest[:10]}{path.suffix}"
+                manifest[logical] = fingerprinted
+                assets[fingerprinted] = asset
+        self.manifest, self.assets = manifest, assets
+        logger.info(f"Built {len(assets)} fingerprinted assets (brotli {'on' if brotli else 'unavailable'})")
+        return manifest
+
+    def url_for(self, logical):
+        return self.url_prefix + self.manifest[logical]
+
+    def rewrite(self, html):
+        """Point /static/<asset> references in rendered HTML at the fingerprinted URLs"""
+        for logical in self.manifest:
+            for quote in ('"', "'"):
+                html = html.replace(f"/static/{logical}{quote}", f"{self.url_for(logical)}{quote}")
+        return html
+
+    def add_page(self, name, html):
+        self.pages[name] = Asset(self.rewrite(html).encode('utf-8'), 'text/html')
+
+    def get(self, fingerprinted):
+        return self.assets.get(fingerprinted)
+
+    def page(self, name):
+        return self.pages.get(name)
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - GUI Benchmark Suite
+--------------------------------------
+Runs MainApp headlessly (under Xvfb when no display is available, or with a
+hidden root window) and measures the hot paths of the Tk GUI against
+synthetic rosters. Results are emitted as JSON for trend tracking.
+
+Usage:
+    python benchmark_gui.py --roster-sizes 111 500 2000 --output bench.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+IMAGES_DIR = BASE_DIR / 'images'
+
+# Keystrokes typed into the picker's search box
+SEARCH_TEXT = "kasumi"
+
+class FakeConfigureEvent:
+    """Minimal stand-in for a Tk <Configure> event."""
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+def start_virtual_display(display=":99"):
+    """Start Xvfb if there is no display. Returns the process or None."""
+    if os.environ.get('DISPLAY'):
+        return None
+    xvfb = shutil.which('Xvfb')
+    if not xvfb:
+        return None
+
+    process = subprocess.Popen(
+        [xvfb, display, '-screen', '0', '1920x1080x24', '-nolisten', 'tcp'],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    # Give the server a moment to accept connections
+    time.sleep(0.5)
+    os.environ['DISPLAY'] = display
+    return process
+
+def find_background_image():
+    """Find the background image regardless of filename case."""
+    for path in BASE_DIR.iterdir():
+        if path.name.lower() == 'background.jpeg':
+            return path
+    return None
+
+def build_synthetic_roster(size):
+    """Build character and recruitment dicts with `size` entries using the real portraits."""
+    with open(BASE_DIR / 'characters.json', 'r', encoding='utf-8') as f:
+        base_characters = json.load(f)
+
+    base_items = sorted(base_characters.items())
+    characters = {}
+    recruitment = {}
+    for i in range(size):
+        base_name, image = base_items[i % len(base_items)]
+        # Keep the real names for the first pass so the roster stays recognisable
+        name = base_name if i < len(base_items) else f"{base_name} {i // len(base_items) + 1}"
+        characters[name] = image
+        recruitment[name] = {
+            "image": image,
+            "recruitment": f"Synthetic recruitment note for {name}. Talk to Viktor in the inn."
+        }
+    return characters, recruitment
+
+def prepare_workspace(size):
+    """Create a temporary working directory laid out the way MainApp expects."""
+    workspace = Path(tempfile.mkdtemp(prefix='suikoden_bench_'))
+    characters, recruitment = build_synthetic_roster(size)
+
+    # No profiles.json: MainApp uses the built-in profile (data/ and images/)
+    (workspace / 'data').mkdir()
+    with open(workspace / 'data' / 'characters.json', 'w', encoding='utf-8') as f:
+        json.dump(characters, f, ensure_ascii=False)
+    with open(workspace / 'data' / 'recruitment.json', 'w', encoding='utf-8') as f:
+        json.dump(recruitment, f, ensure_ascii=False)
+
+    os.symlink(IMAGES_DIR, workspace / 'images', target_is_directory=True)
+    background = find_background_image()
+    if background:
+        os.symlink(background, workspace / 'background.jpeg')
+    return workspace, characters
+
+def summarize(samples):
+    """Summarize a list of durations (seconds) in milliseconds."""
+    if not samples:
+        return {"samples": 0}
+    ms = sorted(s * 1000.0 for s in samples)
+    p95_index = min(len(ms) - 1, int(round(0.95 * (len(ms) - 1))))
+    return {
+        "samples": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "median_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(ms[p95_index], 3),
+        "min_ms": round(ms[0], 3),
+        "max_ms": round(ms[-1], 3)
+    }
+
+def timed(func, *args, **kwargs):
+    """Run func and return (elapsed_seconds, result)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def find_descendant(widget, widget_class):
+    """Depth-first search for the first descendant of the given class."""
+    for child in widget.winfo_children():
+        if isinstance(child, widget_class):
+            return child
+        found = find_descendant(child, widget_class)
+        if found is not None:
+            return found
+    return None
+
+def run_benchmarks(size, iterations, hidden, low_memory=False):
+    """Run every benchmark against a roster of `size` characters."""
+    import tkinter as tk
+    from tkinter import ttk
+
+    sys.path.insert(0, str(BASE_DIR))
+    from main import MainApp
+    from stars_tab import StarsTab
+
+    workspace, characters = prepare_workspace(size)
+    previous_cwd = os.getcwd()
+    os.chdir(workspace)
+    results = {}
+
+    try:
+        # --- Startup to first paint ---
+        start = time.perf_counter()
+        app = MainApp(low_memory=low_memory, sync=False)
+        if hidden:
+            app.withdraw()
+        app.update()
+        results['startup_first_paint'] = summarize([time.perf_counter() - start])
+
+        # --- StarsTab construction ---
+        samples = []
+        for _ in range(iterations):
+            elapsed, tab = timed(StarsTab, app.notebook, app.image_folder, characters)
+            samples.append(elapsed)
+            tab.destroy()
+        results['stars_tab_construction'] = summarize(samples)
+
+        # --- PartyTab._display_party per slot change ---
+        party_tab = app.party_tab
+        names = party_tab.all_star_names
+        samples = []
+        for i in range(iterations * party_tab.party_slots):
+            slot = i % party_tab.party_slots
+            name = names[i % len(names)]
+            party_tab.party_members[slot] = party_tab.character_info[name]['image']
+            party_tab.selected_character_names[slot] = name
+            elapsed, _ = timed(party_tab._display_party)
+            samples.append(elapsed)
+        results['party_display_per_slot_change'] = summarize(samples)
+
+        # --- Picker open time and search keystroke latency ---
+        open_samples = []
+        keystroke_samples = []
+        for _ in range(iterations):
+            before = set(party_tab.winfo_children())
+            start = time.perf_counter()
+            try:
+                party_tab._open_selection_window(None, 0)
+            except tk.TclError as e:
+                # grab_set fails when the root is withdrawn; the window itself still exists
+                print(f"Picker warning: {e}", file=sys.stderr)
+            app.update_idletasks()
+            open_samples.append(time.perf_counter() - start)
+
+            opened = [w for w in party_tab.winfo_children()
+                      if w not in before and isinstance(w, tk.Toplevel)]
+            if not opened:
+                continue
+            window = opened[0]
+            entry = find_descendant(window, ttk.Entry)
+            if entry is not None:
+                # Each insert fires the StringVar trace, which repopulates the list
+                for ch in SEARCH_TEXT:
+                    elapsed, _ = timed(entry.insert, 'end', ch)
+                    keystroke_samples.append(elapsed)
+                for _ in SEARCH_TEXT:
+                    elapsed, _ = timed(entry.delete, len(entry.get()) - 1, 'end')
+                    keystroke_samples.append(elapsed)
+            window.grab_release()
+            window.destroy()
+        results['picker_open'] = summarize(open_samples)
+        results['search_keystroke'] = summarize(keystroke_samples)
+
+        # --- _resize_background per configure event ---
+        samples = []
+        for i in range(iterations * 5):
+            event = FakeConfigureEvent(800 + (i % 10) * 20, 600 + (i % 10) * 15)
+            elapsed, _ = timed(app._resize_background, event)
+            samples.append(elapsed)
+        results['resize_background_per_configure'] = summarize(samples)
+
+        # --- Resident image memory after the run ---
+        app.update()
+        results['image_memory'] = app.image_memory_report()
+
+        app.destroy()
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Suikoden Stream Control GUI.")
+    parser.add_argument('--roster-sizes', type=int, nargs='+', default=[111, 500, 2000],
+                        help="Synthetic roster sizes to benchmark (default: 111 500 2000)")
+    parser.add_argument('--iterations', type=int, default=5,
+                        help="Repetitions per measurement (default: 5)")
+    parser.add_argument('--hidden', action='store_true',
+                        help="Withdraw the root window instead of showing it")
+    parser.add_argument('--low-memory', action='store_true',
+                        help="Run the GUI in low-memory mode (capped, lazily loaded images)")
+    parser.add_argument('--output', type=str, default=None,
+                        help="Write JSON results to this file instead of stdout")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    xvfb_process = start_virtual_display()
+
+    try:
+        import tkinter as tk
+        report = {
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "python": platform.python_version(),
+            "tk": tk.TkVersion,
+            "platform": platform.platform(),
+            "virtual_display": xvfb_process is not None,
+            "hidden_root": args.hidden,
+            "low_memory": args.low_memory,
+            "iterations": args.iterations,
+            "runs": []
+        }
+        for size in args.roster_sizes:
+            print(f"Benchmarking roster size {size}...", file=sys.stderr)
+            report["runs"].append({
+                "roster_size": size,
+                "metrics": run_benchmarks(size, args.iterations, args.hidden, args.low_memory)
+            })
+    finally:
+        if xvfb_process:
+            xvfb_process.terminate()
+            xvfb_process.wait(timeout=5)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
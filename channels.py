@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Channels
+Per-channel state for co-streamers sharing one server. Each channel has its
+own party, recruited stars, session timeline and overlay stream, its own
+locks and files, and a Socket.IO room so updates only reach its viewers.
+"""
+
+import os
+import re
+import threading
+from collections import deque
+from pathlib import Path
+from event_stream import EventRing
+from star_bitset import StarBitset
+from party_history import PartyHistory
+from party_random import MAX_NO_REPEAT
+
+DEFAULT_CHANNEL = 'main'
+MAX_CHANNELS = int(os.environ.get('SUIKODEN_MAX_CHANNELS', '16'))
+CHANNEL_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
+
+class ChannelError(ValueError):
+    """An invalid channel id, or no room for another channel."""
+
+def valid_channel_id(channel_id):
+    return isinstance(channel_id, str) and CHANNEL_ID_PATTERN.match(channel_id) is not None
+
+def channel_data_dir(data_dir, channel_id):
+    """The default channel keeps the original files in data_dir; others get a subdirectory"""
+    if channel_id == DEFAULT_CHANNEL:
+        return Path(data_dir)
+    return Path(data_dir) / 'channels' / channel_id
+
+class Channel:
+    """One channel's mutable state.
+
+    party, version and slot_versions are guarded by lock; star_bitset and
+    stars_store by stars_lock. The party store, timeline, coalescer and image
+    renderer are attached by the server when it opens the channel.
+    """
+    def __init__(self, channel_id, data_dir, party_size=6):
+        self.id = channel_id
+        self.room = f"channel:{channel_id}"
+        self.data_dir = Path(data_dir)
+        self.lock = threading.RLock()  # Re-entrant so a batch can hold it across validation, mutation and save
+        self.party = [None] * party_size
+        self.version = 0  # Incremented on every committed party change
+        self.slot_versions = [0] * party_size  # version at which each slot last changed
+        self.history = PartyHistory()  # Undo/redo of party edits, guarded by lock
+        self.rerolls = deque(maxlen=MAX_NO_REPEAT)  # Names of recently applied random parties, guarded by lock
+        self.stars_lock = threading.Lock()
+        self.star_bitset = StarBitset(0)
+        self.stars_store = None
+        self.timeline = None
+        self.coalescer = None
+        self.strip = None
+        self.events = EventRing()  # Overlay stream for this channel's /stream/party viewers
+        self.clients = set()  # Socket.IO sids in the room
+
+    def to_dict(self):
+        return {'id': self.id, 'clients': len(self.clients), 'version': self.version}
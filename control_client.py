@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Control Client
+Sends commands to the server's control socket over one persistent
+connection.
+
+Usage:
+    python control_client.py add 0 Viktor      # one command, then exit
+    python control_client.py < commands.txt    # one command per line
+    python control_client.py                   # interactive; keep it running and
+                                               # write lines to its stdin
+
+Set SUIKODEN_CONTROL_ADDRESS (host:port or unix:/path) to match the server.
+"""
+
+import os
+import sys
+import json
+import shlex
+import socket
+from control_socket import DEFAULT_ADDRESS, parse_address
+
+class ControlError(Exception):
+    """The server answered a command with an err line."""
+
+class ControlClient:
+    """A reusable connection to the control socket; reconnects once if the server restarted."""
+    def __init__(self, address=None, timeout=5.0):
+        self.address = address or os.environ.get('SUIKODEN_CONTROL_ADDRESS') or DEFAULT_ADDRESS
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+
+    def connect(self):
+        family, address = parse_address(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(address)
+        if family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._file = sock.makefile('rb')
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def send_line(self, line):
+        """Send one raw command line and return the raw reply line"""
+        data = line.strip().encode('utf-8') + b'\n'
+        for attempt in (0, 1):
+            try:
+                if self._sock is None:
+                    self.connect()
+                self._sock.sendall(data)
+                reply = self._file.readline()
+                if reply:
+                    return reply.decode('utf-8').rstrip('\n')
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            self.close()
+            if attempt:
+                break
+        raise ConnectionError(f"Control socket at {self.address} closed the connection")
+
+    def command(self, *args):
+        """Run a command (arguments are quoted for you). Returns the decoded result."""
+        reply = self.send_line(' '.join(shlex.quote(str(arg)) for arg in args))
+        status, _, payload = reply.partition(' ')
+        if status != 'ok':
+            raise ControlError(payload)
+        return json.loads(payload) if payload else None
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        with ControlClient() as client:
+            if argv:
+                reply = client.send_line(' '.join(shlex.quote(arg) for arg in argv))
+                print(reply)
+                return 0 if reply.startswith('ok') else 1
+            interactive = sys.stdin.isatty()
+            failed = False
+            while True:
+                if interactive:
+                    print('> ', end='', flush=True)
+                line = sys.stdin.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                reply = client.send_line(line)
+                failed = failed or not reply.startswith('ok')
+                print(reply, flush=True)
+            return 1 if failed else 0
+    except OSError as e:
+        print(f"err {e}", file=sys.stderr)
+        return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
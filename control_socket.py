@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Control Socket
+Newline-delimited command protocol for stream-deck buttons and scripts. A
+client keeps one connection open and sends one command per line; each gets
+exactly one reply line, so a button press costs a write and a read instead
+of an interpreter start and a Socket.IO handshake.
+
+    add 0 Viktor        ->  ok {"version": 12, ...}
+    recruit "Tai Ho"    ->  ok {"name": "Tai Ho", "recruited": true, ...}
+    bogus               ->  err Unknown command 'bogus'
+
+Arguments are split like a shell command line, so quote names with spaces.
+The server listens on TCP (host:port) or, where supported, a UNIX domain
+socket (unix:/path/to/socket).
+"""
+
+import os
+import json
+import shlex
+import socket
+import inspect
+import logging
+import threading
+import socketserver
+
+DEFAULT_ADDRESS = '127.0.0.1:5055'
+MAX_LINE = 4096  # Longest accepted command, in bytes
+
+logger = logging.getLogger('suikoden_control')
+
+class CommandError(ValueError):
+    """A command that cannot be parsed or applied; sent back as an err line."""
+
+def parse_address(address):
+    """'unix:/path' or 'host:port' -> (socket family, address)"""
+    if address.startswith('unix:'):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("UNIX domain sockets are not supported on this platform")
+        return socket.AF_UNIX, address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    if not port.isdigit():
+        raise ValueError(f"Invalid control address {address!r} (expected host:port or unix:/path)")
+    return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+def parse_command(line):
+    """Split a command line into (name, args)"""
+    try:
+        words = shlex.split(line)
+    except ValueError as e:
+        raise CommandError(str(e))
+    if not words:
+        raise CommandError("Empty command")
+    return words[0].lower(), words[1:]
+
+def format_reply(result=None):
+    return 'ok' if result is None else 'ok ' + json.dumps(result, ensure_ascii=False, separators=(',', ':'))
+
+def format_error(message):
+    return 'err ' + ' '.join(str(message).split())  # Always one line
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    """One persistent client connection: read a line, run it, write one reply"""
+    def setup(self):
+        super().setup()
+        if self.request.family == socket.AF_INET:
+            # Replies are tiny; don't let Nagle hold them back
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        session = {}  # Per-connection state, such as the selected channel
+        control = self.server.control
+        while True:
+            raw = self.rfile.readline(MAX_LINE + 1)
+            if not raw:
+                break
+            if len(raw) > MAX_LINE and not raw.endswith(b'\n'):
+                self.wfile.write(format_error("Command too long").encode('utf-8') + b'\n')
+                break
+            line = raw.decode('utf-8', 'replace').strip()
+            if not line or line.startswith('#'):
+                continue
+            self.wfile.write(control.execute(line, session).encode('utf-8') + b'\n')
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+class ControlServer:
+    """Serves the control protocol on a background thread.
+
+    commands maps a command name to a callable(session, *args) returning a
+    JSON-serializable result (or None). CommandError and ValueError become err
+    replies; anything else is logged and reported as an internal error.
+    on_command(name, ok), if given, is called after every command.
+    """
+    def __init__(self, commands, address=DEFAULT_ADDRESS, on_command=None):
+        self.commands = dict(commands)
+        self.commands.setdefault('ping', lambda session: 'pong')
+        self.commands.setdefault('help', lambda session: sorted(self.commands))
+        self.address = address
+        self.on_command = on_command
+        self._server = None
+        self._thread = None
+
+    def execute(self, line, session):
+        """Run one command line. Returns the reply line (without the newline)."""
+        name = None
+        try:
+            name, args = parse_command(line)
+            command = self.commands.get(name)
+            if command is None:
+                raise CommandError(f"Unknown command {name!r}")
+            try:
+                inspect.signature(command).bind(session, *args)
+            except TypeError:
+                raise CommandError(f"Wrong number of arguments for {name}")
+            reply, ok = format_reply(command(session, *args)), True
+        except ValueError as e:
+            reply, ok = format_error(e), False
+        except Exception as e:
+            logger.error(f"Error running control command {line!r}: {e}")
+            reply, ok = format_error(f"Internal error: {e}"), False
+        if self.on_command and name in self.commands:
+            self.on_command(name, ok)
+        return reply
+
+    def start(self):
+        """Bind and start serving. Raises OSError if the address is unavailable."""
+        family, address = parse_address(self.address)
+        if family == socket.AF_INET:
+            self._server = _TCPServer(address, _CommandHandler)
+        else:
+            if os.path.exists(address):
+                os.unlink(address)  # Left over from a previous run
+            self._server = _UnixServer(address, _CommandHandler)
+            os.chmod(address, 0o600)
+        self._server.control = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name='control-socket', daemon=True)
+        self._thread.start()
+        logger.info(f"Control socket listening on {self.address}")
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        family, address = parse_address(self.address)
+        if family != socket.AF_INET and os.path.exists(address):
+            os.unlink(address)
+        self._server = None
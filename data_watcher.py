@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Data Watcher
+Cheap mtime polling for the character and recruitment JSON files, plus a
+key-level diff so reloads only touch the entries that actually changed.
+"""
+
+import os
+import logging
+import threading
+
+logger = logging.getLogger('suikoden_watcher')
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+def diff_mapping(old, new):
+    """Keys added, removed and changed between two dicts"""
+    added = [key for key in new if key not in old]
+    removed = [key for key in old if key not in new]
+    changed = [key for key in new if key in old and new[key] != old[key]]
+    return added, removed, changed
+
+class FileWatcher:
+    """Polls file signatures (mtime, size).
+
+    Call check() from an existing loop (e.g. Tk's after), or start() to poll
+    on a background thread that calls callback(changed_paths).
+    """
+    def __init__(self, paths, callback=None, interval=DEFAULT_POLL_INTERVAL):
+        self.paths = [str(path) for path in paths]
+        self.callback = callback
+        self.interval = interval
+        self._signatures = {path: _signature(path) for path in self.paths}
+        self._pending = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """Paths whose signature changed and then held steady for one poll.
+
+        Waiting for a second identical reading skips half-written files from
+        editors that save in several writes.
+        """
+        changed = []
+        for path in self.paths:
+            signature = _signature(path)
+            if signature == self._signatures[path]:
+                self._pending.pop(path, None)
+            elif self._pending.get(path) == signature:
+                del self._pending[path]
+                self._signatures[path] = signature
+                changed.append(path)
+            else:
+                self._pending[path] = signature
+        return changed
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='data-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            changed = self.check()
+            if changed:
+                try:
+                    self.callback(changed)
+                except Exception as e:
+                    logger.error(f"Error handling change to {changed}: {e}")
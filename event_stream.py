@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Event Stream
+Ring buffer of pre-encoded Server-Sent Events for read-only overlays. Each
+event is serialized once when published; subscribers resume after the last
+id they saw as long as it is still in the buffer.
+
+Event ids are "<epoch>-<n>" with an epoch picked per buffer, so an id from
+before a server restart (which EventSource sends back on its own when it
+reconnects) is recognised as foreign and answered with a snapshot.
+"""
+
+import json
+import secrets
+import threading
+from collections import deque
+
+DEFAULT_CAPACITY = 256
+
+def encode_event(event_id, event_type, data):
+    """One SSE frame as bytes"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n".encode('utf-8')
+
+class EventRing:
+    """Fixed-size buffer of encoded events with blocking reads for subscribers."""
+    def __init__(self, capacity=DEFAULT_CAPACITY, epoch=None):
+        self.epoch = epoch or secrets.token_hex(4)
+        self.last_id = 0
+        self.subscribers = 0
+        self._events = deque(maxlen=capacity)  # (id, frame)
+        self._condition = threading.Condition()
+
+    def publish(self, event_type, data):
+        """Append an event and wake every waiting subscriber. Returns its id."""
+        with self._condition:
+            self.last_id += 1
+            self._events.append((self.last_id, encode_event(self.format_id(self.last_id), event_type, data)))
+            self._condition.notify_all()
+            return self.last_id
+
+    def format_id(self, event_id):
+        """The SSE id sent for an event number"""
+        return f"{self.epoch}-{event_id}"
+
+    def parse_id(self, text):
+        """The event number in an SSE id from this buffer, or None (send a snapshot) for any other id"""
+        epoch, _, event_id = (text or '').partition('-')
+        if epoch != self.epoch or not event_id.isdigit():
+            return None
+        return int(event_id)
+
+    def since(self, last_id):
+        """Frames after last_id, or None if some of them have already been dropped (or never existed)"""
+        with self._condition:
+            return self._since_locked(last_id)
+
+    def _since_locked(self, last_id):
+        if last_id > self.last_id:
+            return None
+        if last_id == self.last_id:
+            return []
+        if not self._events or self._events[0][0] > last_id + 1:
+            return None
+        # Ids are consecutive, so the first wanted frame sits at a known offset
+        offset = last_id + 1 - self._events[0][0]
+        return [self._events[index][1] for index in range(offset, len(self._events))]
+
+    def wait(self, last_id, timeout):
+        """Block until there are events after last_id (or timeout); same result as since()"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.last_id > last_id, timeout)
+            return self._since_locked(last_id)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - GUI Sync
+Keeps the Tk GUI in step with the web server from a background thread
+running an asyncio loop. Party and progress changes arrive over the
+server's /stream/party event stream, starting from a fresh snapshot on
+every (re)connect; local edits go out over the control socket. Everything
+meant for the Tk thread is put on a queue that it drains with after(), so
+the GUI never waits on the network.
+
+Party edits carry the server version the GUI last showed, so the server
+rejects an edit to slots someone else changed in the meantime (the held
+remote party is then shown instead). Edits made while disconnected are
+dropped when the client resyncs rather than replayed over newer changes.
+
+Events on the queue, as (kind, data):
+    ('party', [name or None, ...])   party changed on the server
+    ('stars', {name: recruited})     full progress (on connect and profile switches)
+    ('star', (name, recruited))      one star flipped
+    ('status', 'connected' | 'disconnected')
+    ('error', message)               the server rejected a local edit
+"""
+
+import os
+import json
+import queue
+import shlex
+import random
+import socket
+import asyncio
+import threading
+import urllib.parse
+from control_socket import DEFAULT_ADDRESS as DEFAULT_CONTROL_ADDRESS, parse_address
+
+SERVER_URL = os.environ.get('SUIKODEN_SERVER_URL', 'http://127.0.0.1:5000')
+CONTROL_ADDRESS = os.environ.get('SUIKODEN_CONTROL_ADDRESS') or DEFAULT_CONTROL_ADDRESS
+SYNC_CHANNEL = os.environ.get('SUIKODEN_CHANNEL', 'main')
+BACKOFF_INITIAL = 0.5  # Seconds before the first reconnect; doubles up to BACKOFF_MAX
+BACKOFF_MAX = 30.0
+READ_TIMEOUT = 60.0  # The stream sends a keepalive every 15 s, so silence this long means a dead connection
+
+class SyncClient:
+    """Background connection to the web server for one channel."""
+    def __init__(self, server_url=SERVER_URL, control_address=CONTROL_ADDRESS, channel=SYNC_CHANNEL):
+        parsed = urllib.parse.urlsplit(server_url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 80
+        self.control_address = control_address
+        self.channel = channel
+        self.events = queue.SimpleQueue()  # Read by the Tk thread through drain()
+        self.connected = False
+        self._loop = None
+        self._thread = None
+        self._outbox = None  # asyncio.Queue of command lines, created on the loop
+        self._stopping = None
+        # Loop-thread state for telling our own edits' echoes from other clients' changes
+        self._pending = 0  # Commands sent or queued without a reply yet
+        self._acked_version = 0  # Highest party version our own commands produced
+        self._held_party = None  # Latest remote party seen while commands were pending
+        self._generation = 0  # Bumped on every resync; party edits from an older one are dropped
+        self._chain_version = 0  # Version that includes our own last edit and nothing newer from others
+        self._synced = None  # asyncio.Event: set while the stream is connected and resynced
+        # Tk-thread state: (generation, version) of the last party the GUI was handed
+        self.applied = (None, 0)
+
+    # --- Tk thread ---
+
+    def start(self):
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name='gui-sync', daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+            self._thread.join(timeout=2)
+
+    def send(self, *args):
+        """Queue a control command (e.g. send('recruit', 'Viktor', 'on')); returns immediately"""
+        line = ' '.join(shlex.quote(str(arg)) for arg in args)
+        self._loop.call_soon_threadsafe(self._enqueue, line)
+
+    def send_party(self, names):
+        """Queue the GUI's party (names, None for empty), based on the last server party it was shown"""
+        line = ' '.join(shlex.quote(name) if name else '-' for name in names)
+        generation, version = self.applied
+        self._loop.call_soon_threadsafe(self._enqueue, line, generation, version)
+
+    def drain(self):
+        """Every event received since the last call"""
+        events = []
+        while True:
+            try:
+                kind, data = self.events.get_nowait()
+            except queue.Empty:
+                return events
+            if kind == 'party':
+                generation, version, data = data
+                self.applied = (generation, version)
+            events.append((kind, data))
+
+    # --- Loop thread ---
+
+    def _run(self, ready):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._outbox = asyncio.Queue()
+        self._stopping = asyncio.Event()
+        self._synced = asyncio.Event()
+        ready.set()
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    def _enqueue(self, line, generation=None, base_version=None):
+        """Queue a command; party edits (with a generation) are sent as 'party @BASE ...'"""
+        self._pending += 1
+        self._outbox.put_nowait((line, generation, base_version))
+
+    async def _main(self):
+        tasks = [asyncio.ensure_future(self._stream_loop()), asyncio.ensure_future(self._command_loop())]
+        await self._stopping.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _post(self, kind, data):
+        self.events.put((kind, data))
+
+    def _set_connected(self, connected):
+        if not connected:
+            self._synced.clear()
+        if connected != self.connected:
+            self.connected = connected
+            self._post('status', 'connected' if connected else 'disconnected')
+
+    def _remote_party(self, version, party, resync=False):
+        names = [member['name'] if member else None for member in party]
+        if resync:
+            # A fresh snapshot, possibly from a restarted server whose versions began again.
+            # Edits queued before it were made against a party we no longer trust.
+            self._acked_version = 0
+            self._chain_version = version
+            self._generation += 1
+            self._held_party = None
+            self._post('party', (self._generation, version, names))
+            self._synced.set()
+        elif self._pending:
+            self._held_party = (version, names)
+        elif version > self._acked_version:
+            self._post('party', (self._generation, version, names))
+
+    async def _http_get_json(self, path):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(f"GET {path} HTTP/1.0\r\nHost: {self.host}\r\n\r\n".encode('ascii'))
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), READ_TIMEOUT)
+        finally:
+            writer.close()
+        head, _, body = response.partition(b'\r\n\r\n')
+        status = head.split(b'\r\n', 1)[0].split()
+        if len(status) < 2 or status[1] != b'200':
+            raise ConnectionError(f"GET {path} failed: {head[:80]!r}")
+        return json.loads(body)
+
+    async def _load_names(self):
+        characters = (await self._http_get_json('/api/characters'))['characters']
+        return {c['id']: c['name'] for c in characters if 'id' in c}
+
+    async def _load_progress(self, names_by_id):
+        query = urllib.parse.urlencode({'names': 1, 'channel': self.channel})
+        stars = await self._http_get_json(f"/api/stars?{query}")
+        recruited = set(stars.get('recruited', []))
+        self._post('stars', {name: name in recruited for name in names_by_id.values()})
+
+    async def _stream_loop(self):
+        """Follow /stream/party, reconnecting with exponential backoff"""
+        backoff = BACKOFF_INITIAL
+        while True:
+            writer = None
+            try:
+                names_by_id = await self._load_names()
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                query = urllib.parse.urlencode({'channel': self.channel})
+                # No Last-Event-ID: a restarted server's ids start again, so always begin with a snapshot
+                writer.write(f"GET /stream/party?{query} HTTP/1.0\r\nHost: {self.host}\r\n"
+                             f"Accept: text/event-stream\r\n\r\n".encode('ascii'))
+                await writer.drain()
+                status = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+                if b' 200 ' not in status:
+                    raise ConnectionError(f"Event stream refused: {status.strip()!r}")
+                while (await asyncio.wait_for(reader.readline(), READ_TIMEOUT)).strip():
+                    pass  # Headers
+                self._set_connected(True)
+                backoff = BACKOFF_INITIAL
+                async for event_type, data in _read_events(reader):
+                    await self._handle_event(event_type, data, names_by_id)
+            except asyncio.CancelledError:
+                raise
+            except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                if writer is not None:
+                    writer.close()
+            self._set_connected(False)
+            # Jitter so several GUIs don't reconnect in lockstep after a server restart
+            await asyncio.sleep(backoff * random.uniform(0.8, 1.2))
+            backoff = min(backoff * 2, BACKOFF_MAX)
+
+    async def _handle_event(self, event_type, data, names_by_id):
+        if event_type == 'profile':
+            # A new roster: star ids now refer to other characters
+            names_by_id.clear()
+            names_by_id.update(await self._load_names())
+        if event_type in ('snapshot', 'profile'):
+            self._remote_party(data['version'], data['party'], resync=True)
+            await self._load_progress(names_by_id)
+        elif event_type == 'party':
+            self._remote_party(data['version'], data['party'])
+        elif event_type == 'star':
+            name = names_by_id.get(data['id'])
+            if name is not None:
+                self._post('star', (name, data['recruited']))
+
+    async def _command_loop(self):
+        """Send queued commands in order over one control connection, reconnecting with backoff"""
+        backoff = BACKOFF_INITIAL
+        reader = writer = None
+        while True:
+            command, generation, base_version = await self._outbox.get()
+            while True:
+                line = command
+                if generation is not None:
+                    # Party edit: only against the party the GUI was shown since the last resync
+                    await self._synced.wait()
+                    if generation != self._generation:
+                        reply = None  # Made before a resync: the server's party wins
+                        break
+                    # Our own earlier edits are already part of what the GUI shows
+                    base_version = max(base_version, self._chain_version)
+                    line = f"party @{base_version} {command}"
+                try:
+                    if writer is None:
+                        reader, writer = await self._open_control()
+                    writer.write(line.encode('utf-8') + b'\n')
+                    await writer.drain()
+                    reply = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+                    if not reply:
+                        raise ConnectionError("Control socket closed")
+                    reply = reply.decode('utf-8').rstrip('\n')
+                    backoff = BACKOFF_INITIAL
+                    break
+                except (OSError, asyncio.TimeoutError):
+                    if writer is not None:
+                        writer.close()
+                    reader = writer = None
+                    await asyncio.sleep(backoff * random.uniform(0.8, 1.2))
+                    backoff = min(backoff * 2, BACKOFF_MAX)
+            self._command_done(reply, base_version if generation is not None else None)
+
+    async def _open_control(self):
+        family, address = parse_address(self.control_address)
+        if family != socket.AF_INET:
+            reader, writer = await asyncio.open_unix_connection(address)
+        else:
+            reader, writer = await asyncio.open_connection(*address)
+        writer.write(f"channel {shlex.quote(self.channel)}\n".encode('utf-8'))
+        await writer.drain()
+        reply = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+        if not reply.startswith(b'ok'):
+            raise ConnectionError(f"Cannot select channel {self.channel}: {reply.decode('utf-8').strip()}")
+        return reader, writer
+
+    def _command_done(self, reply, base_version=None):
+        """Account for a command's reply (None: dropped unsent)"""
+        self._pending -= 1
+        status, _, payload = (reply or '').partition(' ')
+        if reply is None:
+            pass
+        elif status != 'ok':
+            self._post('error', payload)
+        elif payload:
+            result = json.loads(payload)
+            if isinstance(result, dict) and isinstance(result.get('version'), int):
+                self._acked_version = max(self._acked_version, result['version'])
+                if base_version is not None and result['version'] == base_version + 1:
+                    # Nobody else committed in between: the next edit can build on this one
+                    self._chain_version = max(self._chain_version, result['version'])
+        if not self._pending and self._held_party is not None:
+            version, names = self._held_party
+            self._held_party = None
+            if version > self._acked_version:
+                self._post('party', (self._generation, version, names))
+
+async def _read_events(reader):
+    """Parse Server-Sent Events from a stream: yields (event type, data)"""
+    event_type, data = 'message', []
+    while True:
+        line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+        if not line:
+            raise ConnectionError("Event stream closed")
+        line = line.decode('utf-8').rstrip('\r\n')
+        if not line:
+            if data:
+                yield event_type, json.loads('\n'.join(data))
+            event_type, data = 'message', []
+        elif line.startswith(':'):
+            continue  # Keepalive comment
+        else:
+            field, _, value = line.partition(':')
+            value = value[1:] if value.startswith(' ') else value
+            if field == 'event':
+                event_type = value
+            elif field == 'data':
+                data.append(value)
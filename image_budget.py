@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Image Budget
+Caps the memory held by Tk images in the GUI's low-memory mode. Images are
+decoded on demand, converted to Tk and their PIL buffers released; unpinned
+images are evicted least-recently-used once the budget is exceeded.
+"""
+
+from collections import OrderedDict
+from PIL import Image, ImageTk
+
+DEFAULT_BUDGET_BYTES = 16 * 1024 * 1024
+
+def photo_bytes(photo):
+    """Approximate resident size of a Tk photo image (Tk stores 32-bit pixels)"""
+    return photo.width() * photo.height() * 4
+
+def open_scaled(path, size):
+    """Open an image at (roughly) the target size, using JPEG draft mode to decode at a reduced scale."""
+    img = Image.open(path)
+    if img.format == 'JPEG':
+        # Lets libjpeg decode at 1/2, 1/4 or 1/8 scale instead of full resolution
+        img.draft('RGB', size)
+    return img
+
+class ImageBudget:
+    """LRU cache of Tk images with pin counts and a byte budget."""
+    def __init__(self, max_bytes=DEFAULT_BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self.resident_bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> [photo, nbytes, pins]
+
+    def acquire(self, key, loader):
+        """Pin and return the Tk image for key, loading it with loader() (a PIL image) on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            img = loader()
+            try:
+                photo = ImageTk.PhotoImage(img)
+            finally:
+                # The Tk copy is all we keep; drop the decoded pixels now
+                img.close()
+            entry = self._entries[key] = [photo, photo_bytes(photo), 0]
+            self.resident_bytes += entry[1]
+        self._entries.move_to_end(key)
+        entry[2] += 1
+        self._evict()
+        return entry[0]
+
+    def release(self, key):
+        """Unpin an image; it stays cached until evicted"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] > 0:
+            entry[2] -= 1
+            self._evict()
+
+    def track(self, key, photo):
+        """Account for (and pin) an image created elsewhere, replacing any previous one under key"""
+        self.discard(key, force=True)
+        self._entries[key] = [photo, photo_bytes(photo), 1]
+        self.resident_bytes += photo_bytes(photo)
+        self._evict()
+
+    def discard(self, key, force=False):
+        """Drop an entry (pinned ones only when forced)"""
+        entry = self._entries.get(key)
+        if entry is not None and (force or entry[2] == 0):
+            del self._entries[key]
+            self.resident_bytes -= entry[1]
+
+    def _evict(self):
+        if self.resident_bytes <= self.max_bytes:
+            return
+        for key in list(self._entries):
+            if self.resident_bytes <= self.max_bytes:
+                break
+            if self._entries[key][2] == 0:
+                self.resident_bytes -= self._entries.pop(key)[1]
+                self.evictions += 1
+
+    def report(self):
+        """Resident image bytes against the budget"""
+        return {
+            'resident_bytes': self.resident_bytes,
+            'budget_bytes': self.max_bytes,
+            'images': len(self._entries),
+            'pinned': sum(1 for entry in self._entries.values() if entry[2] > 0),
+            'evictions': self.evictions
+        }
@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Image Store
+Content-addressed index of every image the rosters reference. Each file
+is keyed by the SHA-256 of its bytes, so identical art used by several
+names (or profiles) is one blob, validated and decoded once. Missing and
+undecodable files are found when the index is built, not by the GUI.
+
+Build (and check) the manifest with:
+    python image_store.py            # writes image_manifest.json
+    python image_store.py --check    # report problems only
+
+The GUI loads the manifest at startup and re-checks in memory any profile
+whose data or image files changed since it was written.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import logging
+import argparse
+from pathlib import Path
+from collections import OrderedDict
+from PIL import Image
+
+logger = logging.getLogger('suikoden_images')
+
+MANIFEST_FILE = 'image_manifest.json'
+MANIFEST_VERSION = 1
+RUNE_SLOTS = 6
+DEFAULT_DECODED_CACHE = 256  # Decoded blobs kept in memory; more than a whole roster
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def rune_filename(slot):
+    """A party slot's rune background, relative to the profile's image directory"""
+    return f"Rune/{slot + 1}.png"
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+        return [stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        return None
+
+def _load_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def _profile_references(profile):
+    """Every image file a profile uses: {filename relative to its image_dir: [users]}"""
+    references = {}
+    for name, filename in _load_json(profile.characters_path).items():
+        if isinstance(filename, str):
+            references.setdefault(filename, []).append(name)
+    for name, info in _load_json(profile.recruitment_path).items():
+        if isinstance(info, dict) and isinstance(info.get('image'), str):
+            references.setdefault(info['image'], []).append(f"{name} (recruitment)")
+    for slot in range(RUNE_SLOTS):
+        references.setdefault(rune_filename(slot), []).append(f"rune {slot + 1}")
+    return references
+
+class ImageStore:
+    """Blobs keyed by content hash and each profile's filenames mapped onto them.
+
+    blobs: digest -> {'path' (relative to base_dir), 'width', 'height', 'format', 'bytes'}
+    profiles: profile id -> {'image_dir', 'sources' (path -> [mtime_ns, size] or None),
+                             'images' (filename -> digest, or None if unusable), 'problems'}
+    """
+    def __init__(self, base_dir, decoded_cache=DEFAULT_DECODED_CACHE):
+        self.base_dir = Path(base_dir)
+        self.blobs = {}
+        self.profiles = {}
+        self.decoded_cache = decoded_cache
+        self.decodes = 0
+        self._decoded = OrderedDict()  # digest -> RGBA image, least recently used first
+
+    @classmethod
+    def load(cls, base_dir, path=None, **kwargs):
+        """The saved manifest, or an empty store if there is none (or it can't be read)"""
+        store = cls(base_dir, **kwargs)
+        path = Path(path) if path else store.base_dir / MANIFEST_FILE
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return store
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read {path}, rebuilding the image index: {e}")
+            return store
+        if data.get('version') != MANIFEST_VERSION:
+            logger.warning(f"{path} is from another version, rebuilding the image index")
+            return store
+        store.blobs = data.get('blobs', {})
+        store.profiles = data.get('profiles', {})
+        return store
+
+    def save(self, path=None):
+        path = Path(path) if path else self.base_dir / MANIFEST_FILE
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'blobs': self.blobs, 'profiles': self.profiles},
+                      f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+        return path
+
+    def _relative(self, path):
+        try:
+            return Path(path).resolve().relative_to(self.base_dir.resolve()).as_posix()
+        except ValueError:
+            return Path(path).resolve().as_posix()  # Outside the project: keep it absolute
+
+    def is_current(self, profile):
+        """Whether a profile's entry still matches its data and image files on disk"""
+        entry = self.profiles.get(profile.id)
+        if entry is None or entry.get('image_dir') != self._relative(profile.image_dir):
+            return False
+        return all(_signature(self.base_dir / path) == signature
+                   for path, signature in entry['sources'].items())
+
+    def add_profile(self, profile):
+        """(Re)index one profile: hash every file it references, validating each new blob. Returns its problems."""
+        sources = {self._relative(path): _signature(path)
+                   for path in (profile.characters_path, profile.recruitment_path)}
+        images = {}
+        problems = []
+        for filename, users in sorted(_profile_references(profile).items()):
+            path = profile.image_dir / filename
+            relative = self._relative(path)
+            sources[relative] = _signature(path)
+            images[filename] = None
+            if sources[relative] is None:
+                problems.append(f"{filename}: missing (used by {', '.join(users)})")
+                continue
+            try:
+                digest = file_digest(path)
+                if digest not in self.blobs:
+                    # Identical art is decoded and checked once, whichever name it was found under
+                    with Image.open(path) as img:
+                        img.load()
+                        width, height, image_format = img.width, img.height, img.format
+                    self.blobs[digest] = {'path': relative, 'width': width, 'height': height,
+                                          'format': image_format, 'bytes': sources[relative][1]}
+            except (OSError, ValueError, Image.DecompressionBombError) as e:
+                problems.append(f"{filename}: cannot decode ({e}) (used by {', '.join(users)})")
+                continue
+            images[filename] = digest
+        self.profiles[profile.id] = {'image_dir': self._relative(profile.image_dir), 'sources': sources,
+                                     'images': images, 'problems': problems}
+        return problems
+
+    def refresh(self, profiles):
+        """Re-index every profile that changed on disk. Returns the ids that were re-indexed."""
+        refreshed = []
+        for profile in profiles:
+            if self.is_current(profile):
+                continue
+            for problem in self.add_profile(profile):
+                logger.warning(f"{profile.id}: {problem}")
+            refreshed.append(profile.id)
+        if refreshed:
+            self._reindex()
+            logger.info(f"Re-indexed images for {', '.join(refreshed)}")
+        return refreshed
+
+    def _reindex(self):
+        """Point every blob at a file that still holds it and drop blobs nothing references"""
+        holders = {}
+        for entry in self.profiles.values():
+            for filename, digest in entry['images'].items():
+                if digest is not None:
+                    holders.setdefault(digest, set()).add(f"{entry['image_dir']}/{filename}")
+        for digest in list(self.blobs):
+            paths = holders.get(digest)
+            if not paths:
+                del self.blobs[digest]
+                self._decoded.pop(digest, None)
+            elif self.blobs[digest]['path'] not in paths:
+                self.blobs[digest]['path'] = min(paths)
+
+    def decode(self, digest):
+        """A blob as an RGBA image, decoded at most once while cached. Shared: resize or copy it, never draw on it."""
+        img = self._decoded.get(digest)
+        if img is not None:
+            self._decoded.move_to_end(digest)
+            return img
+        with Image.open(self.base_dir / self.blobs[digest]['path']) as source:
+            img = source.convert('RGBA')
+        self.decodes += 1
+        if self.decoded_cache > 0:
+            self._decoded[digest] = img
+            while len(self._decoded) > self.decoded_cache:
+                self._decoded.popitem(last=False)
+        return img
+
+    def view(self, profile_id):
+        return ProfileImages(self, profile_id)
+
+    def report(self):
+        """Counts for the whole store: references, distinct blobs and problems"""
+        references = sum(1 for entry in self.profiles.values() for digest in entry['images'].values() if digest)
+        return {
+            'profiles': len(self.profiles),
+            'references': references,
+            'blobs': len(self.blobs),
+            'duplicates': references - len(self.blobs),
+            'problems': sum(len(entry['problems']) for entry in self.profiles.values()),
+            'decodes': self.decodes
+        }
+
+class ProfileImages:
+    """One profile's filenames resolved through the store (follows refreshes)."""
+    def __init__(self, store, profile_id):
+        self.store = store
+        self.profile_id = profile_id
+
+    def digest(self, filename):
+        """Content hash of a referenced file, or None if it is missing, undecodable or unknown"""
+        entry = self.store.profiles.get(self.profile_id)
+        return entry['images'].get(filename) if entry and filename else None
+
+    def rune(self, slot):
+        return self.digest(rune_filename(slot))
+
+    def decode(self, filename):
+        return self.store.decode(self.digest(filename))
+
+    @property
+    def problems(self):
+        entry = self.store.profiles.get(self.profile_id)
+        return entry['problems'] if entry else []
+
+def load_store(profile_index, decoded_cache=DEFAULT_DECODED_CACHE):
+    """The saved manifest for profile_index's base directory, with stale profiles re-indexed in memory"""
+    store = ImageStore.load(profile_index.base_dir, decoded_cache=decoded_cache)
+    store.refresh(profile_index.profiles.values())
+    return store
+
+def main(argv=None):
+    from profiles import ProfileIndex
+    parser = argparse.ArgumentParser(description="Build the image manifest and check every image the rosters reference.")
+    parser.add_argument('--check', action='store_true', help="report problems without writing the manifest")
+    args = parser.parse_args(argv)
+
+    index = ProfileIndex(os.getcwd())
+    store = ImageStore(index.base_dir)
+    for profile in index.profiles.values():
+        for problem in store.add_profile(profile):
+            print(f"{profile.id}: {problem}", file=sys.stderr)
+    store._reindex()
+    report = store.report()
+    print(f"{report['references']} images in {report['profiles']} profiles: {report['blobs']} distinct, "
+          f"{report['duplicates']} duplicates, {report['problems']} problems")
+    if not args.check:
+        print(f"Wrote {store.save()}")
+    return 1 if report['problems'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
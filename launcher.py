@@ -14,17 +14,11 @@ import threading
 import subprocess
 import webbrowser
 from pathlib import Path
-import multiprocessing
+from log_config import setup_logging
+from supervisor import Supervisor, Child, http_heartbeat, parse_cpus
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('launcher.log')
-    ]
-)
+# Configure logging (records are queued and written by a background listener)
+setup_logging('launcher.log')
 logger = logging.getLogger('suikoden_launcher')
 
 # Path configurations
@@ -32,9 +26,19 @@ BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / 'data'
 DATA_DIR.mkdir(exist_ok=True)
 
+WEB_URL = 'http://127.0.0.1:5000'
+
+# Child priority and CPU affinity, e.g. SUIKODEN_WEB_CPUS=2-3 to keep the
+# web server off the cores the encoder uses (empty: all CPUs)
+WEB_NICE = int(os.environ.get('SUIKODEN_WEB_NICE', '5'))
+GUI_NICE = int(os.environ.get('SUIKODEN_GUI_NICE', '0'))
+WEB_CPUS = parse_cpus(os.environ.get('SUIKODEN_WEB_CPUS', ''))
+GUI_CPUS = parse_cpus(os.environ.get('SUIKODEN_GUI_CPUS', ''))
+
 # Global flags
 web_process = None
 gui_process = None
+supervisor = None
 is_running = True
 
 def setup_environment():
@@ -87,18 +91,23 @@ def check_dependencies():
 
 def start_web_interface():
     """Start the web interface server on localhost only."""
+    # Runs in the supervised 'web' child, which has already set up web_interface.log
     try:
         import web_interface
-        from web_interface import app, socketio
+        from web_interface import app, socketio, start_control_server
+        
+        # Persistent command socket for stream-deck buttons (see control_client.py)
+        start_control_server()
         
         # Override host to localhost only
         logger.info("Starting web interface on http://127.0.0.1:5000")
         socketio.run(app, host='127.0.0.1', port=5000, debug=False, use_reloader=False)
     except Exception as e:
         logger.error(f"Error starting web interface: {e}")
+        sys.exit(1)  # Non-zero so the supervisor restarts it with backoff
 
-def start_gui():
-    """Start the GUI application."""
+def start_gui(fallback=True):
+    """Start the GUI application. Without fallback, a GUI error is not retried as a subprocess."""
     try:
         # Check if main.py exists
         gui_path = BASE_DIR / 'main.py'
@@ -116,6 +125,8 @@ def start_gui():
                     exec(open(gui_path).read())
             except Exception as e:
                 logger.error(f"Error running GUI from module: {e}")
+                if not fallback:
+                    return False
                 # Fallback to subprocess
                 run_gui_process()
         else:
@@ -134,6 +145,10 @@ def start_gui():
         logger.error(f"Error starting GUI application: {e}")
         return False
 
+def run_gui():
+    """Supervised GUI child: exits 0 when the window is closed, 1 if the GUI failed."""
+    sys.exit(0 if start_gui(fallback=False) else 1)
+
 def run_gui_process(gui_file=None):
     """Run the GUI as a subprocess."""
     global gui_process
@@ -178,6 +193,11 @@ def cleanup():
     logger.info("Shutting down Suikoden Display...")
     is_running = False
     
+    # Stop and reap the supervised children
+    if supervisor:
+        supervisor.stop()
+        supervisor.terminate_all()
+    
     # Terminate web process if running
     if web_process:
         logger.info("Terminating web interface")
@@ -214,6 +234,7 @@ def signal_handler(sig, frame):
 
 def main():
     """Main entry point for the launcher."""
+    global supervisor
     # Register signal handlers for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -226,21 +247,21 @@ def main():
         return 1
     
     try:
-        # Use multiprocessing to run components
-        web_process = multiprocessing.Process(target=start_web_interface)
-        web_process.daemon = True
-        web_process.start()
+        # Run each component in its own supervised process: crashed or hung
+        # children are restarted, closing the GUI ends the session
+        supervisor = Supervisor([
+            Child('web', start_web_interface, nice=WEB_NICE, cpus=WEB_CPUS,
+                  heartbeat=http_heartbeat(f"{WEB_URL}/healthz"), log_file='web_interface.log'),
+            Child('gui', run_gui, nice=GUI_NICE, cpus=GUI_CPUS, ends_session=True, log_file='gui.log'),
+        ])
         
         # Open browser after a short delay
         browser_thread = threading.Thread(target=open_browser)
         browser_thread.daemon = True
         browser_thread.start()
         
-        # Start GUI (this will block until GUI closes)
-        start_gui()
-        
-        # If GUI exits, wait briefly for user to close browser too
-        time.sleep(2)
+        # Supervise (this will block until the GUI closes)
+        supervisor.run()
         
         # If we get here, the GUI has closed, so clean up
         cleanup()
@@ -256,10 +277,8 @@ def main():
         return 1
     finally:
         # Ensure processes are terminated
-        if web_process and web_process.is_alive():
-            web_process.terminate()
-        if 'gui_process' in locals() and gui_process and gui_process.poll() is None:
-            gui_process.terminate()
+        if supervisor:
+            supervisor.terminate_all()
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Logging Configuration
+Non-blocking logging: callers only enqueue records, a background QueueListener
+does the console and file writes. Log files rotate by size and by age, and
+per-logger levels can be changed at runtime.
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Rotation defaults (overridable through setup_logging arguments or environment)
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024  # 5 MB
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_ROTATE_SECONDS = 24 * 60 * 60  # Daily
+
+_listener = None
+_listener_pid = None
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'logger': record.name,
+            'level': record.levelname,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class SizedTimedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotates when the file exceeds max_bytes or is older than interval seconds."""
+    def __init__(self, filename, max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT,
+                 interval=DEFAULT_ROTATE_SECONDS, encoding='utf-8'):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.interval = interval
+        # Age counts from when this process opened the file, not its mtime: an old
+        # file (e.g. from a checkout) is appended to, not rotated on the first record
+        self.rollover_at = time.time() + interval
+
+    def shouldRollover(self, record):
+        if self.interval and time.time() >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval
+
+def _parse_level(level):
+    """Accept level names ('DEBUG') or numbers."""
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown log level: {level}")
+    return value
+
+def _parse_level_overrides(spec):
+    """Parse 'name=LEVEL,other=LEVEL' into a dict."""
+    overrides = {}
+    for part in (spec or '').split(','):
+        if '=' in part:
+            name, level = part.split('=', 1)
+            overrides[name.strip()] = level.strip()
+    return overrides
+
+def setup_logging(log_file, level=logging.INFO, max_bytes=None, backup_count=None,
+                  rotate_seconds=None, json_format=None, logger_levels=None):
+    """Configure the root logger with a queue-based, non-blocking pipeline.
+
+    With log_file None, records only go to the console (e.g. in a process that
+    must not rotate a file another process is writing).
+    """
+    global _listener, _listener_pid
+
+    if json_format is None:
+        json_format = os.environ.get('SUIKODEN_LOG_FORMAT', '').lower() == 'json'
+    if max_bytes is None:
+        max_bytes = int(os.environ.get('SUIKODEN_LOG_MAX_BYTES', DEFAULT_MAX_BYTES))
+    if backup_count is None:
+        backup_count = int(os.environ.get('SUIKODEN_LOG_BACKUPS', DEFAULT_BACKUP_COUNT))
+    if rotate_seconds is None:
+        rotate_seconds = int(os.environ.get('SUIKODEN_LOG_ROTATE_SECONDS', DEFAULT_ROTATE_SECONDS))
+
+    # Stop a listener started by this process; one inherited through fork has no thread
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+    _listener = None
+
+    formatter = JsonFormatter() if json_format else logging.Formatter(LOG_FORMAT)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    handlers = [stream_handler]
+    if log_file:
+        file_handler = SizedTimedRotatingFileHandler(
+            log_file, max_bytes=max_bytes, backup_count=backup_count, interval=rotate_seconds)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(_parse_level(level))
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+
+    overrides = _parse_level_overrides(os.environ.get('SUIKODEN_LOG_LEVELS'))
+    overrides.update(logger_levels or {})
+    for name, logger_level in overrides.items():
+        set_logger_level(name, logger_level)
+
+    return _listener
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer."""
+    global _listener
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+    _listener = None
+
+def set_logger_level(name, level):
+    """Change a logger's level at runtime. Use '' or 'root' for the root logger."""
+    logger = logging.getLogger(None if name in ('', 'root') else name)
+    logger.setLevel(_parse_level(level))
+    return logging.getLevelName(logger.level)
+
+def get_logger_levels():
+    """Return the explicitly configured level of every known logger."""
+    levels = {'root': logging.getLevelName(logging.getLogger().level)}
+    for name, logger in sorted(logging.Logger.manager.loggerDict.items()):
+        if isinstance(logger, logging.Logger) and logger.level != logging.NOTSET:
+            levels[name] = logging.getLevelName(logger.level)
+    return levels
+
+atexit.register(shutdown_logging)
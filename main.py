@@ -3,20 +3,63 @@ from tkinter import ttk
 from party_tab import PartyTab
 from stars_tab import StarsTab
 from recruitment_tab import RecruitmentTab
+from progress_store import ProgressJournal
+from data_watcher import FileWatcher, diff_mapping
+from image_budget import ImageBudget, open_scaled
+from profiles import ProfileIndex, ProfileCache
+from image_store import load_store, DEFAULT_DECODED_CACHE
+from party_random import load_roles
+from gui_sync import SyncClient
 import os
 import json
+import logging
 from PIL import Image, ImageTk
+
+logger = logging.getLogger('suikoden_gui')
+
+# How often to check characters.json/recruitment.json for edits
+DATA_POLL_MS = 1000
+
+# Low-memory mode: draft-decoded background, lazily loaded portraits, capped image memory
+LOW_MEMORY = os.environ.get('SUIKODEN_LOW_MEMORY', '0') == '1'
+IMAGE_BUDGET_MB = float(os.environ.get('SUIKODEN_IMAGE_BUDGET_MB', '16'))
+LOW_MEMORY_DECODED_CACHE = 16  # Decoded source images kept by the image store in low-memory mode
+
+# Live sync with the web server: set SUIKODEN_GUI_SYNC=0 to run the GUI on its own
+GUI_SYNC = os.environ.get('SUIKODEN_GUI_SYNC', '1') == '1'
+SYNC_DRAIN_MS = 16  # Apply server events within one frame
+SYNC_ERROR_MS = 8000  # How long a rejected edit stays in the title
+
 class MainApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, low_memory=LOW_MEMORY, sync=GUI_SYNC):
         super().__init__()
-        self.title("Suikoden I Stream Control")
-        self.image_folder = "images"
+        # Server connection (background asyncio thread); the tabs report local edits to it
+        self.sync = SyncClient() if sync else None
+        self.sync_connected = False
+        self.sync_error = None  # Last edit the server rejected, shown in the title for a while
+        self._sync_error_timer = None
+        # Roster profiles; each one's tabs stay built while it is in the LRU
+        self.profile_index = ProfileIndex(os.getcwd())
+        self.profile = self.profile_index.startup_profile()
+        self.profile_tabs = ProfileCache(self._build_profile_tabs, on_evict=self._discard_profile_tabs)
+        # Every referenced image, validated and keyed by content (image_manifest.json, see image_store.py)
+        self.image_store = load_store(self.profile_index, decoded_cache=LOW_MEMORY_DECODED_CACHE if low_memory
+                                      else DEFAULT_DECODED_CACHE)
         # Set up window size and properties
         self.geometry("800x600")
         self.minsize(700, 500)
         
+        # Shared cap on Tk image memory (low-memory mode only)
+        self.low_memory = low_memory
+        self.image_budget = ImageBudget(int(IMAGE_BUDGET_MB * 1024 * 1024)) if low_memory else None
+        
         # Load background image
-        self.bg_image = Image.open("background.jpeg")
+        if low_memory:
+            # Decode at (close to) screen size rather than full resolution
+            self.bg_image = open_scaled("background.jpeg", (self.winfo_screenwidth(), self.winfo_screenheight()))
+            self.bg_image.load()
+        else:
+            self.bg_image = Image.open("background.jpeg")
         self.bg_photo = None
         
         # Create canvas for background
@@ -29,26 +72,221 @@ class MainApp(tk.Tk):
         # Bind resize event
         self.bind("<Configure>", self._resize_background)
         
-        # Load data
-        self.all_characters = self._load_data("characters.json")
-        self.recruitment_info = self._load_data("recruitment.json")
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
         
         # Set up ttk styles
         self._setup_styles()
         
-        # Create notebook and tabs
+        # Create notebook and the active profile's tabs
         self._create_notebook()
+        self._show_profile(self.profile)
         
         # Initial background resize
         # Initial background resize
         self._resize_background(None)
+        
+        # Undo/redo party edits in the active profile's party tab (while it is selected)
+        self.bind("<Control-z>", lambda event: self._party_history_key(event, self.party_tab.undo))
+        self.bind("<Control-y>", lambda event: self._party_history_key(event, self.party_tab.redo))
+        self.bind("<Control-Z>", lambda event: self._party_history_key(event, self.party_tab.redo))  # Ctrl+Shift+Z
+        
+        # F12 prints how much memory the GUI's images are holding
+        self.bind("<F12>", lambda event: self.print_image_memory_report())
+        if low_memory:
+            self.after(2000, self.print_image_memory_report)
+        
+        # Pick up edits to the data files without restarting
+        self.data_watcher = FileWatcher([self.profile.characters_path, self.profile.recruitment_path])
+        self.after(DATA_POLL_MS, self._poll_data_files)
+        
+        # Follow the server's party and progress; its events are applied on this thread
+        if self.sync is not None:
+            self.sync.start()
+            self.after(SYNC_DRAIN_MS, self._drain_sync)
+
+    def _party_history_key(self, event, step):
+        """Undo/redo a party edit while the Party tab is showing, unless the key was meant for a text field"""
+        if isinstance(event.widget, (tk.Entry, ttk.Entry, tk.Text)):
+            return
+        # The keys are bound on the window: on the other tabs the party isn't on screen
+        if self.notebook.select() != str(self.party_tab):
+            return
+        step()
 
     def update_value(self):
-        new_value = self.entry.get() if hasattr(self, 'entry') else ""
-        print(f"Value updated: {new_value}")
-        # If you need to make HTTP requests, import requests at the top
-        # and uncomment the following line:
-        # requests.get(f'http://127.0.0.1:5000/update/{new_value}')
+        """Push the GUI's whole party to the server"""
+        self._send_party(self.party_tab.selected_character_names)
+
+    def _send_party(self, names):
+        if self.sync is not None:
+            self.sync.send_party(names)
+
+    def _send_star(self, name, recruited):
+        if self.sync is not None:
+            self.sync.send('recruit', name, 'on' if recruited else 'off')
+
+    def _drain_sync(self):
+        """Apply everything the sync thread received since the last frame"""
+        for kind, data in self.sync.drain():
+            if kind == 'party':
+                self.party_tab.apply_remote_party(data)
+            elif kind == 'stars':
+                # Full progress on (re)connect: merged, so an empty or older server can't wipe the journal
+                for name in self.stars_tab.merge_remote_progress(data):
+                    self._send_star(name, True)
+            elif kind == 'star':
+                self.stars_tab.apply_remote_progress({data[0]: data[1]})
+            elif kind == 'status':
+                self.sync_connected = data == 'connected'
+                self._update_title()
+            elif kind == 'error':
+                logger.warning(f"Server rejected an edit: {data}")
+                self._show_sync_error(data)
+        self.after(SYNC_DRAIN_MS, self._drain_sync)
+
+    def _show_sync_error(self, message):
+        self.sync_error = message
+        if self._sync_error_timer is not None:
+            self.after_cancel(self._sync_error_timer)
+        self._sync_error_timer = self.after(SYNC_ERROR_MS, self._clear_sync_error)
+        self._update_title()
+
+    def _clear_sync_error(self):
+        self.sync_error = None
+        self._sync_error_timer = None
+        self._update_title()
+
+    def _update_title(self):
+        offline = self.sync is not None and not self.sync_connected
+        title = f"{self.profile.name} Stream Control" + (" (offline)" if offline else "")
+        if self.sync_error:
+            title += f" - edit rejected: {self.sync_error}"
+        self.title(title)
+
+    def _poll_data_files(self):
+        """Reload any data file that changed and apply only the entries that differ"""
+        for filename in self.data_watcher.check():
+            if filename == str(self.profile.characters_path):
+                added, removed, changed = self._reload_mapping(filename, self.all_characters)
+                if added or removed or changed:
+                    self.image_store.refresh([self.profile])
+                    self.party_tab.apply_character_changes(added, removed, changed)
+                    self.stars_tab.apply_character_changes(added, removed, changed)
+            else:
+                added, removed, changed = self._reload_mapping(filename, self.recruitment_info)
+                if added or removed or changed:
+                    self.image_store.refresh([self.profile])
+                    self.recruitment_tab.apply_recruitment_changes(added, removed, changed)
+        self.after(DATA_POLL_MS, self._poll_data_files)
+
+    def _reload_mapping(self, filename, current):
+        """Update a loaded dict in place from its file (shared with the tabs). Returns the diff."""
+        new_data = self._load_data(filename)
+        if not new_data:
+            # Missing or half-written file: keep what we have
+            return [], [], []
+        added, removed, changed = diff_mapping(current, new_data)
+        for key in removed:
+            del current[key]
+        for key in added + changed:
+            current[key] = new_data[key]
+        if added or removed or changed:
+            print(f"Reloaded {filename}: {len(added)} added, {len(changed)} changed, {len(removed)} removed")
+        return added, removed, changed
+
+    def image_memory_report(self):
+        """Approximate bytes held by Tk images, in total and per owner"""
+        report = {
+            'background': self.bg_photo.width() * self.bg_photo.height() * 4 if self.bg_photo else 0,
+            'party_tab': self.party_tab.image_bytes(),
+            'stars_tab': self.stars_tab.image_bytes(),
+            'recruitment_tab': self.recruitment_tab.image_bytes()
+        }
+        if self.image_budget is not None:
+            # Background, portraits and popups live in the budget (including unpinned cached ones)
+            report['budget'] = self.image_budget.report()
+            report['resident_bytes'] = report['budget']['resident_bytes'] + report['party_tab']
+        else:
+            report['resident_bytes'] = sum(report.values())
+        return report
+
+    def print_image_memory_report(self):
+        report = self.image_memory_report()
+        line = ", ".join(f"{k}={v}" for k, v in report.items() if k != 'budget')
+        if 'budget' in report:
+            line += ", budget=" + ", ".join(f"{k}={v}" for k, v in report['budget'].items())
+        print(f"Image memory: {line}")
+
+    def _build_profile_tabs(self, profile):
+        """Load a profile's data and create its tabs (added to the notebook by _show_profile)"""
+        all_characters = self._load_data(profile.characters_path)
+        recruitment_info = self._load_data(profile.recruitment_path)
+        image_folder = str(profile.image_dir)
+        images = self.image_store.view(profile.id)
+        # Durable recruited-stars progress (survives restarts and crashes)
+        progress_store = ProgressJournal(str(profile.data_dir))
+        stars_tab = StarsTab(self.notebook, image_folder, all_characters,
+                             progress_store=progress_store, image_budget=self.image_budget,
+                             on_toggle=self._send_star, images=images)
+        # Optional role tags for the random party rules
+        try:
+            roles = load_roles(profile.data_dir / 'roles.json')
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not load roles: {e}")
+            roles = {}
+        return {
+            'all_characters': all_characters,
+            'recruitment_info': recruitment_info,
+            'progress_store': progress_store,
+            'party_tab': PartyTab(self.notebook, image_folder, all_characters, low_memory=self.low_memory,
+                                  roles=roles, on_edit=self._send_party, images=images,
+                                  recruited_names=lambda: [name for name, recruited
+                                                           in stars_tab.get_recruited_stars().items() if recruited]),
+            'stars_tab': stars_tab,
+            'recruitment_tab': RecruitmentTab(self.notebook, recruitment_info, image_folder=image_folder,
+                                              image_budget=self.image_budget, images=images)
+        }
+
+    def _discard_profile_tabs(self, profile_id, tabs):
+        """Free an evicted profile: its portraits, widgets and progress journal"""
+        tabs['stars_tab'].release_images()
+        for name in ('party_tab', 'stars_tab', 'recruitment_tab'):
+            tabs[name].destroy()
+        tabs['progress_store'].close()
+
+    def _show_profile(self, profile):
+        """Swap the notebook over to a profile's tabs, building them on first use"""
+        for tab in self.notebook.tabs():
+            self.notebook.forget(tab)
+        self.profile = profile
+        tabs = self.profile_tabs.get(profile)
+        self.image_folder = str(profile.image_dir)
+        self.all_characters = tabs['all_characters']
+        self.recruitment_info = tabs['recruitment_info']
+        self.progress_store = tabs['progress_store']
+        self.party_tab = tabs['party_tab']
+        self.stars_tab = tabs['stars_tab']
+        self.recruitment_tab = tabs['recruitment_tab']
+        self.notebook.add(self.party_tab, text="Party")
+        self.notebook.add(self.stars_tab, text="108 Stars")
+        self.notebook.add(self.recruitment_tab, text="Recruitment")
+        self._update_title()
+        self.profile_var.set(profile.name)
+
+    def _on_profile_selected(self, event):
+        profile = list(self.profile_index.profiles.values())[self.profile_selector.current()]
+        if profile.id == self.profile.id:
+            return
+        self._show_profile(profile)
+        self.data_watcher = FileWatcher([profile.characters_path, profile.recruitment_path])
+
+    def _on_close(self):
+        """Flush and compact saved progress before closing the window"""
+        if self.sync is not None:
+            self.sync.stop()
+        for tabs in self.profile_tabs.values():
+            tabs['progress_store'].close()
+        self.destroy()
 
     def _load_data(self, filename):
         try:
@@ -114,6 +352,14 @@ class MainApp(tk.Tk):
                             foreground=text_light,
                             font=('Arial', 10))
         
+        # Checkbutton style (random party rules)
+        self.style.configure("Suikoden.TCheckbutton", 
+                             background=bg_medium, 
+                             foreground=text_light, 
+                             font=('Arial', 10))
+        self.style.map("Suikoden.TCheckbutton", 
+                       background=[("active", bg_medium)])
+        
         # Labelframe styles
         self.style.configure("Suikoden.TLabelframe", 
                            background=bg_medium)
@@ -143,6 +389,9 @@ class MainApp(tk.Tk):
             # Resize image to fit window
             resized_img = self.bg_image.resize((width, height))
             self.bg_photo = ImageTk.PhotoImage(resized_img)
+            resized_img.close()
+            if self.image_budget is not None:
+                self.image_budget.track("background", self.bg_photo)
             
             # Update canvas with new image
             self.bg_canvas.delete("all")
@@ -155,16 +404,17 @@ class MainApp(tk.Tk):
         self.notebook = ttk.Notebook(self.bg_canvas, style="TNotebook")
         self.notebook.place(relx=0.05, rely=0.05, relwidth=0.9, relheight=0.9)
 
-        # Create tabs without bg_color parameter
-        party_tab = PartyTab(self.notebook, self.image_folder, self.all_characters)
-        self.notebook.add(party_tab, text="Party")
-
-        stars_tab = StarsTab(self.notebook, self.image_folder, self.all_characters)
-        self.notebook.add(stars_tab, text="108 Stars")
+        # Profile selector, top right above the notebook (hidden with a single profile)
+        self.profile_var = tk.StringVar()
+        self.profile_selector = ttk.Combobox(self.bg_canvas, textvariable=self.profile_var, state="readonly",
+                                             values=[p['name'] for p in self.profile_index.list()])
+        self.profile_selector.bind("<<ComboboxSelected>>", self._on_profile_selected)
+        if len(self.profile_index.profiles) > 1:
+            self.profile_selector.place(relx=0.95, rely=0.01, anchor="ne")
 
-        recruitment_tab = RecruitmentTab(self.notebook, self.recruitment_info)
-        self.notebook.add(recruitment_tab, text="Recruitment")
-
-if __name__ == "__main__":
+def main():
     app = MainApp()
     app.mainloop()
+
+if __name__ == "__main__":
+    main()
@@ -10,66 +10,110 @@ from pathlib import Path
 
 DATA_DIR = Path("data")
 
+DEFAULT_RECRUITMENT_INFO = "Recruitment information not available."
+
+def build_character_entry(char_id, name, image_path, recruitment_data):
+    """Build one processed character from its characters.json and recruitment.json entries."""
+    # Get recruitment info if available
+    recruitment_info = DEFAULT_RECRUITMENT_INFO
+    
+    # Check if this character has recruitment data
+    if name in recruitment_data:
+        data = recruitment_data[name]
+        
+        if isinstance(data, str):
+            # Handle older format where recruitment data is just a string
+            recruitment_info = data
+            # Keep the image_path from characters.json
+        else:
+            # Handle new format where data is a dict
+            recruitment_info = data.get("recruitment", DEFAULT_RECRUITMENT_INFO)
+            # Use image from recruitment data if specified, otherwise use from characters.json
+            if "image" in data:
+                image_path = data["image"]
+    
+    # Ensure image path is properly formatted
+    if not isinstance(image_path, str):
+        image_path = f"{name}.png"  # Default fallback
+        
+    return {
+        "id": char_id,
+        "name": name,
+        "image_url": f"/static/img/{image_path}",
+        "recruitment_info": recruitment_info
+    }
+
+def load_source_data(data_dir=DATA_DIR):
+    """Load characters.json and recruitment.json (recruitment data is optional)."""
+    characters_path = Path(data_dir) / "characters.json"
+    with open(characters_path, 'r', encoding='utf-8') as f:
+        characters_data = json.load(f)
+    
+    recruitment_path = Path(data_dir) / "recruitment.json"
+    recruitment_data = {}
+    try:
+        with open(recruitment_path, 'r', encoding='utf-8') as f:
+            recruitment_data = json.load(f)
+    except Exception as e:
+        print(f"Warning: Could not load recruitment data: {e}")
+    return characters_data, recruitment_data
+
+def save_processed_data(processed_characters, data_dir=DATA_DIR):
+    output_path = Path(data_dir) / "characters_processed.json"
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(processed_characters, f, ensure_ascii=False, indent=2)
+    return output_path
+
+class IncrementalMerger:
+    """Re-merges only characters whose source entries changed since the last merge.
+
+    Ids stay stable across merges (new characters get the next free id) so
+    anything keyed by id, like recruited-star bits, survives a reload.
+    """
+    def __init__(self, processed=None):
+        self.entries = {c['name']: c for c in processed or [] if isinstance(c, dict) and 'name' in c}
+        self.sources = {}  # name -> (characters.json value, recruitment.json value) last merged
+
+    def merge(self, characters_data, recruitment_data):
+        """Returns (processed characters, diff) where diff lists added/changed entries and removed names."""
+        next_id = max((c.get('id', 0) for c in self.entries.values()), default=0) + 1
+        entries, sources = {}, {}
+        diff = {'added': [], 'changed': [], 'removed': []}
+        for name, image_path in characters_data.items():
+            source = (image_path, recruitment_data.get(name))
+            previous = self.entries.get(name)
+            if previous is not None and self.sources.get(name) == source:
+                entry = previous
+            else:
+                if previous is not None:
+                    char_id = previous['id']
+                else:
+                    char_id, next_id = next_id, next_id + 1
+                entry = build_character_entry(char_id, name, image_path, recruitment_data)
+                if previous is None:
+                    diff['added'].append(entry)
+                elif entry != previous:
+                    diff['changed'].append(entry)
+            entries[name] = entry
+            sources[name] = source
+        diff['removed'] = [name for name in self.entries if name not in entries]
+        self.entries, self.sources = entries, sources
+        return sorted(entries.values(), key=lambda c: c['id']), diff
+
 def merge_character_data():
     """Merges character and recruitment data into a single, properly formatted file."""
     try:
-        DEFAULT_RECRUITMENT_INFO = "Recruitment information not available."
-        
-        # Load the character data (image mappings)
-        characters_path = DATA_DIR / "characters.json"
-        with open(characters_path, 'r', encoding='utf-8') as f:
-            characters_data = json.load(f)
-        
-        # Load the recruitment data
-        recruitment_path = DATA_DIR / "recruitment.json"
-        recruitment_data = {}
-        try:
-            with open(recruitment_path, 'r', encoding='utf-8') as f:
-                recruitment_data = json.load(f)
-        except Exception as e:
-            print(f"Warning: Could not load recruitment data: {e}")
-        
-        # Initialize the new character data structure
-        processed_characters = []
+        # Load the character data (image mappings) and the recruitment data
+        characters_data, recruitment_data = load_source_data()
         
         # Process each character (starting with characters.json as the base)
-        for i, (name, image_path) in enumerate(characters_data.items(), 1):
-            # Get recruitment info if available
-            recruitment_info = DEFAULT_RECRUITMENT_INFO
-            
-            # Check if this character has recruitment data
-            if name in recruitment_data:
-                data = recruitment_data[name]
-                
-                if isinstance(data, str):
-                    # Handle older format where recruitment data is just a string
-                    recruitment_info = data
-                    # Keep the image_path from characters.json
-                else:
-                    # Handle new format where data is a dict
-                    recruitment_info = data.get("recruitment", DEFAULT_RECRUITMENT_INFO)
-                    # Use image from recruitment data if specified, otherwise use from characters.json
-                    if "image" in data:
-                        image_path = data["image"]
-            
-            # Ensure image path is properly formatted
-            if not isinstance(image_path, str):
-                image_path = f"{name}.png"  # Default fallback
-                
-            # Create character entry
-            character = {
-                "id": i,
-                "name": name,
-                "image_url": f"/static/img/{image_path}",
-                "recruitment_info": recruitment_info
-            }
-            
-            processed_characters.append(character)
+        processed_characters = [
+            build_character_entry(i, name, image_path, recruitment_data)
+            for i, (name, image_path) in enumerate(characters_data.items(), 1)
+        ]
         
         # Save the processed data
-        output_path = DATA_DIR / "characters_processed.json"
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(processed_characters, f, ensure_ascii=False, indent=2)
+        output_path = save_processed_data(processed_characters)
         
         print(f"Successfully merged data for {len(processed_characters)} characters to {output_path}")
         print(f"- {len([c for c in processed_characters if c['recruitment_info'] != DEFAULT_RECRUITMENT_INFO])} characters with recruitment information")
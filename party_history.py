@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Party History
+Bounded undo/redo for party edits. Each entry is the delta of one edit
+({slot: (before, after)}) kept in a fixed-size ring buffer: recording, undo
+and redo are O(1) and the oldest edits are overwritten once it is full.
+"""
+
+import os
+
+DEFAULT_HISTORY_SIZE = int(os.environ.get('SUIKODEN_UNDO_DEPTH', '100'))
+
+class PartyHistory:
+    """Ring buffer of party deltas with an undo/redo cursor."""
+    def __init__(self, capacity=DEFAULT_HISTORY_SIZE):
+        self.capacity = max(1, capacity)
+        self._ring = [None] * self.capacity
+        self._start = 0  # Ring index of the oldest entry
+        self._undo = 0  # Entries before the cursor (can be undone)
+        self._redo = 0  # Entries after the cursor (can be redone)
+
+    @property
+    def can_undo(self):
+        return self._undo > 0
+
+    @property
+    def can_redo(self):
+        return self._redo > 0
+
+    def record(self, delta):
+        """Add an edit ({slot: (before, after)}) after the cursor, dropping any redo entries"""
+        if not delta:
+            return
+        self._ring[(self._start + self._undo) % self.capacity] = delta
+        if self._undo == self.capacity:
+            # Full: that write replaced the oldest entry
+            self._start = (self._start + 1) % self.capacity
+        else:
+            self._undo += 1
+        self._redo = 0
+
+    def undo(self):
+        """Step back one edit. Returns {slot: contents before the edit}, or None if there is none."""
+        if not self._undo:
+            return None
+        self._undo -= 1
+        self._redo += 1
+        delta = self._ring[(self._start + self._undo) % self.capacity]
+        return {slot: before for slot, (before, after) in delta.items()}
+
+    def redo(self):
+        """Re-apply the last undone edit. Returns {slot: contents after the edit}, or None."""
+        if not self._redo:
+            return None
+        delta = self._ring[(self._start + self._undo) % self.capacity]
+        self._undo += 1
+        self._redo -= 1
+        return {slot: after for slot, (before, after) in delta.items()}
+
+    def clear(self):
+        self._ring = [None] * self.capacity
+        self._start = self._undo = self._redo = 0
+
+    def info(self):
+        return {'undo': self._undo, 'redo': self._redo, 'capacity': self.capacity}
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Random Party Engine
+Seeded, constrained random parties for randomizer challenges. The roster is
+an array of names; eligibility, roles and recent parties are int bitmasks
+over its indexes, so checking a rule is a couple of AND operations and a
+batch of thousands of deduplicated parties takes milliseconds.
+
+The same roster, seed and rules always produce the same parties, so a chat
+reroll can be re-run and checked by anyone.
+"""
+
+import os
+import json
+import random
+import hashlib
+import secrets
+
+MAX_BATCH = int(os.environ.get('SUIKODEN_RANDOM_MAX_BATCH', '10000'))
+MAX_NO_REPEAT = 32  # Longest "no one from the last K parties" window
+MAX_MISSES = 50  # Rejected draws in a row before the rules are treated as exhausted
+
+class PartyConstraintError(ValueError):
+    """The rules cannot be met by the eligible characters."""
+
+def new_seed():
+    """A fresh seed to report alongside the parties it produced"""
+    return secrets.randbits(32)
+
+def load_roles(path):
+    """Optional role tags from a profile's roles.json: {"healer": ["Name", ...], ...}.
+
+    Returns {name: set of roles}; a missing file means no extra roles.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} must map role names to lists of characters")
+    roles = {}
+    for role, names in data.items():
+        if not isinstance(names, list):
+            raise ValueError(f"{path}: characters for role {role!r} must be a list")
+        for name in names:
+            roles.setdefault(name, set()).add(role)
+    return roles
+
+def _bits(mask):
+    """Indexes of the set bits in mask, lowest first"""
+    indexes = []
+    while mask:
+        low = mask & -mask
+        indexes.append(low.bit_length() - 1)
+        mask ^= low
+    return indexes
+
+class RandomPartyEngine:
+    """Random parties over a fixed roster.
+
+    names is the roster in a stable order (it is part of what a seed
+    reproduces); roles maps a name to the roles it can fill. Role names are
+    matched case-insensitively.
+    """
+    def __init__(self, names, roles=None):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.all_mask = (1 << len(self.names)) - 1
+        self.role_masks = {}  # role (lower case) -> mask of characters that can fill it
+        for name, tags in (roles or {}).items():
+            i = self.index.get(name)
+            if i is None:
+                continue
+            for tag in tags:
+                if tag:
+                    key = tag.strip().lower()
+                    self.role_masks[key] = self.role_masks.get(key, 0) | (1 << i)
+        digest = hashlib.sha1()
+        for name in self.names:
+            digest.update(name.encode('utf-8') + b'\0')
+        for role in sorted(self.role_masks):
+            digest.update(f"{role}={self.role_masks[role]:x}\0".encode('utf-8'))
+        self.fingerprint = digest.hexdigest()[:12]  # Identifies the roster and roles a seed was drawn from
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def roles(self):
+        return sorted(self.role_masks)
+
+    def mask_of(self, names):
+        """Mask of the given names; names not in the roster are ignored"""
+        mask = 0
+        for name in names:
+            i = self.index.get(name)
+            if i is not None:
+                mask |= 1 << i
+        return mask
+
+    def generate(self, seed, count=1, size=6, eligible=None, required_roles=(), no_repeat=0, recent=()):
+        """Draw up to count distinct parties of size names each.
+
+        eligible: mask of characters that may be picked (default: everyone).
+        required_roles: roles each party must include, one member per entry.
+        no_repeat: nobody from the previous no_repeat parties may appear; the
+            window starts with recent (oldest first, lists of names) and each
+            drawn party joins it, so a batch is a sequence of rerolls.
+
+        Returns a list of parties (lists of names, in slot order). Fewer than
+        count are returned only when no more distinct parties could be found;
+        raises PartyConstraintError when not even one can.
+        """
+        if not 1 <= count <= MAX_BATCH:
+            raise ValueError(f"count must be between 1 and {MAX_BATCH}")
+        if not 0 <= no_repeat <= MAX_NO_REPEAT:
+            raise ValueError(f"no_repeat must be between 0 and {MAX_NO_REPEAT}")
+        eligible = self.all_mask if eligible is None else eligible & self.all_mask
+        role_pools = []
+        for role in required_roles:
+            mask = self.role_masks.get(role.strip().lower())
+            if mask is None:
+                raise PartyConstraintError(f"No character has the role {role!r}")
+            role_pools.append(_bits(mask & eligible))
+        pool = _bits(eligible)
+        if not pool:
+            raise PartyConstraintError("No eligible characters")
+        size = min(size, len(pool))
+        if len(role_pools) > size:
+            raise PartyConstraintError(f"{len(role_pools)} required roles do not fit in a party of {size}")
+
+        rng = random.Random(seed)
+        window = [self.mask_of(party) for party in recent][-no_repeat:] if no_repeat else []
+        seen = set()
+        parties = []
+        misses = 0
+        while len(parties) < count and misses < MAX_MISSES:
+            misses += 1
+            excluded = 0
+            for mask in window:
+                excluded |= mask
+            picked = self._draw(rng, size, pool, role_pools, excluded)
+            if picked is None:
+                continue
+            key = 0
+            for i in picked:
+                key |= 1 << i
+            if key in seen:
+                continue
+            seen.add(key)
+            misses = 0
+            parties.append([self.names[i] for i in picked])
+            if no_repeat:
+                window.append(key)
+                if len(window) > no_repeat:
+                    del window[0]
+        if not parties:
+            raise PartyConstraintError("No party satisfies these rules")
+        return parties
+
+    def _draw(self, rng, size, pool, role_pools, excluded):
+        """One party as roster indexes, or None if this draw hit a dead end"""
+        picked = []
+        taken = excluded
+        for role_pool in role_pools:
+            candidates = [i for i in role_pool if not (taken >> i) & 1]
+            if not candidates:
+                return None
+            i = rng.choice(candidates)
+            picked.append(i)
+            taken |= 1 << i
+        rest = [i for i in pool if not (taken >> i) & 1] if taken else pool
+        need = size - len(picked)
+        if len(rest) < need:
+            return None
+        picked.extend(rng.sample(rest, need))
+        rng.shuffle(picked)  # Role picks shouldn't always land in the first slots
+        return picked
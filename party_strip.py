@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Party Strip
+Renders the party into a single PNG/WebP image for OBS image sources that
+cannot run the Socket.IO overlay. Rendering happens on a background worker
+whenever the party changes; requests are served from the per-version cache.
+"""
+
+import io
+import os
+import hashlib
+import logging
+import threading
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger('suikoden_party_strip')
+
+# Same slot geometry as PartyTab: 120x150 rune background, 90x90 portrait
+SLOT_SIZE = (120, 150)
+PORTRAIT_SIZE = (90, 90)
+SLOT_GAP = 10
+ACCENT_COLOR = (233, 69, 96, 255)  # #e94560, the name colour used by PartyTab
+LAYOUTS = {'row': (6, 1), 'grid': (3, 2)}  # columns, rows
+FORMATS = {'png': ('PNG', 'image/png'), 'webp': ('WEBP', 'image/webp')}
+MAX_TILE_CACHE = 256
+
+def _load_font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single bitmap size
+        return ImageFont.load_default()
+
+class PartyStripRenderer:
+    """Background renderer with a cache of the latest image per (format, layout)."""
+    def __init__(self, image_dirs, rune_dir, party_size=6):
+        self.image_dirs = [str(d) for d in image_dirs]
+        self.rune_dir = str(rune_dir)
+        self.party_size = party_size
+        self.version = None
+        self.party = [None] * party_size
+        self.render_count = 0
+
+        self._cache = {}  # (format, layout) -> (version, etag, data)
+        self._wanted = {('png', 'row')}  # Variants that have been requested, rendered on every change
+        self._tiles = {}  # (slot, image file) -> composited RGBA tile
+        self._runes = {}
+        self._font = _load_font(11)
+        self._condition = threading.Condition()
+        self._wake = threading.Event()
+        self._worker = None
+        self._stopped = False
+
+    def start(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run_worker, name='party-strip', daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        """Let the worker exit (the renderer is being discarded)"""
+        self._stopped = True
+        self._wake.set()
+
+    def update(self, version, party):
+        """Record a new party version and wake the worker to render it"""
+        with self._condition:
+            self.version = version
+            self.party = [dict(member) if member else None for member in party]
+        self._wake.set()
+
+    def get(self, fmt='png', layout='row', timeout=1.0):
+        """Returns (etag, data) for the current version, waiting briefly for the worker"""
+        key = (fmt, layout)
+        with self._condition:
+            self._wanted.add(key)
+            fresh = lambda: key in self._cache and self._cache[key][0] == self.version
+            if not fresh():
+                self._wake.set()
+                self._condition.wait_for(fresh, timeout)
+            entry = self._cache.get(key)
+            if entry is not None:
+                return entry[1], entry[2]
+            version, party = self.version, list(self.party)
+        # Worker not running or too slow: render inline rather than fail
+        return self._store(key, version, party)
+
+    def _run_worker(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._stopped:
+                return
+            with self._condition:
+                version, party, wanted = self.version, list(self.party), list(self._wanted)
+            for key in wanted:
+                try:
+                    self._store(key, version, party)
+                except Exception as e:
+                    logger.error(f"Error rendering party strip {key}: {e}")
+
+    def _store(self, key, version, party):
+        data = self.render(party, *key)
+        etag = hashlib.sha1(data).hexdigest()[:20]
+        with self._condition:
+            cached = self._cache.get(key)
+            # A slower render of an older version must not replace a newer one
+            if cached is None or self.version == version:
+                self._cache[key] = (version, etag, data)
+            self._condition.notify_all()
+        return etag, data
+
+    def render(self, party, fmt='png', layout='row'):
+        """Encode the party as one image"""
+        columns, rows = LAYOUTS[layout]
+        width = columns * SLOT_SIZE[0] + (columns - 1) * SLOT_GAP
+        height = rows * SLOT_SIZE[1] + (rows - 1) * SLOT_GAP
+        strip = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        for slot in range(self.party_size):
+            x = (slot % columns) * (SLOT_SIZE[0] + SLOT_GAP)
+            y = (slot // columns) * (SLOT_SIZE[1] + SLOT_GAP)
+            strip.alpha_composite(self._tile(slot, party[slot] if slot < len(party) else None), (x, y))
+        buffer = io.BytesIO()
+        pil_format = FORMATS[fmt][0]
+        if pil_format == 'WEBP':
+            strip.save(buffer, pil_format, lossless=True, method=4)
+        else:
+            strip.save(buffer, pil_format, optimize=False, compress_level=6)
+        self.render_count += 1
+        return buffer.getvalue()
+
+    def _tile(self, slot, member):
+        """One slot (rune background, portrait, labels), cached per character"""
+        image_file = os.path.basename(member.get('image_url') or '') if member else None
+        key = (slot, image_file, member.get('name') if member else None)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            return tile
+
+        tile = self._rune(slot).copy()
+        draw = ImageDraw.Draw(tile)
+        draw.text((SLOT_SIZE[0] // 2, 4), f"Slot {slot + 1}", fill=(255, 255, 255, 255), font=self._font, anchor='mt')
+        if member:
+            portrait = self._portrait(image_file)
+            if portrait is not None:
+                tile.alpha_composite(portrait, ((SLOT_SIZE[0] - PORTRAIT_SIZE[0]) // 2,
+                                                (SLOT_SIZE[1] - PORTRAIT_SIZE[1]) // 2))
+            draw.text((SLOT_SIZE[0] // 2, int(SLOT_SIZE[1] * 0.92)), member.get('name', ''),
+                      fill=ACCENT_COLOR, font=self._font, anchor='ms')
+
+        if len(self._tiles) >= MAX_TILE_CACHE:
+            self._tiles.clear()
+        self._tiles[key] = tile
+        return tile
+
+    def _rune(self, slot):
+        rune = self._runes.get(slot)
+        if rune is None:
+            try:
+                with Image.open(os.path.join(self.rune_dir, f"{slot + 1}.png")) as source:
+                    rune = source.convert('RGBA').resize(SLOT_SIZE)
+            except (OSError, ValueError):
+                # No rune artwork: plain dark panel, like PartyTab's black fallback
+                rune = Image.new('RGBA', SLOT_SIZE, (0, 0, 0, 255))
+                ImageDraw.Draw(rune).rectangle((0, 0, SLOT_SIZE[0] - 1, SLOT_SIZE[1] - 1), outline=(68, 68, 68, 255))
+            self._runes[slot] = rune
+        return rune
+
+    def _portrait(self, image_file):
+        for directory in self.image_dirs:
+            path = os.path.join(directory, image_file)
+            if os.path.exists(path):
+                try:
+                    with Image.open(path) as source:
+                        return source.convert('RGBA').resize(PORTRAIT_SIZE)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Error loading portrait {image_file}: {e}")
+                    return None
+        return None
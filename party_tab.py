@@ -1,14 +1,37 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
+from image_budget import photo_bytes
+from party_history import PartyHistory
+from party_random import RandomPartyEngine, PartyConstraintError, MAX_NO_REPEAT, new_seed
+from collections import deque
 import os
-import random
+
+# Slot geometry (rune background size and the portrait drawn on top of it)
+SLOT_WIDTH, SLOT_HEIGHT = 120, 150
+SLOT_PADX, SLOT_PADY = 15, 10
+PORTRAIT_SIZE = (90, 90)
+MAX_CACHED_TILES = 64
+LOW_MEMORY_CACHED_TILES = 12  # Six on screen plus a few recently shown
+
+# Frame clock for slot transitions
+FRAME_INTERVAL_MS = 16
 
 class PartyTab(ttk.Frame):
-    def __init__(self, parent, image_folder, all_characters, bg_color=None):
+    def __init__(self, parent, image_folder, all_characters, bg_color=None, transition_ms=0, low_memory=False,
+                 roles=None, recruited_names=None, on_edit=None, images=None):
         super().__init__(parent, style="Suikoden.TFrame")
         self.image_folder = image_folder
         self.all_characters = all_characters
+        # Content-addressed image index (image_store.ProfileImages); without it files are opened directly
+        self.images = images
+        # Random party rules: extra role tags ({name: roles}, e.g. from roles.json) and a
+        # callable returning the names of recruited stars
+        self.roles = roles or {}
+        self.recruited_names = recruited_names
+        self._random_engine = None  # Built on first use, dropped when the roster changes
+        self.recent_parties = deque(maxlen=MAX_NO_REPEAT)
+        self.on_edit = on_edit  # Called with the party's names after every local edit, e.g. to tell the server
         
         # Process characters to handle roles
         self.character_info = self._process_character_names()
@@ -16,10 +39,25 @@ class PartyTab(ttk.Frame):
         
         self.party_slots = 6
         self.party_members = [None] * self.party_slots
-        self.displayed_images = [None] * self.party_slots  # Initialize with None
+        
+        # Canvas rendering state: cached tiles, what each slot currently shows,
+        # slots waiting to be redrawn and running cross-fades
+        # Low-memory mode keeps only the Tk copy of each tile, so there is nothing to cross-fade
+        self.low_memory = low_memory
+        self.transition_ms = 0 if low_memory else transition_ms
+        self.max_cached_tiles = LOW_MEMORY_CACHED_TILES if low_memory else MAX_CACHED_TILES
+        self._rune_images = {}
+        self._tile_cache = {}
+        self._rendered = [(None, None)] * self.party_slots
+        self._dirty_slots = set()
+        self._transitions = {}
+        self._frame_clock = None
         
         # Store selected character names to prevent duplicates
         self.selected_character_names = [None] * self.party_slots
+        
+        # Undo/redo of party edits; entries are {slot: ((filename, name) before, after)}
+        self.history = PartyHistory()
 
         self._create_widgets()
 
@@ -40,7 +78,7 @@ class PartyTab(ttk.Frame):
                 if base_name in self.all_characters:
                     # Skip duplicates that have different roles but same base name and image
                     # We'll show the role in the selection window instead
-                    if self.all_characters[base_name] == image:
+                    if self._art_key(self.all_characters[base_name]) == self._art_key(image):
                         continue
                 
                 display_name = base_name
@@ -59,6 +97,11 @@ class PartyTab(ttk.Frame):
                 }
                 
         return character_info
+
+    def _art_key(self, filename):
+        """What makes two portraits the same: their content hash when indexed, else the filename"""
+        digest = self.images.digest(filename) if self.images is not None else None
+        return digest or filename
     
     def _create_widgets(self):
         # Title frame
@@ -98,113 +141,268 @@ class PartyTab(ttk.Frame):
                                style="Suikoden.TButton", command=self._clear_party)
         clear_button.pack(side=tk.RIGHT, padx=20)
         
+        # --- Random Party Rules ---
+        rules_frame = ttk.Frame(self, style="Suikoden.TFrame")
+        rules_frame.pack(pady=(0, 10), padx=20, fill="x")
+        
+        ttk.Label(rules_frame, text="Seed:", style="Suikoden.TLabel").pack(side=tk.LEFT)
+        self.seed_var = tk.StringVar()  # Blank for a fresh seed each roll
+        ttk.Entry(rules_frame, textvariable=self.seed_var, width=11).pack(side=tk.LEFT, padx=(5, 10))
+        
+        ttk.Label(rules_frame, text="Roles:", style="Suikoden.TLabel").pack(side=tk.LEFT)
+        self.required_roles_var = tk.StringVar()  # Comma-separated, e.g. "healer"
+        ttk.Entry(rules_frame, textvariable=self.required_roles_var, width=14).pack(side=tk.LEFT, padx=(5, 10))
+        
+        ttk.Label(rules_frame, text="No repeat:", style="Suikoden.TLabel").pack(side=tk.LEFT)
+        self.no_repeat_var = tk.IntVar(value=0)
+        ttk.Spinbox(rules_frame, from_=0, to=MAX_NO_REPEAT, textvariable=self.no_repeat_var,
+                    width=3).pack(side=tk.LEFT, padx=(5, 10))
+        
+        self.recruited_only_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(rules_frame, text="Recruited only", variable=self.recruited_only_var,
+                        style="Suikoden.TCheckbutton").pack(side=tk.LEFT)
+        
+        # Seed of the last roll, so it can be announced and re-rolled
+        self.last_seed_label = ttk.Label(rules_frame, text="", style="Suikoden.TLabel")
+        self.last_seed_label.pack(side=tk.RIGHT)
+        
         # --- Party Display Frame ---
         display_frame = ttk.Frame(self, style="Suikoden.TFrame")
         display_frame.pack(pady=10, padx=20, fill="both", expand=True)
         
-        # Create frame for party member slots with black background
-        party_slots_frame = ttk.Frame(display_frame, style="Suikoden.TFrame")
-        party_slots_frame.pack(fill="both", expand=True, pady=10)
-        
-        # Store slot frames and background images
-        self.slot_frames = []
-        self.slot_bg_labels = []
+        # The whole party is drawn on one canvas: one image item per slot holding a
+        # pre-composited rune+portrait tile, plus text items for the labels
+        self.party_canvas = tk.Canvas(display_frame, background="black", highlightthickness=0,
+                                      cursor="hand2",
+                                      width=3 * (SLOT_WIDTH + 2 * SLOT_PADX),
+                                      height=2 * (SLOT_HEIGHT + 2 * SLOT_PADY))
+        self.party_canvas.pack(fill="both", expand=True, pady=10)
         
+        self.slot_items = []
         for i in range(self.party_slots):
-            # Create frame for each party slot with black background
-            slot_frame = ttk.Frame(party_slots_frame, style="Suikoden.TFrame", cursor="hand2")
-            # Position in a 2x3 grid layout
-            row = i // 3
-            col = i % 3
-            slot_frame.grid(row=row, column=col, padx=15, pady=10)
-            self.slot_frames.append(slot_frame)
+            tag = f"slot{i}"
+            items = {
+                'tile': self.party_canvas.create_image(0, 0, anchor="nw", tags=(tag,)),
+                'slot_bg': self.party_canvas.create_rectangle(0, 0, 0, 0, fill="black", outline="", tags=(tag,)),
+                'slot_text': self.party_canvas.create_text(0, 0, text=f"Slot {i+1}", fill="white",
+                                                           anchor="n", tags=(tag,)),
+                'name_bg': self.party_canvas.create_rectangle(0, 0, 0, 0, fill="black", outline="",
+                                                              state="hidden", tags=(tag,)),
+                'name_text': self.party_canvas.create_text(0, 0, text="", fill="#e94560",  # Accent color for names
+                                                           font=('Arial', 9, 'bold'), anchor="s", tags=(tag,))
+            }
+            self.slot_items.append(items)
             
             # Make the entire slot clickable
-            slot_frame.bind("<Button-1>", lambda event, idx=i: self._open_selection_window(None, idx))
-            
-            # Load the rune background from file
-            rune_bg_path = os.path.join(self.image_folder, "Rune", f"{i+1}.png")
+            self.party_canvas.tag_bind(tag, "<Button-1>", lambda event, idx=i: self._open_selection_window(None, idx))
+            self.party_canvas.itemconfig(items['tile'], image=self._get_tile(i, None))
+        
+        # Lay slots out in a 2x3 grid that stays centred as the canvas resizes
+        self.party_canvas.bind("<Configure>", self._layout_slots)
+        self._layout_slots(None)
+
+    def _layout_slots(self, event):
+        """Position every slot's items for the current canvas size"""
+        width = event.width if event else int(self.party_canvas.cget("width"))
+        height = event.height if event else int(self.party_canvas.cget("height"))
+        cell_width = max(width / 3, SLOT_WIDTH + 2 * SLOT_PADX)
+        cell_height = max(height / 2, SLOT_HEIGHT + 2 * SLOT_PADY)
+        self.slot_origins = []
+        for i, items in enumerate(self.slot_items):
+            x = int((i % 3) * cell_width + (cell_width - SLOT_WIDTH) / 2)
+            y = int((i // 3) * cell_height + (cell_height - SLOT_HEIGHT) / 2)
+            self.slot_origins.append((x, y))
+            self.party_canvas.coords(items['tile'], x, y)
+            self.party_canvas.coords(items['slot_text'], x + SLOT_WIDTH / 2, y + SLOT_HEIGHT * 0.05)
+            self.party_canvas.coords(items['name_text'], x + SLOT_WIDTH / 2, y + SLOT_HEIGHT * 0.85)
+            self._fit_label_background(items['slot_text'], items['slot_bg'])
+            self._fit_label_background(items['name_text'], items['name_bg'])
+
+    def _fit_label_background(self, text_item, bg_item):
+        """Size a label's black backing rectangle to its text"""
+        bbox = self.party_canvas.bbox(text_item)
+        if bbox and self.party_canvas.itemcget(text_item, "text"):
+            self.party_canvas.coords(bg_item, bbox[0] - 2, bbox[1] - 1, bbox[2] + 2, bbox[3] + 1)
+            self.party_canvas.itemconfig(bg_item, state="normal")
+        else:
+            self.party_canvas.itemconfig(bg_item, state="hidden")
+
+    def _load_rune(self, slot):
+        """Rune background for a slot, or a plain black panel if the artwork is missing"""
+        if slot not in self._rune_images and self.images is not None:
+            digest = self.images.rune(slot)
+            if digest is None:
+                self._rune_images[slot] = Image.new("RGBA", (SLOT_WIDTH, SLOT_HEIGHT), (0, 0, 0, 255))
+            else:
+                self._rune_images[slot] = self.images.store.decode(digest).resize((SLOT_WIDTH, SLOT_HEIGHT))
+        if slot not in self._rune_images:
+            rune_bg_path = os.path.join(self.image_folder, "Rune", f"{slot+1}.png")
             try:
-                rune_bg = Image.open(rune_bg_path)
-                rune_bg = rune_bg.resize((120, 150))
-                rune_bg_tk = ImageTk.PhotoImage(rune_bg)
-                
-                # Create background label
-                bg_label = ttk.Label(slot_frame, image=rune_bg_tk, style="Suikoden.TLabel")
-                bg_label.image = rune_bg_tk
-                bg_label.pack(pady=0)
-                bg_label.bind("<Button-1>", lambda event, idx=i: self._open_selection_window(None, idx))
-                self.slot_bg_labels.append(bg_label)
+                with Image.open(rune_bg_path) as rune_bg:
+                    self._rune_images[slot] = rune_bg.convert("RGBA").resize((SLOT_WIDTH, SLOT_HEIGHT))
             except Exception as e:
-                print(f"Error loading rune background {i+1}: {e}")
-                # Fallback: create black background
-                bg_label = ttk.Label(slot_frame, text=f"Slot {i+1}", 
-                                    style="Suikoden.TLabel", 
-                                    background="black",
-                                    foreground="white",
-                                    width=15, height=8)
-                bg_label.pack(pady=0)
-                bg_label.bind("<Button-1>", lambda event, idx=i: self._open_selection_window(None, idx))
-                self.slot_bg_labels.append(bg_label)
-            
-            # Create placeholder for character image that will overlay on the background
-            image_label = ttk.Label(slot_frame, background=None)
-            image_label.place(relx=0.5, rely=0.5, anchor="center")
-            image_label.bind("<Button-1>", lambda event, idx=i: self._open_selection_window(None, idx))
-            self.displayed_images[i] = image_label
-            
-            # Add slot number label
-            slot_label = ttk.Label(slot_frame, text=f"Slot {i+1}", 
-                                 style="Suikoden.TLabel",
-                                 background="black",
-                                 foreground="white")
-            slot_label.place(relx=0.5, rely=0.05, anchor="n")
-            slot_label.bind("<Button-1>", lambda event, idx=i: self._open_selection_window(None, idx))
-            
-            # Add name label for character (initially empty)
-            name_label = ttk.Label(slot_frame, text="", 
-                                 style="Suikoden.TLabel",
-                                 background="black",
-                                 foreground="#e94560",   # Use accent color for names
-                                 font=('Arial', 9, 'bold'))
-            name_label.place(relx=0.5, rely=0.85, anchor="s")
-            name_label.bind("<Button-1>", lambda event, idx=i: self._open_selection_window(None, idx))
-            # Store reference to name label
-            setattr(slot_frame, "name_label", name_label)
-            
-            # Configure grid weights for proper spacing in the 2x3 layout
-            if i < 3:  # Only need to configure the 3 columns once
-                party_slots_frame.grid_columnconfigure(i, weight=1)
-            if i < 2:  # Only need to configure the 2 rows once
-                party_slots_frame.grid_rowconfigure(i, weight=1)
+                print(f"Error loading rune background {slot+1}: {e}")
+                self._rune_images[slot] = Image.new("RGBA", (SLOT_WIDTH, SLOT_HEIGHT), (0, 0, 0, 255))
+        return self._rune_images[slot]
+
+    def _compose_tile(self, slot, filename):
+        """Rune background with the portrait centred on it (PIL image); raises if the portrait can't load"""
+        tile = self._load_rune(slot).copy()
+        if filename:
+            if self.images is not None:
+                # Shared decode: a portrait used by several names or slots is read once
+                portrait = self.images.decode(filename).resize(PORTRAIT_SIZE)
+            else:
+                image_path = os.path.join(self.image_folder, filename)
+                with Image.open(image_path) as img:
+                    portrait = img.convert("RGBA").resize(PORTRAIT_SIZE)  # Size for 2x3 grid layout
+            tile.alpha_composite(portrait, ((SLOT_WIDTH - PORTRAIT_SIZE[0]) // 2,
+                                            (SLOT_HEIGHT - PORTRAIT_SIZE[1]) // 2))
+        return tile
+
+    def _get_tile(self, slot, filename):
+        """Cached PhotoImage of a composited tile"""
+        key = (slot, filename)
+        if key not in self._tile_cache:
+            if len(self._tile_cache) >= self.max_cached_tiles:
+                # Keep the tiles on screen; dropping their PhotoImage would blank the slot
+                visible = {(i, rendered[0]) for i, rendered in enumerate(self._rendered)}
+                self._tile_cache = {k: v for k, v in self._tile_cache.items() if k in visible}
+            tile = self._compose_tile(slot, filename)
+            photo = ImageTk.PhotoImage(tile)
+            if self.low_memory:
+                # Release the decoded pixels once Tk has its copy
+                tile.close()
+                tile = None
+            self._tile_cache[key] = (tile, photo)
+        return self._tile_cache[key][1]
+
+    def image_bytes(self):
+        """Bytes held by cached tile images"""
+        return sum(photo_bytes(photo) for _, photo in self._tile_cache.values())
+
+    def apply_character_changes(self, added, removed, changed):
+        """Refresh lookups and any party slot whose character changed on disk"""
+        self.character_info = self._process_character_names()
+        self.all_star_names = sorted(self.character_info.keys())
+        self._random_engine = None
+        # Portrait files may have been replaced under the same name
+        changed_files = {self.all_characters.get(name) for name in changed}
+        self._tile_cache = {key: tile for key, tile in self._tile_cache.items() if key[1] not in changed_files}
+        for i, name in enumerate(self.selected_character_names):
+            if name is None:
+                continue
+            if name not in self.character_info:
+                self.party_members[i] = None
+                self.selected_character_names[i] = None
+            else:
+                self.party_members[i] = self.character_info[name]['image']
+                if self.party_members[i] in changed_files:
+                    self._dirty_slots.add(i)
+        self._display_party()
+
+    def _slot_state(self):
+        return list(zip(self.party_members, self.selected_character_names))
+
+    def _record_edit(self, before):
+        """Push the slots changed since before (a _slot_state()) onto the undo history"""
+        after = self._slot_state()
+        delta = {i: (before[i], after[i]) for i in range(self.party_slots) if before[i] != after[i]}
+        if delta:
+            self.history.record(delta)
+            self._notify_edit()
+
+    def _notify_edit(self):
+        if self.on_edit is not None:
+            self.on_edit(list(self.selected_character_names))
+
+    def apply_remote_party(self, names):
+        """Show a party changed elsewhere (not an undoable local edit); names not in this roster leave a slot empty"""
+        for i in range(self.party_slots):
+            name = names[i] if i < len(names) else None
+            if name not in self.character_info:
+                name = None
+            self.selected_character_names[i] = name
+            self.party_members[i] = self.character_info[name]['image'] if name else None
+        self._display_party()
+
+    def undo(self):
+        """Revert the last party edit"""
+        self._apply_history_step(self.history.undo())
+
+    def redo(self):
+        """Re-apply the last undone party edit"""
+        self._apply_history_step(self.history.redo())
+
+    def _apply_history_step(self, slots):
+        if slots is None:
+            self.bell()
+            return
+        for i, (filename, name) in slots.items():
+            if name is not None:
+                if name not in self.character_info:
+                    # Removed from the roster since the edit
+                    filename, name = None, None
+                else:
+                    filename = self.character_info[name]['image']
+            self.party_members[i] = filename
+            self.selected_character_names[i] = name
+        self._notify_edit()
+        self._display_party()
+
+    def _get_random_engine(self):
+        if self._random_engine is None:
+            roles = {name: set(info['roles']) for name, info in self.character_info.items()}
+            for name, tags in self.roles.items():
+                if name not in roles:
+                    name = name.split("(")[0].strip()  # "Name (Role)" is listed under its base name
+                if name in roles:
+                    roles[name].update(tags)
+            self._random_engine = RandomPartyEngine(self.all_star_names, roles)
+        return self._random_engine
 
     def _set_random_party(self):
-        """Sets a random party of 6 from all available characters."""
-        available_characters = list(self.character_info.keys())
-        if len(available_characters) <= self.party_slots:
-            random_party = available_characters
-        else:
-            random_party = random.sample(available_characters, self.party_slots)
+        """Sets a random party under the rules in the controls row (seed, roles, no repeat, recruited only)."""
+        engine = self._get_random_engine()
+        try:
+            seed = int(self.seed_var.get()) if self.seed_var.get().strip() else new_seed()
+            no_repeat = self.no_repeat_var.get()
+        except (ValueError, tk.TclError):
+            messagebox.showerror("Random Party", "Seed and no repeat must be whole numbers.")
+            return
+        required_roles = [role.strip() for role in self.required_roles_var.get().split(",") if role.strip()]
+        eligible = None
+        if self.recruited_only_var.get() and self.recruited_names is not None:
+            eligible = engine.mask_of(self.recruited_names())
+        try:
+            random_party = engine.generate(seed, 1, self.party_slots, eligible, required_roles,
+                                           no_repeat, self.recent_parties)[0]
+        except (PartyConstraintError, ValueError) as e:
+            messagebox.showerror("Random Party", str(e))
+            return
 
-        # Clear current selections
-        self.selected_character_names = [None] * self.party_slots
-        
+        before = self._slot_state()
         for i in range(self.party_slots):
             if i < len(random_party):
                 character_name = random_party[i]
-                filename = self.character_info[character_name]['image']
-                self.party_members[i] = filename
+                self.party_members[i] = self.character_info[character_name]['image']
                 self.selected_character_names[i] = character_name
             else:
                 self.party_members[i] = None
                 self.selected_character_names[i] = None
+        self.recent_parties.append(random_party)
+        self.last_seed_label.config(text=f"Seed {seed}")
+        self._record_edit(before)
         self._display_party()
         
     def _clear_party(self):
         """Clears all party member slots."""
+        before = self._slot_state()
         self.party_members = [None] * self.party_slots
         self.selected_character_names = [None] * self.party_slots
+        self._record_edit(before)
         self._display_party()
+
     def _open_selection_window(self, selected_char=None, slot_index=None):
         """Opens a new window to select a party member for a specific slot."""
         # Create a top-level window
@@ -329,6 +527,7 @@ class PartyTab(ttk.Frame):
         # Select button
         def on_select():
             selection = character_tree.selection()
+            before = self._slot_state()
             if selection:
                 item_id = selection[0]
                 character_name = character_ids[item_id]
@@ -353,6 +552,8 @@ class PartyTab(ttk.Frame):
                     self._update_party_slot(character_name, slot_index, selection_window)
             else:
                 tk.messagebox.showinfo("Selection Required", "Please select a character.")
+            # A move is one edit, so one undo restores both slots
+            self._record_edit(before)
         
         # Create a custom style for the selection window buttons
         style.configure("SelectionWindow.TButton",
@@ -395,6 +596,7 @@ class PartyTab(ttk.Frame):
         
         # Focus on the window
         selection_window.focus_set()
+
     def _update_party_slot(self, character_name, slot_index, selection_window):
         """Updates the party slot with the selected character."""
         if character_name and slot_index is not None and 0 <= slot_index < self.party_slots:
@@ -410,47 +612,71 @@ class PartyTab(ttk.Frame):
         selection_window.destroy()
 
     def _display_party(self):
-        """Displays the current party members in the GUI."""
+        """Displays the current party members in the GUI, redrawing only slots that changed."""
         for i in range(self.party_slots):
+            if (self.party_members[i], self.selected_character_names[i]) != self._rendered[i]:
+                self._dirty_slots.add(i)
+        if self._dirty_slots:
+            self._redraw_dirty_slots()
+
+    def _redraw_dirty_slots(self):
+        """Redraw each dirty slot from its cached tile, starting a cross-fade if enabled"""
+        canvas = self.party_canvas
+        for i in sorted(self._dirty_slots):
             filename = self.party_members[i]
-            if filename:
+            char_name = self.selected_character_names[i] if filename else None
+            name_text = char_name or ""
+            if filename and self.images is not None and self.images.digest(filename) is None:
+                # Missing or undecodable when the image index was built; nothing to open
+                tile = self._get_tile(i, None)
+                name_text = "Image not found"
+            else:
                 try:
-                    # Construct the proper image path
-                    image_path = os.path.join(self.image_folder, filename)
-                    
-                    # Open and resize image
-                    img = Image.open(image_path)
-                    img = img.resize((90, 90))  # Size for 2x3 grid layout
-                    
-                    # Create PhotoImage
-                    img_tk = ImageTk.PhotoImage(img)
-                    
-                    # Display image
-                    self.displayed_images[i].config(image=img_tk)
-                    self.displayed_images[i].image = img_tk  # Keep reference to prevent garbage collection
-                    
-                    # Get character name
-                    char_name = self.selected_character_names[i]
-                    
-                    # Update name label
-                    if char_name and hasattr(self.slot_frames[i], "name_label"):
-                        self.slot_frames[i].tooltip_text = char_name
-                        self.slot_frames[i].name_label.config(text=char_name)
+                    tile = self._get_tile(i, filename)
                 except FileNotFoundError:
                     print(f"Image file not found: {filename}")
-                    self.displayed_images[i].config(image="")
-                    if hasattr(self.slot_frames[i], "name_label"):
-                        self.slot_frames[i].name_label.config(text="Image not found")
+                    tile = self._get_tile(i, None)
+                    name_text = "Image not found"
                 except Exception as e:
                     print(f"Error loading image for {filename}: {e}")
-                    self.displayed_images[i].config(image="")
-                    if hasattr(self.slot_frames[i], "name_label"):
-                        self.slot_frames[i].name_label.config(text="Error")
+                    tile = self._get_tile(i, None)
+                    name_text = "Error"
+            
+            previous_file = self._rendered[i][0]
+            self._rendered[i] = (filename, self.selected_character_names[i])
+            if self.transition_ms > 0 and (i, previous_file) in self._tile_cache and (i, filename) in self._tile_cache:
+                self._start_transition(i, self._tile_cache[(i, previous_file)][0], self._tile_cache[(i, filename)][0])
             else:
-                # Clear the image and name if no character is selected
-                self.displayed_images[i].config(image="")
-                if hasattr(self.slot_frames[i], "name_label"):
-                    self.slot_frames[i].name_label.config(text="")
+                self._transitions.pop(i, None)
+                canvas.itemconfig(self.slot_items[i]['tile'], image=tile)
+            canvas.itemconfig(self.slot_items[i]['name_text'], text=name_text)
+            self._fit_label_background(self.slot_items[i]['name_text'], self.slot_items[i]['name_bg'])
+        self._dirty_slots.clear()
+
+    def _start_transition(self, slot, from_tile, to_tile):
+        """Cross-fade a slot from one tile to another on the frame clock"""
+        frames = max(1, self.transition_ms // FRAME_INTERVAL_MS)
+        self._transitions[slot] = {'from': from_tile, 'to': to_tile, 'frame': 0, 'frames': frames, 'photo': None}
+        if self._frame_clock is None:
+            self._frame_clock = self.after(FRAME_INTERVAL_MS, self._on_frame)
+
+    def _on_frame(self):
+        """One tick of the frame clock: advance every running transition together"""
+        self._frame_clock = None
+        for slot, transition in list(self._transitions.items()):
+            transition['frame'] += 1
+            if transition['frame'] >= transition['frames']:
+                filename = self._rendered[slot][0]
+                self.party_canvas.itemconfig(self.slot_items[slot]['tile'], image=self._get_tile(slot, filename))
+                del self._transitions[slot]
+                continue
+            alpha = transition['frame'] / transition['frames']
+            # Keep a reference on the transition so Tk doesn't drop the frame image
+            transition['photo'] = ImageTk.PhotoImage(Image.blend(transition['from'], transition['to'], alpha))
+            self.party_canvas.itemconfig(self.slot_items[slot]['tile'], image=transition['photo'])
+        if self._transitions:
+            self._frame_clock = self.after(FRAME_INTERVAL_MS, self._on_frame)
+
     def get_current_party_files(self):
         """Returns the list of current party member filenames."""
         return self.party_members
\ No newline at end of file
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Profiles
+Roster profiles (Suikoden I, II, randomizer rosters, ...), each with its own
+data and image directories. The index is small and always in memory; each
+profile's data is loaded on first use and kept warm in an LRU.
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from collections import OrderedDict
+
+logger = logging.getLogger('suikoden_profiles')
+
+PROFILE_INDEX_FILE = 'profiles.json'
+DEFAULT_PROFILE_CACHE_SIZE = int(os.environ.get('SUIKODEN_PROFILE_CACHE', '3'))
+
+# Used when there is no profiles.json: the original Suikoden I layout
+BUILTIN_PROFILES = {
+    'default': 'suikoden1',
+    'profiles': {
+        'suikoden1': {'name': 'Suikoden I', 'data_dir': 'data', 'image_dir': 'images'}
+    }
+}
+
+class Profile:
+    """One roster: where its data files and images live."""
+    def __init__(self, profile_id, name, data_dir, image_dir):
+        self.id = profile_id
+        self.name = name
+        self.data_dir = Path(data_dir)
+        self.image_dir = Path(image_dir)
+
+    @property
+    def characters_path(self):
+        return self.data_dir / 'characters.json'
+
+    @property
+    def recruitment_path(self):
+        return self.data_dir / 'recruitment.json'
+
+    def to_dict(self):
+        return {'id': self.id, 'name': self.name}
+
+class ProfileIndex:
+    """The profiles listed in profiles.json, with paths resolved against base_dir."""
+    def __init__(self, base_dir, index_file=PROFILE_INDEX_FILE):
+        self.base_dir = Path(base_dir)
+        self.index_path = self.base_dir / index_file
+        self.profiles = OrderedDict()
+        self.default = None
+        self.load()
+
+    def load(self):
+        index = BUILTIN_PROFILES
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (ValueError, OSError) as e:
+            logger.error(f"Failed to read {self.index_path}, using the built-in profile: {e}")
+
+        self.profiles = OrderedDict()
+        for profile_id, entry in index.get('profiles', {}).items():
+            self.profiles[profile_id] = Profile(
+                profile_id,
+                entry.get('name', profile_id),
+                self.base_dir / entry.get('data_dir', os.path.join('profiles', profile_id, 'data')),
+                self.base_dir / entry.get('image_dir', os.path.join('profiles', profile_id, 'images'))
+            )
+        if not self.profiles:
+            raise ValueError(f"No profiles defined in {self.index_path}")
+        self.default = index.get('default')
+        if self.default not in self.profiles:
+            self.default = next(iter(self.profiles))
+        return self.profiles
+
+    def get(self, profile_id):
+        return self.profiles.get(profile_id)
+
+    def startup_profile(self):
+        """The profile named by SUIKODEN_PROFILE, else the index default"""
+        return self.profiles.get(os.environ.get('SUIKODEN_PROFILE')) or self.profiles[self.default]
+
+    def list(self):
+        return [profile.to_dict() for profile in self.profiles.values()]
+
+class ProfileCache:
+    """LRU of loaded per-profile state.
+
+    get() loads a profile with loader(profile) on a miss; the least recently
+    used entries beyond capacity are handed to on_evict(profile_id, state).
+    """
+    def __init__(self, loader, capacity=DEFAULT_PROFILE_CACHE_SIZE, on_evict=None):
+        self.loader = loader
+        self.capacity = max(1, capacity)
+        self.on_evict = on_evict
+        self._entries = OrderedDict()
+
+    def __contains__(self, profile_id):
+        return profile_id in self._entries
+
+    def get(self, profile):
+        state = self._entries.get(profile.id)
+        if state is None:
+            state = self.loader(profile)
+            logger.info(f"Loaded profile {profile.id}")
+        self.put(profile.id, state)
+        return state
+
+    def put(self, profile_id, state):
+        """Store (or refresh) a profile's state as the most recently used"""
+        self._entries[profile_id] = state
+        self._entries.move_to_end(profile_id)
+        while len(self._entries) > self.capacity:
+            evicted_id, evicted = self._entries.popitem(last=False)
+            logger.info(f"Evicted profile {evicted_id} from the cache")
+            if self.on_evict is not None:
+                self.on_evict(evicted_id, evicted)
+
+    def loaded(self):
+        return list(self._entries)
+
+    def values(self):
+        return list(self._entries.values())
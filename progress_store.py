@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Progress Store
+Durable recruited-stars progress. Every toggle appends one small checksummed
+line to a journal; a background thread fsyncs the journal and periodically
+compacts it into a snapshot. On startup the snapshot is loaded and the journal
+replayed, ignoring a torn last line left by a crash.
+"""
+
+import os
+import json
+import zlib
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger('suikoden_progress')
+
+# Compact the journal into the snapshot after this many records
+DEFAULT_COMPACT_EVERY = 256
+
+def _checksum(body):
+    return format(zlib.crc32(body.encode('utf-8')) & 0xffffffff, '08x')
+
+def encode_record(seq, name, recruited):
+    """Encode one journal line: seq, flag, name and a CRC32 of the three."""
+    body = f"{seq}\t{1 if recruited else 0}\t{name}"
+    return f"{body}\t{_checksum(body)}\n".encode('utf-8')
+
+def decode_record(line):
+    """Decode a journal line. Returns (seq, name, recruited) or None if torn/corrupt."""
+    try:
+        text = line.decode('utf-8').rstrip('\n')
+        body, checksum = text.rsplit('\t', 1)
+        if _checksum(body) != checksum:
+            return None
+        seq, flag, name = body.split('\t', 2)
+        return int(seq), name, flag == '1'
+    except (UnicodeDecodeError, ValueError):
+        return None
+
+class ProgressJournal:
+    """Append-only journal plus snapshot for recruited-star progress."""
+    def __init__(self, directory, name='stars_progress', compact_every=DEFAULT_COMPACT_EVERY, fsync=True):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path = self.directory / f'{name}_snapshot.json'
+        self.journal_path = self.directory / f'{name}.journal'
+        self.compact_every = compact_every
+        self.fsync = fsync
+
+        self.state = {}
+        self.seq = 0  # Sequence number of the last record written or replayed
+        self.snapshot_seq = 0  # Sequence number covered by the snapshot
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._fd = None
+        self._wake = threading.Event()
+        self._closing = False
+        self._dirty = False
+        self._worker = None
+
+    def load(self):
+        """Load the snapshot and replay the journal. Returns a name -> recruited dict."""
+        with self._lock:
+            self.state = {}
+            self.snapshot_seq = 0
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                self.state = {name: bool(value) for name, value in snapshot.get('recruited', {}).items()}
+                self.snapshot_seq = int(snapshot.get('seq', 0))
+            except FileNotFoundError:
+                pass
+            except (ValueError, OSError) as e:
+                logger.error(f"Failed to read progress snapshot, replaying journal only: {e}")
+
+            self.seq = self.snapshot_seq
+            replayed = 0
+            valid_length = 0
+            try:
+                with open(self.journal_path, 'rb') as f:
+                    for line in f:
+                        record = decode_record(line) if line.endswith(b'\n') else None
+                        if record is None:
+                            # Torn write from a crash; everything after it is discarded
+                            logger.warning("Ignoring incomplete record at end of progress journal")
+                            break
+                        valid_length += len(line)
+                        seq, name, recruited = record
+                        if seq <= self.snapshot_seq:
+                            continue  # Already folded into the snapshot
+                        self.state[name] = recruited
+                        self.seq = seq
+                        replayed += 1
+                size = self.journal_path.stat().st_size
+                if size != valid_length:
+                    # Drop the torn tail so new records start on a clean line
+                    with open(self.journal_path, 'r+b') as f:
+                        f.truncate(valid_length)
+            except FileNotFoundError:
+                pass
+
+            self._open_journal()
+            logger.info(f"Loaded progress: {sum(self.state.values())} recruited, {replayed} journal records replayed")
+            return dict(self.state)
+
+    def _open_journal(self):
+        if self._fd is None:
+            self._fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        if self._worker is None:
+            self._closing = False
+            self._worker = threading.Thread(target=self._run_worker, name='progress-journal', daemon=True)
+            self._worker.start()
+
+    def record(self, name, recruited):
+        """Append one toggle to the journal (a single small sequential write)."""
+        with self._lock:
+            if self._fd is None:
+                self._open_journal()
+            self.seq += 1
+            os.write(self._fd, encode_record(self.seq, name, recruited))
+            self.state[name] = bool(recruited)
+            self._dirty = True
+        # fsync and compaction happen on the worker thread, off the caller's path
+        self._wake.set()
+
+    def get_state(self):
+        with self._lock:
+            return dict(self.state)
+
+    def _run_worker(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            try:
+                self._sync()
+                if self.seq - self.snapshot_seq >= self.compact_every:
+                    self.compact()
+            except OSError as e:
+                logger.error(f"Progress journal maintenance failed: {e}")
+            if self._closing:
+                return
+
+    def _sync(self):
+        with self._lock:
+            if not self._dirty or self._fd is None:
+                return
+            self._dirty = False
+            fd = self._fd
+        if self.fsync:
+            os.fsync(fd)
+
+    def compact(self):
+        """Fold the journal into a new snapshot and truncate the journal."""
+        with self._compact_lock:
+            with self._lock:
+                snapshot = {'seq': self.seq, 'recruited': dict(self.state)}
+            # Written outside the record lock so a toggle never waits on this fsync
+            tmp_path = self.snapshot_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            # Atomic swap; if we crash before truncating, replay skips seq <= snapshot seq
+            os.replace(tmp_path, self.snapshot_path)
+            with self._lock:
+                self.snapshot_seq = snapshot['seq']
+                # Records appended meanwhile stay in the journal until the next compaction
+                if self._fd is not None and self.seq == snapshot['seq']:
+                    os.ftruncate(self._fd, 0)
+            logger.info(f"Compacted progress journal at seq {self.snapshot_seq}")
+
+    def close(self):
+        """Flush outstanding records, compact and release the journal."""
+        self._closing = True
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join(timeout=5)
+            self._worker = None
+        try:
+            if self.seq != self.snapshot_seq:
+                self.compact()
+        except OSError as e:
+            logger.error(f"Failed to compact progress journal on close: {e}")
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
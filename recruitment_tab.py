@@ -2,14 +2,28 @@ import tkinter as tk
 from tkinter import ttk, Toplevel
 import os
 from PIL import Image, ImageTk
+from search_index import SearchIndex
+from image_budget import open_scaled, photo_bytes
+
+POPUP_IMAGE_SIZE = (200, 200)
 
 class RecruitmentTab(ttk.Frame):
-    def __init__(self, parent, recruitment_info, image_folder="Images"):
+    def __init__(self, parent, recruitment_info, image_folder="Images", image_budget=None, images=None):
         super().__init__(parent, style="Suikoden.TFrame")
         self.recruitment_info = recruitment_info
         self.image_folder = image_folder
+        self.images = images  # Content-addressed image index (image_store.ProfileImages), optional
+        self.image_budget = image_budget  # Low-memory mode: popup images are shared and capped
+        self.open_popups = {}  # popup -> its image, for memory reporting
         self.character_images = {}  # Store image references to prevent garbage collection
         self.char_name_positions = {}  # Store positions of character names in text widget
+        
+        # Full-text index over names and recruitment methods
+        self.search_index = SearchIndex()
+        for name, info in self.recruitment_info.items():
+            self.search_index.add(name, name, None, info.get('recruitment', ''))
+        self.search_results = []
+        
         self._create_widgets()
 
     def _create_widgets(self):
@@ -58,9 +72,37 @@ class RecruitmentTab(ttk.Frame):
         )
         hint_label.pack(pady=(0, 5))
         
+        # Search bar (names and recruitment text, ranked, prefix matching)
+        search_frame = ttk.Frame(main_frame, style="Suikoden.TFrame")
+        search_frame.pack(fill="x", pady=(0, 5))
+        
+        search_label = ttk.Label(search_frame, text="Search:", style="Suikoden.TLabel", background=bg_medium)
+        search_label.pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.pack(side=tk.LEFT, fill="x", expand=True)
+        self.search_var.trace_add("write", self._on_search_change)
+        
+        # Ranked results list, only shown while there is a query
+        self.results_frame = ttk.Frame(main_frame, style="Suikoden.TFrame")
+        self.results_list = tk.Listbox(
+            self.results_frame,
+            height=6,
+            background="#111111",
+            foreground=text_light,
+            selectbackground=accent_color,
+            borderwidth=0,
+            highlightthickness=0,
+            font=('Arial', 10)
+        )
+        self.results_list.pack(fill="x")
+        self.results_list.bind("<<ListboxSelect>>", self._on_result_select)
+        
         # Create a frame for the text area and scrollbar
         text_frame = ttk.Frame(main_frame, style="Suikoden.TFrame")
         text_frame.pack(fill="both", expand=True)
+        self.text_frame = text_frame
         
         # Create a styled scrollbar
         scrollbar = ttk.Scrollbar(text_frame, orient=tk.VERTICAL)
@@ -93,6 +135,7 @@ class RecruitmentTab(ttk.Frame):
         self.text_area.tag_configure("char_name", font=('Arial', 10, 'bold'), foreground=accent_color)
         self.text_area.tag_configure("method", font=('Arial', 10), foreground=text_light)
         self.text_area.tag_configure("category", font=('Arial', 11, 'bold'), foreground="#4ade80")
+        self.text_area.tag_configure("search_hit", background=accent_color, foreground="#ffffff")
         
         # Add binding for clicking on character names
         self.text_area.tag_bind("char_name", "<Button-1>", self._on_character_click)
@@ -133,6 +176,65 @@ class RecruitmentTab(ttk.Frame):
             # Add the recruitment method with proper styling
             self.text_area.insert(tk.END, f"{info['recruitment']}\n\n", "method")
     
+    def apply_recruitment_changes(self, added, removed, changed):
+        """Update entries in place after recruitment_info changed on disk"""
+        for name in removed:
+            self.search_index.remove(name)
+        for name in added + changed:
+            self.search_index.add(name, name, None, self.recruitment_info[name].get('recruitment', ''))
+        
+        self.text_area.config(state="normal")
+        if added or removed or any("\n" in self.recruitment_info[name]['recruitment'] for name in changed):
+            # Entries move between lines, so refill the text (the widget itself is kept)
+            yview = self.text_area.yview()[0]
+            self.text_area.delete("1.0", tk.END)
+            self.char_name_positions.clear()
+            self._populate_text_area()
+            self.text_area.yview_moveto(yview)
+        else:
+            # Each method sits on its name's line, so replacing it leaves every other index valid
+            for name in changed:
+                start_pos, end_pos, _ = self.char_name_positions[name]
+                info = self.recruitment_info[name]
+                self.text_area.delete(end_pos, f"{end_pos} lineend")
+                self.text_area.insert(end_pos, info['recruitment'], "method")
+                self.char_name_positions[name] = (start_pos, end_pos, info)
+        self.text_area.config(state="disabled")
+        
+        if self.search_var.get().strip():
+            self._on_search_change()
+    
+    def _on_search_change(self, *args):
+        """Re-run the search and list ranked results with highlighted snippets"""
+        query = self.search_var.get().strip()
+        self.results_list.delete(0, tk.END)
+        self.text_area.tag_remove("search_hit", "1.0", tk.END)
+        
+        if not query:
+            self.search_results = []
+            self.results_frame.pack_forget()
+            return
+        
+        self.search_results = self.search_index.search(query, limit=15, marks=('«', '»'), escape=False)
+        for result in self.search_results:
+            self.results_list.insert(tk.END, f"{result['name']}: {result['snippet']}")
+        if not self.search_results:
+            self.results_list.insert(tk.END, "No matches")
+        self.results_frame.pack(fill="x", pady=(0, 5), before=self.text_frame)
+    
+    def _on_result_select(self, event):
+        """Scroll to the selected result and highlight its entry"""
+        selection = self.results_list.curselection()
+        if not selection or selection[0] >= len(self.search_results):
+            return
+        name = self.search_results[selection[0]]['name']
+        if name not in self.char_name_positions:
+            return
+        start_pos, end_pos, info = self.char_name_positions[name]
+        self.text_area.tag_remove("search_hit", "1.0", tk.END)
+        self.text_area.tag_add("search_hit", start_pos, end_pos)
+        self.text_area.see(start_pos)
+    
     def _on_character_click(self, event):
         # Find which character was clicked
         clicked_pos = self.text_area.index(f"@{event.x},{event.y}")
@@ -143,6 +245,22 @@ class RecruitmentTab(ttk.Frame):
                 self._show_character_image(name, info)
                 break
     
+    def _read_popup_image(self, image_path):
+        with open_scaled(image_path, POPUP_IMAGE_SIZE) as image:
+            return image.resize(POPUP_IMAGE_SIZE, Image.LANCZOS)
+    
+    def _on_popup_destroy(self, event, popup, key):
+        # <Destroy> also fires for each child widget; only the popup itself counts
+        if event.widget is not popup:
+            return
+        self.open_popups.pop(popup, None)
+        if key is not None:
+            self.image_budget.release(key)
+    
+    def image_bytes(self):
+        """Bytes of the images shown in open popups"""
+        return sum(photo_bytes(photo) for photo in self.open_popups.values())
+    
     def _show_character_image(self, name, info):
         # Create a popup window to display the character image
         popup = Toplevel(self)
@@ -155,14 +273,35 @@ class RecruitmentTab(ttk.Frame):
         # Attempt to load and display character image
         try:
             image_path = os.path.join(self.image_folder, info["image"])
-            image = Image.open(image_path)
-            
-            # Resize the image to fit in the popup window
-            image = image.resize((200, 200), Image.LANCZOS)
-            photo = ImageTk.PhotoImage(image)
+            digest = self.images.digest(info["image"]) if self.images is not None else None
+            if self.images is not None and digest is None:
+                raise FileNotFoundError(f"{info['image']} is missing or unreadable")
+            if digest is not None:
+                # Decoded once by the store; popups for the same art share the budget entry
+                key = ('popup', digest)
+                loader = lambda: self.images.store.decode(digest).resize(POPUP_IMAGE_SIZE, Image.LANCZOS)
+                if self.image_budget is not None:
+                    photo = self.image_budget.acquire(key, loader)
+                    popup.bind("<Destroy>", lambda event, k=key: self._on_popup_destroy(event, popup, k))
+                else:
+                    photo = ImageTk.PhotoImage(loader())
+                    popup.bind("<Destroy>", lambda event: self._on_popup_destroy(event, popup, None))
+            elif self.image_budget is not None:
+                # Reuse the cached image; it stays pinned while this popup is open
+                key = ('popup', image_path)
+                photo = self.image_budget.acquire(key, lambda: self._read_popup_image(image_path))
+                popup.bind("<Destroy>", lambda event, k=key: self._on_popup_destroy(event, popup, k))
+            else:
+                image = Image.open(image_path)
+                
+                # Resize the image to fit in the popup window
+                image = image.resize(POPUP_IMAGE_SIZE, Image.LANCZOS)
+                photo = ImageTk.PhotoImage(image)
+                popup.bind("<Destroy>", lambda event: self._on_popup_destroy(event, popup, None))
             
             # Store reference to prevent garbage collection
             popup.photo = photo
+            self.open_popups[popup] = photo
             
             # Create image display
             image_label = ttk.Label(popup, image=photo, background="#000000")
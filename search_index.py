@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Search Index
+Tokenized inverted index over character names, roles and recruitment text with
+ranked results, prefix matching and highlighted snippets.
+"""
+
+import re
+import html
+import math
+import bisect
+import threading
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Matches in a name count for more than matches in the recruitment text
+FIELD_WEIGHTS = {'name': 5.0, 'roles': 3.0, 'recruitment_info': 1.0}
+PREFIX_MATCH_FACTOR = 0.6
+SNIPPET_RADIUS = 40
+
+STOPWORDS = frozenset({'a', 'an', 'and', 'the', 'to', 'of', 'in', 'at', 'on', 'is', 'with', 'after', 'for'})
+
+def tokenize(text):
+    """Lower-case alphanumeric tokens"""
+    return TOKEN_RE.findall(str(text or '').lower())
+
+def split_name_role(name):
+    """Split 'Name (Role)' into ('Name', 'Role'); role is None when absent"""
+    if "(" in name and ")" in name:
+        return name.split("(")[0].strip(), name.split("(")[1].replace(")", "").strip()
+    return name, None
+
+class SearchIndex:
+    """Inverted index: token -> {doc_id: weighted term frequency}."""
+    def __init__(self):
+        self.documents = {}
+        self.postings = {}
+        self._doc_tokens = {}
+        self._sorted_tokens = None
+        self._lock = threading.Lock()
+
+    def add(self, doc_id, name, roles=None, recruitment_info='', **extra):
+        """Index (or re-index) one document"""
+        with self._lock:
+            self._remove_locked(doc_id)
+            roles = [r for r in (roles or []) if r]
+            document = dict(extra, id=doc_id, name=name, roles=roles, recruitment_info=recruitment_info or '')
+            self.documents[doc_id] = document
+
+            weights = {}
+            fields = {'name': name, 'roles': ' '.join(roles), 'recruitment_info': recruitment_info}
+            for field, text in fields.items():
+                for token in tokenize(text):
+                    weights[token] = weights.get(token, 0.0) + FIELD_WEIGHTS[field]
+            for token, weight in weights.items():
+                self.postings.setdefault(token, {})[doc_id] = weight
+            self._doc_tokens[doc_id] = list(weights)
+            self._sorted_tokens = None
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id):
+        for token in self._doc_tokens.pop(doc_id, []):
+            docs = self.postings.get(token)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self.postings[token]
+                    self._sorted_tokens = None
+        self.documents.pop(doc_id, None)
+
+    def _expand(self, token, prefix):
+        """Exact token plus (optionally) every indexed token it prefixes"""
+        matches = []
+        if token in self.postings:
+            matches.append((token, 1.0))
+        if prefix:
+            if self._sorted_tokens is None:
+                self._sorted_tokens = sorted(self.postings)
+            start = bisect.bisect_left(self._sorted_tokens, token)
+            for candidate in self._sorted_tokens[start:]:
+                if not candidate.startswith(token):
+                    break
+                if candidate != token:
+                    matches.append((candidate, PREFIX_MATCH_FACTOR))
+        return matches
+
+    def search(self, query, limit=10, prefix=True, marks=('<mark>', '</mark>'), escape=True):
+        """Ranked search. Documents matching more query terms rank first."""
+        terms = [t for t in tokenize(query) if t not in STOPWORDS] or tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            total_docs = max(len(self.documents), 1)
+            scores = {}
+            matched_terms = {}
+            matched_tokens = {}
+            for term in terms:
+                for token, factor in self._expand(term, prefix):
+                    docs = self.postings[token]
+                    idf = math.log(1.0 + total_docs / len(docs))
+                    for doc_id, weight in docs.items():
+                        scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf * factor
+                        matched_terms.setdefault(doc_id, set()).add(term)
+                        matched_tokens.setdefault(doc_id, set()).add(token)
+
+            # Coverage boost: all query terms matched beats a strong single-term match
+            ranked = sorted(
+                scores,
+                key=lambda d: (-(len(matched_terms[d]) / len(terms)) ** 2 * scores[d], self.documents[d]['name'])
+            )[:limit]
+            results = []
+            for doc_id in ranked:
+                document = self.documents[doc_id]
+                field, snippet = self._snippet(document, matched_tokens[doc_id], marks, escape)
+                results.append({
+                    'id': doc_id,
+                    'name': document['name'],
+                    'roles': document['roles'],
+                    'score': round(scores[doc_id], 4),
+                    'matched_terms': sorted(matched_terms[doc_id]),
+                    'field': field,
+                    'snippet': snippet
+                })
+            return results
+
+    def _snippet(self, document, tokens, marks, escape):
+        """Window of text around the first match, with every matched token highlighted"""
+        pattern = re.compile(r"\b(" + "|".join(re.escape(t) for t in sorted(tokens, key=len, reverse=True)) + r")[a-z0-9]*",
+                             re.IGNORECASE)
+        for field in ('recruitment_info', 'name'):
+            text = document[field]
+            first = pattern.search(text)
+            if not first:
+                continue
+            start = max(0, first.start() - SNIPPET_RADIUS)
+            end = min(len(text), first.end() + SNIPPET_RADIUS)
+            window = text[start:end]
+            pieces = []
+            position = 0
+            for match in pattern.finditer(window):
+                pieces.append(self._escape(window[position:match.start()], escape))
+                pieces.append(marks[0] + self._escape(match.group(0), escape) + marks[1])
+                position = match.end()
+            pieces.append(self._escape(window[position:], escape))
+            snippet = ''.join(pieces)
+            if start > 0:
+                snippet = '…' + snippet
+            if end < len(text):
+                snippet += '…'
+            return field, snippet
+        text = document['recruitment_info'][:2 * SNIPPET_RADIUS]
+        return 'recruitment_info', self._escape(text, escape)
+
+    @staticmethod
+    def _escape(text, escape):
+        return html.escape(text) if escape else text
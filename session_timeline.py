@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Session Timeline
+Event log of every party and recruitment mutation with monotonic timestamps.
+Periodic snapshots let the state at any time be rebuilt by replaying only the
+events since the nearest earlier snapshot.
+
+Party slots hold character names, not character records, and only the last
+max_snapshots snapshots (and the events after the oldest of them) are kept,
+so a session running for hours stays small. serialize_state() turns names
+back into records for clients.
+"""
+
+import os
+import time
+import bisect
+import threading
+
+# Take a state snapshot after this many events
+DEFAULT_SNAPSHOT_EVERY = 50
+# Snapshots kept in memory; older snapshots and the events before them are dropped
+DEFAULT_MAX_SNAPSHOTS = int(os.environ.get('SUIKODEN_TIMELINE_SNAPSHOTS', '100'))
+
+def empty_state(party_size=6):
+    return {'party': [None] * party_size, 'stars': set()}
+
+def copy_state(state):
+    return {'party': list(state['party']), 'stars': set(state['stars'])}
+
+def apply_event(state, event):
+    """Apply one event to a state in place.
+
+    Party events carry the resulting contents of every slot they changed
+    ('slots': {slot: character name or None}), so replay never re-validates.
+    """
+    data = event['data']
+    for slot, character in data.get('slots', {}).items():
+        state['party'][int(slot)] = character
+    if event['type'] == 'recruit':
+        if data['recruited']:
+            state['stars'].add(data['id'])
+        else:
+            state['stars'].discard(data['id'])
+    return state
+
+def serialize_state(state, resolve=None):
+    """JSON-friendly copy of a state; resolve(name), if given, turns party names into records"""
+    return {
+        'party': [resolve(name) if resolve and name is not None else name for name in state['party']],
+        'stars': sorted(state['stars']),
+        'recruited_count': len(state['stars'])
+    }
+
+class SessionTimeline:
+    """In-memory event log with periodic snapshots, bounded to the last max_snapshots of them."""
+    def __init__(self, initial_state=None, snapshot_every=DEFAULT_SNAPSHOT_EVERY, max_snapshots=DEFAULT_MAX_SNAPSHOTS):
+        self.snapshot_every = snapshot_every
+        self.max_snapshots = max(1, max_snapshots)
+        self.started_at = time.time()
+        self._clock_start = time.monotonic()
+        self._lock = threading.Lock()
+        self.reset(initial_state)
+
+    def reset(self, initial_state=None):
+        """Start a new session from the given state"""
+        with self._lock:
+            self.state = copy_state(initial_state) if initial_state else empty_state()
+            self.events = []
+            self._event_times = []
+            self._seq = 0  # Sequence number of the last event recorded
+            self._first_seq = 1  # Sequence number of self.events[0]
+            self.started_at = time.time()
+            self._clock_start = time.monotonic()
+            # Parallel lists so snapshots can be found with bisect on time
+            self._snapshot_times = [0.0]
+            self._snapshots = [(0, copy_state(self.state))]
+
+    def now(self):
+        """Seconds since the session started (monotonic)"""
+        return time.monotonic() - self._clock_start
+
+    def record(self, event_type, data):
+        """Append an event, fold it into the live state and snapshot if due"""
+        with self._lock:
+            self._seq += 1
+            event = {
+                'seq': self._seq,
+                't': round(self.now(), 6),
+                'wall': time.time(),
+                'type': event_type,
+                'data': data
+            }
+            self.events.append(event)
+            self._event_times.append(event['t'])
+            apply_event(self.state, event)
+            if event['seq'] % self.snapshot_every == 0:
+                self._snapshot_times.append(event['t'])
+                self._snapshots.append((event['seq'], copy_state(self.state)))
+                if len(self._snapshots) > self.max_snapshots:
+                    self._drop_oldest_snapshot()
+            return event
+
+    def _drop_oldest_snapshot(self):
+        """Forget the oldest snapshot and the events the next one already covers"""
+        del self._snapshots[0]
+        del self._snapshot_times[0]
+        drop = self._snapshots[0][0] + 1 - self._first_seq
+        if drop > 0:
+            del self.events[:drop]
+            del self._event_times[:drop]
+            self._first_seq += drop
+
+    def state_at(self, t):
+        """Rebuild the state at session time t from the nearest snapshot.
+
+        Times before the oldest kept snapshot get that snapshot's state.
+        """
+        with self._lock:
+            index = bisect.bisect_right(self._snapshot_times, t) - 1
+            seq, snapshot = self._snapshots[max(index, 0)]
+            state = copy_state(snapshot)
+            # The first event after the snapshot has sequence number seq + 1
+            for index in range(seq + 1 - self._first_seq, len(self.events)):
+                event = self.events[index]
+                if event['t'] > t:
+                    break
+                apply_event(state, event)
+            return state
+
+    def events_between(self, start=0.0, end=None, since_seq=0, limit=None):
+        """Kept events with start <= t <= end and seq > since_seq"""
+        with self._lock:
+            first = max(bisect.bisect_left(self._event_times, start), since_seq + 1 - self._first_seq)
+            selected = []
+            for index in range(first, len(self.events)):
+                event = self.events[index]
+                if end is not None and event['t'] > end:
+                    break
+                selected.append(event)
+                if limit and len(selected) >= limit:
+                    break
+            return selected
+
+    def info(self):
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'duration': round(self.now(), 6),
+                'event_count': self._seq,
+                'first_seq': self._first_seq,
+                'kept_events': len(self.events),
+                'snapshot_count': len(self._snapshots),
+                'snapshot_every': self.snapshot_every,
+                'max_snapshots': self.max_snapshots
+            }
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Star Bitset
+Fixed-width bitset of recruited stars indexed by character id, with an O(1)
+recruited counter.
+"""
+
+import base64
+
+class StarBitset:
+    """One bit per character id (ids start at 1, bit index = id - 1)."""
+    def __init__(self, size):
+        self.size = size
+        self.bits = bytearray((size + 7) // 8)
+        self.count = 0
+
+    def _locate(self, character_id):
+        index = character_id - 1
+        if not 0 <= index < self.size:
+            raise IndexError(f"Character id {character_id} out of range 1..{self.size}")
+        return index >> 3, 1 << (index & 7)
+
+    def get(self, character_id):
+        byte, mask = self._locate(character_id)
+        return bool(self.bits[byte] & mask)
+
+    def set(self, character_id, recruited):
+        """Set a bit. Returns True if the value changed."""
+        byte, mask = self._locate(character_id)
+        current = bool(self.bits[byte] & mask)
+        if current == bool(recruited):
+            return False
+        if recruited:
+            self.bits[byte] |= mask
+            self.count += 1
+        else:
+            self.bits[byte] &= ~mask & 0xff
+            self.count -= 1
+        return True
+
+    def flip(self, character_id):
+        """Toggle a bit. Returns the new value."""
+        value = not self.get(character_id)
+        self.set(character_id, value)
+        return value
+
+    def resize(self, size):
+        """Grow or shrink to size bits, keeping the bits that still fit."""
+        if size < self.size:
+            for character_id in range(size + 1, self.size + 1):
+                self.set(character_id, False)
+        self.bits = self.bits[:(size + 7) // 8] + bytearray(max(0, (size + 7) // 8 - len(self.bits)))
+        self.size = size
+
+    def clear(self):
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
+
+    def to_bytes(self):
+        return bytes(self.bits)
+
+    def to_base64(self):
+        return base64.b64encode(self.bits).decode('ascii')
+
+    def recruited_ids(self):
+        """Ids of every recruited character, in ascending order."""
+        return [index + 1 for index in range(self.size) if self.bits[index >> 3] & (1 << (index & 7))]
@@ -1,8 +1,13 @@
 import tkinter as tk
 from tkinter import ttk
 from PIL import Image, ImageTk
+from image_budget import open_scaled, photo_bytes
 import os
 
+STAR_IMAGE_SIZE = (80, 80)
+# In low-memory mode portraits within this many pixels of the viewport are kept loaded
+VISIBLE_MARGIN = 200
+
 class ScrollableFrame(ttk.Frame):
     """A scrollable frame using canvas and scrollbar"""
     def __init__(self, parent, *args, **kwargs):
@@ -13,7 +18,8 @@ class ScrollableFrame(ttk.Frame):
         self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
         
         # Configure the canvas
-        self.canvas.configure(yscrollcommand=self.scrollbar.set, bg="#121b2f")
+        self.canvas.configure(yscrollcommand=self._on_yscroll, bg="#121b2f")
+        self.on_view_change = None  # Called whenever the visible region changes
         
         # Create a frame inside the canvas for content
         self.content_frame = ttk.Frame(self.canvas, style="Suikoden.TFrame")
@@ -30,6 +36,11 @@ class ScrollableFrame(ttk.Frame):
         # Bind mousewheel scrolling
         self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
         
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self.on_view_change is not None:
+            self.on_view_change()
+        
     def _configure_content_frame(self, event):
         # Update the canvas's scroll region to encompass the inner frame
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
@@ -43,14 +54,33 @@ class ScrollableFrame(ttk.Frame):
         self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
         
 class StarsTab(ttk.Frame):
-    def __init__(self, parent, image_folder, all_characters):
+    def __init__(self, parent, image_folder, all_characters, progress_store=None, image_budget=None, on_toggle=None,
+                 images=None):
         super().__init__(parent, style="Suikoden.TFrame")
         self.image_folder = image_folder
         self.all_characters = all_characters
+        # Content-addressed image index (image_store.ProfileImages); without it files are opened directly
+        self.images = images
+        self._photos = {}  # Content hash -> Tk portrait, shared by names with the same art
+        self.on_toggle = on_toggle  # Called with (name, recruited) after a click, e.g. to tell the server
         self.all_star_names = sorted(self.all_characters.keys())
         self.recruited_stars = {name: False for name in self.all_star_names}
         self.star_widgets = {}
         
+        # Low-memory mode: portraits come from the shared budget and are only
+        # loaded while their cell is near the visible part of the list
+        self.image_budget = image_budget
+        self._loaded_images = {}  # name -> budget key of the portrait it is showing
+        self._visibility_pending = False
+        self._placeholder = tk.PhotoImage(width=STAR_IMAGE_SIZE[0], height=STAR_IMAGE_SIZE[1]) if image_budget else None
+        
+        # Restore saved progress (snapshot + journal replay) if a store is provided
+        self.progress_store = progress_store
+        if self.progress_store is not None:
+            for name, recruited in self.progress_store.load().items():
+                if name in self.recruited_stars:
+                    self.recruited_stars[name] = recruited
+        
         # Create styles for better visibility
         self.style = ttk.Style()
         # Style for star frames with semi-transparent background
@@ -91,55 +121,209 @@ class StarsTab(ttk.Frame):
                                 background="#16213e")
         counter_label.pack(pady=5)
         
-        # Create a content frame with grid layout
-        columns = 10  # Number of columns in the grid
-        row_num = 1  # Start at row 1 (row 0 is for the title)
-        col_num = 0
-        
+        # One cell per star, laid out in a grid below the title
+        self.star_frames = {}
+        self.star_image_labels = {}
         for name in self.all_star_names:
-            # Create a frame with semi-transparent background for each star
-            frame = ttk.Frame(self.scrollable.content_frame, style="StarFrame.Suikoden.TFrame")
-            frame.grid(row=row_num, column=col_num, padx=8, pady=8, sticky="nsew")
-            
-            # Add internal frame padding
-            inner_frame = ttk.Frame(frame, style="StarFrame.Suikoden.TFrame")
-            inner_frame.pack(padx=5, pady=5, fill="both", expand=True)
-            
-            # Load and display character image
-            image_path = os.path.join(self.image_folder, self.all_characters[name])
-            try:
-                img = Image.open(image_path)
-                img = img.resize((80, 80))
-                img_tk = ImageTk.PhotoImage(img)
-                label = ttk.Label(inner_frame, image=img_tk, style="Suikoden.TLabel", background="#16213e")
-                label.image = img_tk
-                label.pack(pady=(0, 5))
-            except FileNotFoundError:
-                error_label = ttk.Label(inner_frame, text="?", style="Suikoden.TLabel", background="#16213e")
-                error_label.pack(pady=(0, 5))
-
-            # Create a name label with better visibility
-            name_label = ttk.Label(inner_frame, text=name, 
-                                  style="StarName.Suikoden.TLabel", 
-                                  cursor="hand2",
-                                  wraplength=120)  # Wrap long names
-            name_label.pack(fill="x", pady=2)
-            name_label.bind("<Button-1>", lambda event, n=name, l=name_label: self._toggle_star_recruited(n, l))
-            self.star_widgets[name] = name_label
-
-            # Configure the column/row layout
-            col_num += 1
-            if col_num >= columns:
-                col_num = 0
-                row_num += 1
+            self._create_star_cell(name)
+        self._grid_star_cells()
+        
+        if self.image_budget is not None:
+            self.scrollable.on_view_change = self._schedule_visibility_update
+            self.bind("<Map>", lambda event: self._schedule_visibility_update())
+
+    def _create_star_cell(self, name):
+        """Create the frame, portrait and name label for one star"""
+        # Create a frame with semi-transparent background for each star
+        frame = ttk.Frame(self.scrollable.content_frame, style="StarFrame.Suikoden.TFrame")
+        
+        # Add internal frame padding
+        inner_frame = ttk.Frame(frame, style="StarFrame.Suikoden.TFrame")
+        inner_frame.pack(padx=5, pady=5, fill="both", expand=True)
+        
+        # Character image (or "?" when the file is missing)
+        image_label = ttk.Label(inner_frame, style="Suikoden.TLabel", background="#16213e")
+        image_label.pack(pady=(0, 5))
+        self.star_image_labels[name] = image_label
+        self._load_star_image(name)
+
+        # Create a name label with better visibility
+        label_style = "Recruited.Suikoden.TLabel" if self.recruited_stars[name] else "StarName.Suikoden.TLabel"
+        name_label = ttk.Label(inner_frame, text=name, 
+                              style=label_style, 
+                              cursor="hand2",
+                              wraplength=120)  # Wrap long names
+        name_label.pack(fill="x", pady=2)
+        name_label.bind("<Button-1>", lambda event, n=name, l=name_label: self._toggle_star_recruited(n, l))
+        self.star_widgets[name] = name_label
+        self.star_frames[name] = frame
+
+    def _load_star_image(self, name):
+        """Load (or reload) a star's portrait into its existing label"""
+        image_label = self.star_image_labels[name]
+        if self.image_budget is not None:
+            # Same-sized blank until the cell scrolls into view
+            self._release_star_image(name)
+            image_label.config(image=self._placeholder, text="")
+            self._schedule_visibility_update()
+            return
+        if self.images is not None:
+            digest = self.images.digest(self.all_characters[name])
+            if digest is None:
+                image_label.config(image="", text="?")
+                image_label.image = None
+                return
+            if digest not in self._photos:
+                self._photos[digest] = ImageTk.PhotoImage(self.images.store.decode(digest).resize(STAR_IMAGE_SIZE))
+            image_label.config(image=self._photos[digest], text="")
+            image_label.image = self._photos[digest]
+            return
+        image_path = os.path.join(self.image_folder, self.all_characters[name])
+        try:
+            img = Image.open(image_path)
+            img = img.resize(STAR_IMAGE_SIZE)
+            img_tk = ImageTk.PhotoImage(img)
+            image_label.config(image=img_tk, text="")
+            image_label.image = img_tk
+        except FileNotFoundError:
+            image_label.config(image="", text="?")
+            image_label.image = None
+
+    def _read_portrait(self, image_path):
+        with open_scaled(image_path, STAR_IMAGE_SIZE) as img:
+            return img.resize(STAR_IMAGE_SIZE)
+
+    def _schedule_visibility_update(self):
+        if not self._visibility_pending:
+            self._visibility_pending = True
+            self.after_idle(self._update_visible_images)
+
+    def _update_visible_images(self):
+        """Pin portraits for cells near the viewport and release the rest back to the budget"""
+        self._visibility_pending = False
+        content_height = self.scrollable.content_frame.winfo_height()
+        if content_height <= 1 or not self.winfo_ismapped():
+            return
+        top, bottom = self.scrollable.canvas.yview()
+        view_top = top * content_height - VISIBLE_MARGIN
+        view_bottom = bottom * content_height + VISIBLE_MARGIN
+        for name, frame in self.star_frames.items():
+            y = frame.winfo_y()
+            visible = y + frame.winfo_height() >= view_top and y <= view_bottom
+            if visible and name not in self._loaded_images:
+                if self.images is not None:
+                    # Keyed by content: names and profiles with the same art share one image
+                    digest = self.images.digest(self.all_characters[name])
+                    if digest is None:
+                        self.star_image_labels[name].config(image="", text="?")
+                        self._loaded_images[name] = None
+                        continue
+                    key = ('star', digest)
+                    photo = self.image_budget.acquire(
+                        key, lambda: self.images.store.decode(digest).resize(STAR_IMAGE_SIZE))
+                else:
+                    image_path = os.path.join(self.image_folder, self.all_characters[name])
+                    # Keyed by path: the budget is shared by every profile's tabs
+                    key = ('star', image_path)
+                    try:
+                        photo = self.image_budget.acquire(key, lambda: self._read_portrait(image_path))
+                    except FileNotFoundError:
+                        self.star_image_labels[name].config(image="", text="?")
+                        self._loaded_images[name] = None
+                        continue
+                self.star_image_labels[name].config(image=photo, text="")
+                self._loaded_images[name] = key
+            elif not visible and name in self._loaded_images:
+                self._release_star_image(name)
+                self.star_image_labels[name].config(image=self._placeholder, text="")
+
+    def _release_star_image(self, name):
+        key = self._loaded_images.pop(name, None)
+        if key is not None:
+            self.image_budget.release(key)
+
+    def release_images(self):
+        """Unpin every portrait this tab holds (before the tab is destroyed)"""
+        if self.image_budget is not None:
+            for name in list(self._loaded_images):
+                self._release_star_image(name)
+
+    def image_bytes(self):
+        """Bytes of the Tk images this tab is currently holding on to"""
+        if self.image_budget is None:
+            # Names with the same art share one image; count it once
+            photos = {id(label.image): label.image for label in self.star_image_labels.values()
+                      if getattr(label, 'image', None)}
+            return sum(photo_bytes(photo) for photo in photos.values())
+        loaded = sum(1 for key in self._loaded_images.values() if key is not None)
+        return loaded * STAR_IMAGE_SIZE[0] * STAR_IMAGE_SIZE[1] * 4 + photo_bytes(self._placeholder)
+
+    def _grid_star_cells(self):
+        """Place every star cell in alphabetical order"""
+        columns = 10  # Number of columns in the grid
+        for index, name in enumerate(self.all_star_names):
+            # Start at row 1 (row 0 is for the title)
+            self.star_frames[name].grid(row=1 + index // columns, column=index % columns,
+                                        padx=8, pady=8, sticky="nsew")
+
+    def apply_character_changes(self, added, removed, changed):
+        """Update the grid in place after all_characters changed on disk"""
+        for name in removed:
+            if self.image_budget is not None:
+                self._release_star_image(name)
+            frame = self.star_frames.pop(name, None)
+            if frame is not None:
+                frame.destroy()
+            self.star_widgets.pop(name, None)
+            self.star_image_labels.pop(name, None)
+            self.recruited_stars.pop(name, None)
+        for name in changed:
+            if name in self.star_image_labels:
+                if self.image_budget is not None:
+                    # The file may have been replaced under the same name: drop the cached copy
+                    # (content-keyed images need no discard; new art has a new hash)
+                    self._release_star_image(name)
+                    if self.images is None:
+                        self.image_budget.discard(('star', os.path.join(self.image_folder, self.all_characters[name])))
+                self._load_star_image(name)
+        saved = self.progress_store.get_state() if self.progress_store is not None and added else {}
+        for name in added:
+            self.recruited_stars[name] = saved.get(name, False)
+            self._create_star_cell(name)
+        if added or removed:
+            self.all_star_names = sorted(self.all_characters.keys())
+            self._grid_star_cells()
 
     def _toggle_star_recruited(self, star_name, name_label):
         """Toggles the recruited status of a star and updates its appearance."""
         self.recruited_stars[star_name] = not self.recruited_stars[star_name]
+        if self.progress_store is not None:
+            self.progress_store.record(star_name, self.recruited_stars[star_name])
         if self.recruited_stars[star_name]:
             name_label.config(style="Recruited.Suikoden.TLabel")
         else:
             name_label.config(style="StarName.Suikoden.TLabel")
+        if self.on_toggle is not None:
+            self.on_toggle(star_name, self.recruited_stars[star_name])
+
+    def apply_remote_progress(self, states):
+        """Show recruited flags changed elsewhere ({name: recruited}); unknown names are ignored"""
+        for name, recruited in states.items():
+            if self.recruited_stars.get(name, recruited) == recruited:
+                continue
+            self.recruited_stars[name] = recruited
+            if self.progress_store is not None:
+                self.progress_store.record(name, recruited)
+            self.star_widgets[name].config(style="Recruited.Suikoden.TLabel" if recruited else "StarName.Suikoden.TLabel")
+
+    def merge_remote_progress(self, states):
+        """Merge the server's full progress into the saved one: a star recruited on either side stays recruited.
+
+        Returns the names recruited here but not on the server, to be sent up.
+        """
+        self.apply_remote_progress({name: True for name, recruited in states.items() if recruited})
+        return [name for name, recruited in self.recruited_stars.items() if recruited and not states.get(name)]
+
     def get_recruited_stars(self):
         """Returns the dictionary of recruited stars."""
         return self.recruited_stars
\ No newline at end of file
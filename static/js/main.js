@@ -7,12 +7,21 @@
 let socket;
 let allCharacters = [];
 let currentParty = Array(6).fill(null);
+let partyVersion = 0; // Server party version our edits are based on
+let recruitedBits = new Uint8Array(0); // Recruited stars, one bit per character id
+let recruitedCount = 0;
+let totalStars = 0;
 let selectedCharacter = null;
 let imageCache = {};
 let reconnectAttempts = 0;
+let textSearchTimer = null;
+const TEXT_SEARCH_DELAY = 150; // ms to wait after the last keystroke
 const MAX_RECONNECT_ATTEMPTS = 5;
 const RECONNECT_DELAY = 3000; // 3 seconds
 
+// Channel (co-streamer) this page controls, from ?channel= in the page URL; the server's default when absent
+const CHANNEL = new URLSearchParams(window.location.search).get('channel');
+
 // Cache DOM elements
 const partyGrid = document.querySelector('.party-grid');
 const starsContainer = document.getElementById('stars-container');
@@ -55,7 +64,9 @@ function initializeSocketConnection() {
         reconnectionAttempts: MAX_RECONNECT_ATTEMPTS,
         reconnectionDelay: RECONNECT_DELAY,
         timeout: 10000, // 10 seconds timeout
-        autoConnect: true
+        autoConnect: true,
+        // Joins the channel's room: party and progress updates are scoped to it
+        query: CHANNEL ? { channel: CHANNEL } : {}
     });
     
     // Socket connection established
@@ -99,6 +110,9 @@ function initializeSocketConnection() {
     // Initial data received
     socket.on('initial_data', (data) => {
         console.log('Received initial data:', data);
+        if (typeof data.version === 'number') {
+            partyVersion = data.version;
+        }
         handleInitialData(data);
         showLoadingState(false);
     });
@@ -113,6 +127,10 @@ function initializeSocketConnection() {
     socket.on('party_updated', (data) => {
         // Check if we have complete party data
         if (data.party) {
+            if (typeof data.version === 'number') {
+                partyVersion = Math.max(partyVersion, data.version);
+            }
+
             updatePartyDisplay(data.party);
             
             // Show appropriate notification based on the action
@@ -122,8 +140,14 @@ function initializeSocketConnection() {
                 showToast(`${data.character_name} removed from party`, 'info');
             } else if (data.action === 'move') {
                 showToast(`${data.character_name} moved in party`, 'info');
+            } else if (data.action === 'batch') {
+                showToast(`Party updated (${data.operation_count} changes)`, 'info');
             } else if (data.action === 'full_update') {
                 showToast('Party synchronized from external update', 'info');
+            } else if (data.action === 'random') {
+                showToast(`Random party (seed ${data.seed})`, 'info');
+            } else if (data.action === 'preset') {
+                showToast(`Preset ${data.preset} loaded`, 'info');
             }
             
             // Store the updated party data
@@ -155,9 +179,67 @@ function initializeSocketConnection() {
     
     // Success message for updates
     socket.on('update_success', (data) => {
+        if (typeof data.version === 'number') {
+            partyVersion = Math.max(partyVersion, data.version);
+        }
         showToast(data.message, 'success');
     });
     
+    // Our edit was based on a stale party; adopt the server state it sent back
+    socket.on('party_conflict', (data) => {
+        console.warn('Party edit rejected as stale:', data);
+        if (typeof data.version === 'number') {
+            partyVersion = data.version;
+        }
+        if (data.party) {
+            updatePartyDisplay(data.party);
+        }
+        showToast('Party was changed by another controller, please try again', 'warning');
+    });
+    
+    // The server dropped one of our updates because we sent too many too quickly
+    socket.on('rate_limited', (data) => {
+        console.warn(`Rate limited on ${data.event}, retry in ${data.retry_after}s`);
+        showToast(data.message, 'warning');
+    });
+    
+    // Character/recruitment data was edited on disk; only the changed entries are sent
+    // Another roster profile became active: replace characters, party and progress
+    socket.on('profile_changed', (data) => {
+        if (typeof data.version === 'number') {
+            partyVersion = data.version;
+        }
+        handleInitialData(data);
+        const profileSelect = document.getElementById('profile-select');
+        if (profileSelect) {
+            profileSelect.value = data.profile.id;
+        }
+        showToast(`Switched to ${data.profile.name}`, 'info');
+    });
+    
+    socket.on('characters_patch', (data) => {
+        applyCharactersPatch(data);
+    });
+    
+    // Recruitment progress: a single-bit flip or the whole bitmap on resync
+    socket.on('stars_updated', (data) => {
+        handleStarsUpdate(data);
+    });
+    
+    // Session replay: render the replayed party without touching our edit version
+    socket.on('replay_state', (data) => {
+        updatePartyDisplay(data.party);
+        showToast(`Replaying session at ${data.speed}x`, 'info');
+    });
+    
+    socket.on('replay_event', (data) => {
+        updatePartyDisplay(data.party);
+    });
+    
+    socket.on('replay_finished', () => {
+        showToast('Replay finished', 'info');
+    });
+    
     // All characters list updated
     socket.on('all_characters_updated', (data) => {
         allCharacters = data.characters;
@@ -173,8 +255,31 @@ function setupEventListeners() {
     searchInput.addEventListener('input', (e) => {
         const searchTerm = e.target.value.toLowerCase();
         filterCharacters(searchTerm);
+        scheduleTextSearch(searchTerm);
     });
     
+    // Undo / redo the last party edit (Ctrl+Z, Ctrl+Y or Ctrl+Shift+Z), except while typing
+    document.addEventListener('keydown', (e) => {
+        if (!(e.ctrlKey || e.metaKey) || e.target.tagName === 'INPUT' || e.target.tagName === 'TEXTAREA') return;
+        const key = e.key.toLowerCase();
+        if (key === 'z' && !e.shiftKey) {
+            e.preventDefault();
+            socket.emit('undo');
+        } else if (key === 'y' || (key === 'z' && e.shiftKey)) {
+            e.preventDefault();
+            socket.emit('redo');
+        }
+    });
+    
+    // Roster profile selector (only shown when there is more than one profile)
+    const profileSelect = document.getElementById('profile-select');
+    if (profileSelect) {
+        profileSelect.addEventListener('change', () => {
+            socket.emit('switch_profile', { profile: profileSelect.value });
+        });
+        loadProfiles(profileSelect);
+    }
+    
     // Clear search button if implemented
     const clearSearchBtn = document.querySelector('.clear-search');
     if (clearSearchBtn) {
@@ -191,6 +296,14 @@ function setupEventListeners() {
             syncPartyToServer();
         });
     }
+    
+    // Reroll the party on the server (seeded, so the toast's seed reproduces it)
+    const randomButton = document.getElementById('random-party-button');
+    if (randomButton) {
+        randomButton.addEventListener('click', () => {
+            socket.emit('random_party', {});
+        });
+    }
 }
 
 /**
@@ -286,6 +399,11 @@ function handleInitialData(data) {
             allCharacters = [];
         }
         
+        // Recruitment progress bitmap
+        if (data.stars) {
+            handleStarsUpdate(data.stars);
+        }
+        
         // Update party if provided
         if (data.party && Array.isArray(data.party)) {
             updatePartyDisplay(data.party);
@@ -343,6 +461,12 @@ function updateStarsList() {
             const characterElement = document.createElement('div');
             characterElement.className = 'star-name';
             characterElement.textContent = character.name;
+            characterElement.dataset.id = character.id;
+            
+            // Mark stars that have been recruited
+            if (isStarRecruited(character.id)) {
+                characterElement.classList.add('star-recruited');
+            }
             
             // Add recruited class if character is in the party
             const isInParty = currentParty.some(member => member && member.name === character.name);
@@ -355,11 +479,112 @@ function updateStarsList() {
                 selectCharacter(character);
             });
             
+            // Double-click toggles recruited status
+            characterElement.addEventListener('dblclick', () => {
+                socket.emit('set_star_recruited', { character_id: character.id });
+            });
+            
             starsContainer.appendChild(characterElement);
         });
     });
 }
 
+/**
+ * Apply a characters_patch event. Changed entries are updated in place (the
+ * star list keeps its elements); additions and removals rebuild the list.
+ */
+function applyCharactersPatch(patch) {
+    const byId = new Map(allCharacters.map(character => [character.id, character]));
+    
+    patch.changed.forEach(changed => {
+        const existing = byId.get(changed.id);
+        if (existing) {
+            // Mutate the existing object so click handlers holding it see the new data
+            Object.assign(existing, changed);
+        }
+    });
+    
+    if (patch.added.length || patch.removed.length) {
+        const removed = new Set(patch.removed);
+        allCharacters = allCharacters.filter(character => !removed.has(character.name)).concat(patch.added);
+        updateStarsList();
+    }
+    
+    // Refresh the details panel if it shows a character that changed
+    if (selectedCharacter) {
+        const current = allCharacters.find(character => character.name === selectedCharacter.name);
+        if (current && patch.changed.some(changed => changed.id === current.id)) {
+            displayCharacterDetails(current, current.recruitment_info);
+        }
+    }
+    console.log(`Character data patched: ${patch.added.length} added, ${patch.changed.length} changed, ${patch.removed.length} removed`);
+}
+
+/**
+ * Decode a base64 bitmap into bytes
+ */
+function decodeBitmap(encoded) {
+    const raw = atob(encoded);
+    const bytes = new Uint8Array(raw.length);
+    for (let i = 0; i < raw.length; i++) {
+        bytes[i] = raw.charCodeAt(i);
+    }
+    return bytes;
+}
+
+/**
+ * Check a character's recruited bit (bit index = id - 1)
+ */
+function isStarRecruited(characterId) {
+    const index = characterId - 1;
+    if (index < 0 || (index >> 3) >= recruitedBits.length) return false;
+    return (recruitedBits[index >> 3] & (1 << (index & 7))) !== 0;
+}
+
+/**
+ * Apply a stars_updated event (full bitmap or single flip)
+ */
+function handleStarsUpdate(data) {
+    if (data.bitmap !== undefined) {
+        recruitedBits = decodeBitmap(data.bitmap);
+        document.querySelectorAll('.star-name').forEach(element => {
+            element.classList.toggle('star-recruited', isStarRecruited(Number(element.dataset.id)));
+        });
+    } else if (typeof data.id === 'number') {
+        const index = data.id - 1;
+        if ((index >> 3) >= recruitedBits.length) {
+            const grown = new Uint8Array((index >> 3) + 1);
+            grown.set(recruitedBits);
+            recruitedBits = grown;
+        }
+        if (data.recruited) {
+            recruitedBits[index >> 3] |= (1 << (index & 7));
+        } else {
+            recruitedBits[index >> 3] &= ~(1 << (index & 7));
+        }
+        const element = starsContainer.querySelector(`.star-name[data-id="${data.id}"]`);
+        if (element) {
+            element.classList.toggle('star-recruited', data.recruited);
+        }
+    }
+    
+    if (typeof data.recruited_count === 'number') {
+        recruitedCount = data.recruited_count;
+        totalStars = data.total;
+    }
+    updateStarsProgress();
+}
+
+/**
+ * Update the "N/108 recruited" counter
+ */
+function updateStarsProgress() {
+    const progress = document.getElementById('stars-progress');
+    if (progress) {
+        progress.textContent = `${recruitedCount}/${totalStars} recruited`;
+    }
+}
+
 /**
  * Group characters alphabetically
  */
@@ -432,6 +657,12 @@ function filterCharacters(searchTerm) {
             const characterElement = document.createElement('div');
             characterElement.className = 'star-name';
             characterElement.textContent = character.name;
+            characterElement.dataset.id = character.id;
+            
+            // Mark stars that have been recruited
+            if (isStarRecruited(character.id)) {
+                characterElement.classList.add('star-recruited');
+            }
             
             // Add recruited class if character is in the party
             const isInParty = currentParty.some(member => member && member.name === character.name);
@@ -444,11 +675,98 @@ function filterCharacters(searchTerm) {
                 selectCharacter(character);
             });
             
+            // Double-click toggles recruited status
+            characterElement.addEventListener('dblclick', () => {
+                socket.emit('set_star_recruited', { character_id: character.id });
+            });
+            
             starsContainer.appendChild(characterElement);
         });
     });
 }
 
+/**
+ * Fill the profile selector from /api/profiles
+ */
+function loadProfiles(profileSelect) {
+    fetch('/api/profiles')
+        .then(response => response.json())
+        .then(data => {
+            profileSelect.innerHTML = '';
+            data.profiles.forEach(profile => {
+                const option = document.createElement('option');
+                option.value = profile.id;
+                option.textContent = profile.name;
+                profileSelect.appendChild(option);
+            });
+            profileSelect.value = data.active;
+            profileSelect.hidden = data.profiles.length < 2;
+        })
+        .catch(error => console.error('Failed to load profiles:', error));
+}
+
+/**
+ * Query the server's full-text index (names, roles, recruitment info) after typing pauses
+ */
+function scheduleTextSearch(searchTerm) {
+    clearTimeout(textSearchTimer);
+    if (!searchTerm || searchTerm.length < 2) return;
+    
+    textSearchTimer = setTimeout(() => {
+        fetch(`/api/search?q=${encodeURIComponent(searchTerm)}&limit=20`)
+            .then(response => response.json())
+            .then(data => {
+                // Ignore results for a query the user has already changed
+                if (searchInput.value.toLowerCase() === searchTerm) {
+                    showTextSearchResults(data.results || []);
+                }
+            })
+            .catch(error => console.error('Search failed:', error));
+    }, TEXT_SEARCH_DELAY);
+}
+
+/**
+ * Show ranked full-text matches (with highlighted snippets) below the name matches
+ */
+function showTextSearchResults(results) {
+    if (results.length === 0) return;
+    
+    // The name filter may have shown a "no results" message; replace it
+    const noResults = starsContainer.querySelector('.no-results');
+    if (noResults) {
+        noResults.remove();
+    }
+    
+    const header = document.createElement('div');
+    header.className = 'stars-category';
+    header.textContent = 'Recruitment matches';
+    starsContainer.appendChild(header);
+    
+    results.forEach(result => {
+        const character = allCharacters.find(c => c.id === result.id);
+        if (!character) return;
+        
+        const resultElement = document.createElement('div');
+        resultElement.className = 'star-name search-result';
+        resultElement.dataset.id = character.id;
+        
+        const nameElement = document.createElement('div');
+        nameElement.textContent = character.name;
+        
+        // Snippets are HTML-escaped by the server, with matches wrapped in <mark>
+        const snippetElement = document.createElement('div');
+        snippetElement.className = 'search-snippet';
+        snippetElement.innerHTML = result.snippet;
+        
+        resultElement.appendChild(nameElement);
+        resultElement.appendChild(snippetElement);
+        resultElement.addEventListener('click', () => {
+            selectCharacter(character);
+        });
+        starsContainer.appendChild(resultElement);
+    });
+}
+
 /**
  * Handle character selection
  */
@@ -520,7 +838,8 @@ function selectPartySlot(slotIndex) {
                     socket.emit('move_character', {
                         character_name: selectedCharacter.name,
                         from_slot: existingSlot,
-                        to_slot: slotIndex
+                        to_slot: slotIndex,
+                        base_version: partyVersion
                     });
                     
                     // Provide immediate feedback
@@ -535,7 +854,8 @@ function selectPartySlot(slotIndex) {
             try {
                 socket.emit('add_to_party', {
                     character_name: selectedCharacter.name,
-                    slot: slotIndex
+                    slot: slotIndex,
+                    base_version: partyVersion
                 });
                 
                 // Provide immediate feedback
@@ -551,7 +871,7 @@ function selectPartySlot(slotIndex) {
             // Slot has character - ask if user wants to remove
             if (confirm(`Remove ${currentParty[slotIndex].name} from the party?`)) {
                 try {
-                    socket.emit('remove_from_party', { slot: slotIndex });
+                    socket.emit('remove_from_party', { slot: slotIndex, base_version: partyVersion });
                     
                     // Provide immediate feedback
                     showToast(`Removing ${currentParty[slotIndex].name}...`, 'info');
@@ -700,7 +1020,8 @@ function syncPartyToServer() {
     try {
         socket.emit('external_party_update', {
             party: currentParty,
-            source: 'ui'
+            source: 'ui',
+            base_version: partyVersion
         });
     } catch (error) {
         console.error('Error syncing party to server:', error);
@@ -0,0 +1,65 @@
+/**
+ * Suikoden Display Overlay - read-only party view
+ * Listens to /stream/party (Server-Sent Events). EventSource reconnects on its
+ * own and sends Last-Event-ID, so the server only replays what we missed.
+ */
+
+const PARTY_SIZE = 6;
+const partyContainer = document.getElementById('overlay-party');
+const progressElem = document.getElementById('overlay-progress');
+const slots = [];
+
+// Build the six slots once; updates only touch the ones that changed
+for (let i = 0; i < PARTY_SIZE; i++) {
+    const slot = document.createElement('div');
+    slot.className = 'overlay-slot';
+    const img = document.createElement('img');
+    img.src = '';
+    img.alt = '';
+    img.onerror = () => { img.src = '/static/img/placeholder.png'; };
+    const name = document.createElement('div');
+    name.className = 'overlay-name';
+    slot.appendChild(img);
+    slot.appendChild(name);
+    partyContainer.appendChild(slot);
+    slots.push({ img, name, key: null });
+}
+
+function renderParty(party) {
+    for (let i = 0; i < PARTY_SIZE; i++) {
+        const member = party[i] || null;
+        const key = member ? `${member.name}|${member.image_url}` : null;
+        if (slots[i].key === key) continue;
+        slots[i].key = key;
+        slots[i].img.src = member && member.image_url ? member.image_url : '';
+        slots[i].img.alt = member ? member.name : '';
+        slots[i].name.textContent = member ? member.name : '';
+    }
+}
+
+function renderProgress(count, total) {
+    progressElem.textContent = total ? `Stars: ${count}/${total}` : '';
+}
+
+// Same ?channel= as the overlay page URL (default channel when absent)
+const channel = new URLSearchParams(window.location.search).get('channel');
+const stream = new EventSource('/stream/party' + (channel ? `?channel=${encodeURIComponent(channel)}` : ''));
+
+function renderSnapshot(event) {
+    const data = JSON.parse(event.data);
+    renderParty(data.party);
+    renderProgress(data.recruited_count, data.total);
+}
+
+stream.addEventListener('snapshot', renderSnapshot);
+// A roster profile switch replaces the whole party and progress
+stream.addEventListener('profile', renderSnapshot);
+
+stream.addEventListener('party', (event) => {
+    renderParty(JSON.parse(event.data).party);
+});
+
+stream.addEventListener('star', (event) => {
+    const data = JSON.parse(event.data);
+    renderProgress(data.recruited_count, data.total);
+});
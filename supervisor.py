@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Supervisor
+Keeps the launcher's child processes up for long streams. A child that
+exits or stops answering its heartbeat is restarted with exponential
+backoff. Each child can be given a niceness and a set of CPUs, so the
+encoder's cores are left alone. CPU and memory use per child are logged
+periodically.
+
+psutil is used when installed (needed for priority and affinity on
+Windows and macOS); otherwise the os module and /proc are used where the
+platform has them.
+"""
+
+import os
+import time
+import logging
+import threading
+import multiprocessing
+import urllib.request
+from log_config import setup_logging, shutdown_logging
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger('suikoden_supervisor')
+
+POLL_SECONDS = 1.0
+HEARTBEAT_SECONDS = float(os.environ.get('SUIKODEN_HEARTBEAT_SECONDS', '5'))
+HEARTBEAT_TIMEOUT = 2.0
+HEARTBEAT_FAILURES = 3  # Missed heartbeats in a row before a child counts as hung
+STARTUP_GRACE_SECONDS = 30.0  # Time a child gets to answer its first heartbeat
+BACKOFF_INITIAL = 1.0
+BACKOFF_MAX = 60.0
+STABLE_SECONDS = 120.0  # Uptime after which a crash restarts with the initial backoff again
+RESOURCE_LOG_SECONDS = float(os.environ.get('SUIKODEN_RESOURCE_LOG_SECONDS', '300'))
+STOP_TIMEOUT = 5.0
+
+def parse_cpus(spec):
+    """'0-3,6' -> {0, 1, 2, 3, 6}; empty -> None (no affinity)"""
+    cpus = set()
+    for part in (spec or '').replace(' ', '').split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus or None
+
+def http_heartbeat(url, timeout=HEARTBEAT_TIMEOUT):
+    """A heartbeat that passes when url answers 200 within timeout"""
+    def check():
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                return response.status == 200
+        except (OSError, ValueError):
+            return False
+    return check
+
+def apply_priority(name, nice=None, cpus=None):
+    """Set the calling process's niceness and CPU affinity, logging what the platform refuses"""
+    if nice is not None:
+        try:
+            if hasattr(os, 'setpriority'):
+                os.setpriority(os.PRIO_PROCESS, 0, nice)
+            elif psutil is not None:
+                # Windows has priority classes rather than nice values
+                psutil.Process().nice(psutil.BELOW_NORMAL_PRIORITY_CLASS if nice > 0 else
+                                      psutil.ABOVE_NORMAL_PRIORITY_CLASS if nice < 0 else
+                                      psutil.NORMAL_PRIORITY_CLASS)
+            else:
+                logger.warning(f"{name}: cannot set priority on this platform without psutil")
+        except (OSError, getattr(psutil, 'Error', OSError)) as e:
+            logger.warning(f"{name}: could not set niceness {nice}: {e}")
+    if cpus:
+        try:
+            if hasattr(os, 'sched_setaffinity'):
+                os.sched_setaffinity(0, cpus)
+            elif psutil is not None and hasattr(psutil.Process, 'cpu_affinity'):
+                psutil.Process().cpu_affinity(sorted(cpus))
+            else:
+                logger.warning(f"{name}: cannot set CPU affinity on this platform")
+        except (OSError, ValueError, getattr(psutil, 'Error', OSError)) as e:
+            logger.warning(f"{name}: could not pin to CPUs {sorted(cpus)}: {e}")
+
+def _child_main(name, target, nice, cpus, log_file):
+    # A forked child inherits the parent's queue handler but not its writer
+    # thread: start this process's own pipeline, and flush it on the way out
+    # (multiprocessing children skip atexit)
+    setup_logging(log_file or f"{name}.log")
+    try:
+        apply_priority(name, nice, cpus)
+        target()
+    finally:
+        shutdown_logging()
+
+def process_usage(pid):
+    """(CPU seconds used, resident bytes) for a process, or None if unavailable"""
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            times = process.cpu_times()
+            return times.user + times.system, process.memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            # Fields after the parenthesised command name; utime and stime are the 12th and 13th
+            fields = f.read().rsplit(b')', 1)[1].split()
+        with open(f'/proc/{pid}/statm', 'rb') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    ticks = os.sysconf('SC_CLK_TCK')
+    return (int(fields[11]) + int(fields[12])) / ticks, resident_pages * os.sysconf('SC_PAGE_SIZE')
+
+def _format_uptime(seconds):
+    minutes, _ = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m"
+
+class Child:
+    """A supervised process: how to start it and its restart state.
+
+    heartbeat, if given, is a callable returning True while the child is
+    healthy. A child with ends_session stops the whole session when it exits
+    cleanly (the GUI being closed) instead of being restarted. The child logs
+    to log_file (default: <name>.log).
+    """
+    def __init__(self, name, target, nice=None, cpus=None, heartbeat=None, ends_session=False, log_file=None):
+        self.name = name
+        self.target = target
+        self.log_file = log_file
+        self.nice = nice
+        self.cpus = cpus
+        self.heartbeat = heartbeat
+        self.ends_session = ends_session
+        self.process = None
+        self.started_at = 0.0
+        self.next_start = 0.0  # Monotonic time of the next (re)start
+        self.backoff = BACKOFF_INITIAL
+        self.restarts = 0
+        self.missed_heartbeats = 0
+        self.next_heartbeat = 0.0
+        self.last_usage = None  # (monotonic time, CPU seconds) at the last resource report
+
+class Supervisor:
+    """Starts, watches and restarts a set of children from the calling thread."""
+    def __init__(self, children, poll_seconds=POLL_SECONDS):
+        self.children = list(children)
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._next_report = 0.0
+
+    def run(self):
+        """Supervise until stop() or a session-ending child exits cleanly"""
+        self._next_report = time.monotonic() + RESOURCE_LOG_SECONDS
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                for child in self.children:
+                    if self._check(child, now):
+                        logger.info(f"{child.name} exited; ending the session")
+                        return
+                if now >= self._next_report:
+                    self.log_usage()
+                    self._next_report = now + RESOURCE_LOG_SECONDS
+                self._stop.wait(self.poll_seconds)
+        finally:
+            self.terminate_all()
+
+    def stop(self):
+        self._stop.set()
+
+    def _start(self, child, now):
+        process = multiprocessing.Process(target=_child_main, name=child.name,
+                                          args=(child.name, child.target, child.nice, child.cpus, child.log_file))
+        process.daemon = True
+        process.start()
+        child.process = process
+        child.started_at = now
+        child.missed_heartbeats = 0
+        child.next_heartbeat = now + STARTUP_GRACE_SECONDS if child.heartbeat else 0.0
+        child.last_usage = None
+        logger.info(f"Started {child.name} (pid {process.pid}, nice {child.nice}, "
+                    f"cpus {sorted(child.cpus) if child.cpus else 'all'})")
+
+    def _schedule_restart(self, child, now, reason):
+        if now - child.started_at >= STABLE_SECONDS:
+            child.backoff = BACKOFF_INITIAL
+        child.next_start = now + child.backoff
+        logger.error(f"{child.name} {reason}; restarting in {child.backoff:.0f}s "
+                     f"(restart {child.restarts + 1})")
+        child.backoff = min(child.backoff * 2, BACKOFF_MAX)
+        child.restarts += 1
+
+    def _check(self, child, now):
+        """Advance one child. Returns True when the session should end."""
+        process = child.process
+        if process is None:
+            if now >= child.next_start:
+                self._start(child, now)
+            return False
+
+        if not process.is_alive():
+            exitcode = process.exitcode
+            process.close()
+            child.process = None
+            if child.ends_session and exitcode == 0:
+                return True
+            self._schedule_restart(child, now, f"exited with code {exitcode}")
+            return False
+
+        if child.heartbeat and now >= child.next_heartbeat:
+            child.next_heartbeat = now + HEARTBEAT_SECONDS
+            if child.heartbeat():
+                child.missed_heartbeats = 0
+            else:
+                child.missed_heartbeats += 1
+                logger.warning(f"{child.name} missed a heartbeat ({child.missed_heartbeats}/{HEARTBEAT_FAILURES})")
+                if child.missed_heartbeats >= HEARTBEAT_FAILURES:
+                    self._kill(child)
+                    self._schedule_restart(child, now, "stopped answering its heartbeat")
+        return False
+
+    def _kill(self, child):
+        process = child.process
+        process.terminate()
+        process.join(STOP_TIMEOUT)
+        if process.is_alive():
+            process.kill()
+            process.join(STOP_TIMEOUT)
+        process.close()
+        child.process = None
+
+    def terminate_all(self):
+        for child in self.children:
+            if child.process is not None:
+                logger.info(f"Stopping {child.name}")
+                try:
+                    self._kill(child)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Error stopping {child.name}: {e}")
+
+    def log_usage(self):
+        """Log each running child's CPU (average since the last report) and resident memory"""
+        now = time.monotonic()
+        for child in self.children:
+            if child.process is None:
+                continue
+            usage = process_usage(child.process.pid)
+            if usage is None:
+                continue
+            cpu_seconds, rss = usage
+            since, cpu_before = child.last_usage or (child.started_at, 0.0)
+            cpu_percent = 100.0 * (cpu_seconds - cpu_before) / max(now - since, 1e-6)
+            child.last_usage = (now, cpu_seconds)
+            logger.info(f"{child.name}: pid {child.process.pid}, cpu {cpu_percent:.1f}%, "
+                        f"rss {rss / (1024 * 1024):.1f} MB, up {_format_uptime(now - child.started_at)}, "
+                        f"restarts {child.restarts}")
@@ -0,0 +1,78 @@
+import json
+import socket
+
+import pytest
+
+from control_socket import (ControlServer, CommandError, parse_command, parse_address,
+                            format_reply, format_error)
+
+def test_parse_command():
+    assert parse_command('ADD 0 "Tai Ho"') == ('add', ['0', 'Tai Ho'])
+    with pytest.raises(CommandError):
+        parse_command('   ')
+    with pytest.raises(CommandError):
+        parse_command('add 0 "Tai Ho')
+
+def test_parse_address():
+    assert parse_address('127.0.0.1:5055') == (socket.AF_INET, ('127.0.0.1', 5055))
+    assert parse_address(':5055') == (socket.AF_INET, ('127.0.0.1', 5055))
+    with pytest.raises(ValueError):
+        parse_address('localhost')
+
+def test_replies_are_single_lines():
+    assert format_reply() == 'ok'
+    assert format_reply({'name': 'Tai Ho', 'version': 2}) == 'ok {"name":"Tai Ho","version":2}'
+    assert format_error('bad\nthing  here') == 'err bad thing here'
+
+@pytest.fixture
+def server():
+    def add(session, slot, *name_words):
+        return {'slot': int(slot), 'name': ' '.join(name_words), 'channel': session.get('channel')}
+
+    def channel(session, channel_id):
+        session['channel'] = channel_id
+
+    def fail(session):
+        raise RuntimeError('boom')
+
+    calls = []
+    return ControlServer({'add': add, 'channel': channel, 'fail': fail},
+                         address='127.0.0.1:0', on_command=lambda name, ok: calls.append((name, ok))), calls
+
+def test_execute(server):
+    control, calls = server
+    session = {}
+    assert control.execute('channel side', session) == 'ok'
+    assert json.loads(control.execute('add 1 Tai Ho', session)[3:]) == {'slot': 1, 'name': 'Tai Ho', 'channel': 'side'}
+    assert control.execute('ping', session) == 'ok "pong"'
+    assert json.loads(control.execute('help', session)[3:]) == ['add', 'channel', 'fail', 'help', 'ping']
+    assert calls == [('channel', True), ('add', True), ('ping', True), ('help', True)]
+
+def test_execute_errors(server):
+    control, calls = server
+    assert control.execute('bogus', {}) == "err Unknown command 'bogus'"
+    assert control.execute('channel', {}) == 'err Wrong number of arguments for channel'
+    assert control.execute('add x Viktor', {}).startswith('err invalid literal')
+    assert control.execute('fail', {}) == 'err Internal error: boom'
+    assert control.execute('add "Tai', {}).startswith('err ')
+    # Unknown commands are not reported to on_command
+    assert calls == [('channel', False), ('add', False), ('fail', False)]
+
+def test_persistent_connection(server):
+    control, _ = server
+    control.start()
+    try:
+        with socket.create_connection(control._server.server_address, timeout=5) as sock:
+            stream = sock.makefile('rwb')
+            stream.write(b'channel side\n# comment\n\nadd 0 Viktor\nbogus\n')
+            stream.flush()
+            replies = [stream.readline().decode('utf-8').rstrip('\n') for _ in range(3)]
+            stream.write(b'x' * 5000 + b'\n')
+            stream.flush()
+            replies.append(stream.readline().decode('utf-8').rstrip('\n'))
+    finally:
+        control.stop()
+    assert replies[0] == 'ok'
+    assert json.loads(replies[1][3:])['channel'] == 'side'
+    assert replies[2] == "err Unknown command 'bogus'"
+    assert replies[3] == 'err Command too long'
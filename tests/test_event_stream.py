@@ -0,0 +1,34 @@
+from event_stream import EventRing
+
+def test_ids_carry_the_ring_epoch():
+    ring = EventRing(epoch='abc')
+    assert ring.publish('party', {'version': 1}) == 1
+    assert ring.since(0) == [b'id: abc-1\nevent: party\ndata: {"version":1}\n\n']
+    assert ring.parse_id('abc-1') == 1
+    assert EventRing().epoch != EventRing().epoch
+
+def test_foreign_or_malformed_ids_are_not_resumable():
+    ring = EventRing(epoch='abc')
+    for text in (None, '', '7', 'old-7', 'abc-', 'abc-x'):
+        assert ring.parse_id(text) is None
+
+def test_resume_returns_only_missed_frames():
+    ring = EventRing(epoch='abc')
+    for version in range(1, 4):
+        ring.publish('party', {'version': version})
+    frames = ring.since(1)
+    assert [frame.split(b'\n')[0] for frame in frames] == [b'id: abc-2', b'id: abc-3']
+    assert ring.since(3) == []
+
+def test_dropped_or_future_ids_need_a_snapshot():
+    ring = EventRing(capacity=2, epoch='abc')
+    for version in range(1, 5):
+        ring.publish('party', {'version': version})
+    assert ring.since(1) is None  # Events 2 and 3 already left the buffer
+    assert len(ring.since(2)) == 2
+    assert ring.since(500) is None
+
+def test_wait_times_out_with_nothing_new():
+    ring = EventRing()
+    ring.publish('star', {'id': 1})
+    assert ring.wait(1, timeout=0.01) == []
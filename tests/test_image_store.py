@@ -0,0 +1,98 @@
+import json
+
+import pytest
+from PIL import Image
+
+from profiles import ProfileIndex
+import image_store
+from image_store import ImageStore, RUNE_SLOTS, rune_filename
+
+def write_image(path, color, size=(4, 4)):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new('RGB', size, color).save(path)
+
+@pytest.fixture
+def project(tmp_path):
+    """One profile: two names sharing identical art, one missing file, one corrupt file"""
+    data_dir, image_dir = tmp_path / 'data', tmp_path / 'images'
+    data_dir.mkdir()
+    (tmp_path / 'profiles.json').write_text(json.dumps({
+        'profiles': {'s1': {'name': 'Suikoden I', 'data_dir': 'data', 'image_dir': 'images'}}
+    }), encoding='utf-8')
+    (data_dir / 'characters.json').write_text(json.dumps({
+        'Viktor': 'Viktor.png', 'Viktor (Alt)': 'ViktorCopy.png', 'Flik': 'Flik.png', 'Ghost': 'Ghost.png'
+    }), encoding='utf-8')
+    (data_dir / 'recruitment.json').write_text(json.dumps({
+        'Tai Ho': {'image': 'Broken.png', 'recruitment': 'Win at chinchirorin.'}
+    }), encoding='utf-8')
+    write_image(image_dir / 'Viktor.png', 'red')
+    write_image(image_dir / 'ViktorCopy.png', 'red')
+    write_image(image_dir / 'Flik.png', 'blue', (6, 3))
+    (image_dir / 'Broken.png').write_bytes(b'not a png')
+    for slot in range(RUNE_SLOTS):
+        write_image(image_dir / rune_filename(slot), 'green')
+    return ProfileIndex(tmp_path)
+
+def test_add_profile_reports_missing_and_corrupt_images(project):
+    store = ImageStore(project.base_dir)
+    problems = store.add_profile(project.get('s1'))
+    assert len(problems) == 2
+    assert problems[0].startswith('Broken.png: cannot decode') and 'Tai Ho (recruitment)' in problems[0]
+    assert problems[1] == 'Ghost.png: missing (used by Ghost)'
+    view = store.view('s1')
+    assert view.digest('Ghost.png') is None and view.digest('Broken.png') is None
+    assert view.problems == problems
+
+def test_identical_files_share_one_blob(project):
+    store = ImageStore(project.base_dir)
+    store.add_profile(project.get('s1'))
+    store._reindex()
+    view = store.view('s1')
+    assert view.digest('Viktor.png') == view.digest('ViktorCopy.png')
+    assert len({view.rune(slot) for slot in range(RUNE_SLOTS)}) == 1
+    flik = store.blobs[view.digest('Flik.png')]
+    assert (flik['width'], flik['height'], flik['format']) == (6, 3, 'PNG')
+    # Viktor, its copy, Flik and six identical runes: 9 references, 3 blobs
+    assert store.report() == {'profiles': 1, 'references': 9, 'blobs': 3, 'duplicates': 6,
+                              'problems': 2, 'decodes': 0}
+
+def test_shared_blobs_are_decoded_once(project):
+    store = ImageStore(project.base_dir, decoded_cache=2)
+    store.add_profile(project.get('s1'))
+    view = store.view('s1')
+    first = view.decode('Viktor.png')
+    assert view.decode('ViktorCopy.png') is first
+    assert first.mode == 'RGBA' and store.decodes == 1
+
+def test_manifest_round_trip_and_staleness(project):
+    profile = project.get('s1')
+    store = ImageStore(project.base_dir)
+    store.add_profile(profile)
+    store.save()
+    loaded = ImageStore.load(project.base_dir)
+    assert loaded.is_current(profile)
+    assert loaded.refresh([profile]) == []
+    write_image(profile.image_dir / 'Ghost.png', 'white')
+    assert not loaded.is_current(profile)
+    assert loaded.refresh([profile]) == ['s1']
+    assert loaded.view('s1').digest('Ghost.png') is not None
+    assert len(loaded.view('s1').problems) == 1
+
+def test_reindex_drops_unreferenced_blobs(project):
+    profile = project.get('s1')
+    store = ImageStore(project.base_dir)
+    store.add_profile(profile)
+    flik = store.view('s1').digest('Flik.png')
+    profile.characters_path.write_text(json.dumps({'Viktor': 'Viktor.png'}), encoding='utf-8')
+    store.refresh([profile])
+    assert flik not in store.blobs
+
+def test_unreadable_manifest_starts_empty(project):
+    (project.base_dir / 'image_manifest.json').write_text('{', encoding='utf-8')
+    assert ImageStore.load(project.base_dir).profiles == {}
+
+def test_check_exits_nonzero_on_problems(project, monkeypatch, capsys):
+    monkeypatch.chdir(project.base_dir)
+    assert image_store.main(['--check']) == 1
+    assert 's1: Ghost.png: missing' in capsys.readouterr().err
+    assert not (project.base_dir / 'image_manifest.json').exists()
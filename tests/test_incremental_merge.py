@@ -0,0 +1,48 @@
+from merge_character_data import IncrementalMerger, DEFAULT_RECRUITMENT_INFO
+
+CHARACTERS = {'Viktor': 'Viktor.png', 'Flik': 'Flik.png', 'Tai Ho': 'TaiHo.png'}
+RECRUITMENT = {'Flik': {'recruitment': 'After the Sarady event.'}, 'Tai Ho': 'Win at chinchirorin.'}
+
+def ids(processed):
+    return {character['name']: character['id'] for character in processed}
+
+def test_first_merge_numbers_characters_in_order():
+    processed, diff = IncrementalMerger().merge(CHARACTERS, RECRUITMENT)
+    assert ids(processed) == {'Viktor': 1, 'Flik': 2, 'Tai Ho': 3}
+    assert [c['name'] for c in diff['added']] == ['Viktor', 'Flik', 'Tai Ho']
+    assert processed[0]['recruitment_info'] == DEFAULT_RECRUITMENT_INFO
+    assert processed[2]['recruitment_info'] == 'Win at chinchirorin.'
+
+def test_unchanged_merge_has_an_empty_diff():
+    merger = IncrementalMerger()
+    first, _ = merger.merge(CHARACTERS, RECRUITMENT)
+    second, diff = merger.merge(dict(CHARACTERS), dict(RECRUITMENT))
+    assert diff == {'added': [], 'changed': [], 'removed': []}
+    assert second == first
+
+def test_ids_are_stable_across_removals_and_additions():
+    merger = IncrementalMerger()
+    merger.merge(CHARACTERS, RECRUITMENT)
+    characters = {'Tai Ho': 'TaiHo.png', 'Viktor': 'Viktor.png', 'Gremio': 'Gremio.png'}
+    processed, diff = merger.merge(characters, RECRUITMENT)
+    # Flik's id is not reused; the newcomer gets the next free one
+    assert ids(processed) == {'Viktor': 1, 'Tai Ho': 3, 'Gremio': 4}
+    assert diff['removed'] == ['Flik']
+    assert [c['name'] for c in diff['added']] == ['Gremio']
+
+def test_only_changed_sources_are_rebuilt():
+    merger = IncrementalMerger()
+    merger.merge(CHARACTERS, RECRUITMENT)
+    recruitment = dict(RECRUITMENT, Viktor={'recruitment': 'Joins at the start.', 'image': 'Viktor2.png'})
+    processed, diff = merger.merge(CHARACTERS, recruitment)
+    assert [c['name'] for c in diff['changed']] == ['Viktor']
+    assert diff['changed'][0]['id'] == 1
+    assert diff['changed'][0]['image_url'] == '/static/img/Viktor2.png'
+    assert ids(processed) == {'Viktor': 1, 'Flik': 2, 'Tai Ho': 3}
+
+def test_seeded_from_processed_data_keeps_its_ids():
+    previous, _ = IncrementalMerger().merge({'Flik': 'Flik.png', 'Viktor': 'Viktor.png'}, {})
+    merger = IncrementalMerger(previous)
+    processed, diff = merger.merge({'Viktor': 'Viktor.png', 'Flik': 'Flik.png', 'Kasumi': 'Kasumi.png'}, {})
+    assert ids(processed) == {'Flik': 1, 'Viktor': 2, 'Kasumi': 3}
+    assert [c['name'] for c in diff['added']] == ['Kasumi']
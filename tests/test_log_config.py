@@ -0,0 +1,37 @@
+import os
+import logging
+
+from log_config import SizedTimedRotatingFileHandler
+
+def record(message):
+    return logging.LogRecord('test', logging.INFO, __file__, 1, message, None, None)
+
+def test_old_file_is_not_rotated_when_opened(tmp_path):
+    path = tmp_path / 'web_interface.log'
+    path.write_text('from an earlier run\n', encoding='utf-8')
+    os.utime(path, (0, 0))  # Last written long before the rotation interval
+    handler = SizedTimedRotatingFileHandler(str(path), interval=60)
+    try:
+        assert not handler.shouldRollover(record('hello'))
+    finally:
+        handler.close()
+
+def test_rotates_once_the_interval_has_passed(tmp_path):
+    path = tmp_path / 'web_interface.log'
+    handler = SizedTimedRotatingFileHandler(str(path), interval=60)
+    try:
+        handler.rollover_at -= 61
+        handler.emit(record('hello'))
+        assert (tmp_path / 'web_interface.log.1').exists()
+        assert not handler.shouldRollover(record('again'))
+    finally:
+        handler.close()
+
+def test_rotates_by_size(tmp_path):
+    handler = SizedTimedRotatingFileHandler(str(tmp_path / 'web.log'), max_bytes=10, interval=0)
+    try:
+        handler.emit(record('a long enough line'))
+        handler.emit(record('another'))
+        assert (tmp_path / 'web.log.1').exists()
+    finally:
+        handler.close()
@@ -0,0 +1,52 @@
+from party_history import PartyHistory
+
+def edit(slot, before, after):
+    return {slot: (before, after)}
+
+def test_undo_and_redo_step_through_edits():
+    history = PartyHistory(10)
+    history.record(edit(0, None, 'Viktor'))
+    history.record({0: ('Viktor', 'Flik'), 3: (None, 'Gremio')})
+    assert history.undo() == {0: 'Viktor', 3: None}
+    assert history.undo() == {0: None}
+    assert history.undo() is None
+    assert history.redo() == {0: 'Viktor'}
+    assert history.redo() == {0: 'Flik', 3: 'Gremio'}
+    assert history.redo() is None
+    assert history.info() == {'undo': 2, 'redo': 0, 'capacity': 10}
+
+def test_new_edit_clears_redo():
+    history = PartyHistory(10)
+    history.record(edit(0, None, 'Viktor'))
+    history.record(edit(1, None, 'Flik'))
+    history.undo()
+    history.record(edit(2, None, 'Gremio'))
+    assert not history.can_redo and history.redo() is None
+    assert history.undo() == {2: None}
+    assert history.undo() == {0: None}
+
+def test_oldest_edits_are_evicted_at_capacity():
+    history = PartyHistory(3)
+    for slot in range(5):
+        history.record(edit(slot, None, f'Star{slot}'))
+    assert history.info() == {'undo': 3, 'redo': 0, 'capacity': 3}
+    assert [history.undo() for _ in range(4)] == [{4: None}, {3: None}, {2: None}, None]
+    assert [history.redo() for _ in range(4)] == [{2: 'Star2'}, {3: 'Star3'}, {4: 'Star4'}, None]
+
+def test_eviction_after_undo_overwrites_from_the_cursor():
+    history = PartyHistory(2)
+    history.record(edit(0, None, 'A'))
+    history.record(edit(1, None, 'B'))
+    history.undo()
+    history.record(edit(2, None, 'C'))
+    history.record(edit(3, None, 'D'))  # Full again: 'A' is the oldest and goes
+    assert [history.undo() for _ in range(3)] == [{3: None}, {2: None}, None]
+
+def test_empty_edits_and_clear():
+    history = PartyHistory(0)
+    assert history.capacity == 1
+    history.record({})
+    assert not history.can_undo
+    history.record(edit(0, None, 'A'))
+    history.clear()
+    assert history.undo() is None and history.info()['undo'] == 0
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from party_random import RandomPartyEngine, PartyConstraintError, load_roles, MAX_NO_REPEAT
+
+NAMES = [f"Star{i:03d}" for i in range(108)]
+ROLES = {'Star001': {'Healer'}, 'Star002': {'healer'}, 'Star010': {'Tank'}, 'Star011': {'tank', 'healer'}}
+
+def build_engine(names=NAMES, roles=ROLES):
+    return RandomPartyEngine(names, roles)
+
+def test_same_seed_same_parties():
+    first = build_engine().generate(42, count=20, required_roles=['healer'], no_repeat=2)
+    again = build_engine().generate(42, count=20, required_roles=['healer'], no_repeat=2)
+    assert first == again
+    assert build_engine().generate(43, count=20) != build_engine().generate(42, count=20)
+
+def test_fingerprint_identifies_roster_and_roles():
+    assert build_engine().fingerprint == build_engine().fingerprint
+    assert build_engine(NAMES[::-1]).fingerprint != build_engine().fingerprint
+    assert build_engine(roles={}).fingerprint != build_engine().fingerprint
+
+def test_parties_are_distinct_names_from_the_eligible_pool():
+    engine = build_engine()
+    eligible = engine.mask_of(NAMES[:10])
+    for party in engine.generate(1, count=50, eligible=eligible):
+        assert len(party) == 6 and len(set(party)) == 6
+        assert set(party) <= set(NAMES[:10])
+
+def test_required_roles_are_filled():
+    engine = build_engine()
+    healers, tanks = {'Star001', 'Star002', 'Star011'}, {'Star010', 'Star011'}
+    for party in engine.generate(7, count=100, required_roles=['Healer', 'TANK']):
+        members = set(party)
+        assert members & healers and members & tanks
+        # One member per required role: a lone Star011 can't count as both
+        assert len(members & (healers | tanks)) >= 2
+
+def test_unknown_or_unfillable_roles():
+    engine = build_engine()
+    with pytest.raises(PartyConstraintError):
+        engine.generate(1, required_roles=['bard'])
+    with pytest.raises(PartyConstraintError):
+        engine.generate(1, required_roles=['tank'], eligible=engine.mask_of(NAMES[20:30]))
+    with pytest.raises(PartyConstraintError):
+        engine.generate(1, size=2, required_roles=['healer', 'healer', 'tank'])
+
+def test_no_repeat_window_across_a_batch():
+    parties = build_engine().generate(3, count=30, no_repeat=3)
+    for index, party in enumerate(parties):
+        for previous in parties[max(0, index - 3):index]:
+            assert not set(party) & set(previous)
+
+def test_no_repeat_window_starts_with_recent():
+    engine = build_engine(NAMES[:18])
+    recent = [NAMES[0:6], NAMES[6:12]]
+    first = engine.generate(5, no_repeat=2, recent=recent)[0]
+    assert set(first) == set(NAMES[12:18])
+    # Only the last no_repeat recent parties count
+    assert set(engine.generate(5, no_repeat=1, recent=recent)[0]) & set(NAMES[0:6])
+
+def test_no_repeat_exhaustion():
+    engine = build_engine(NAMES[:12])
+    with pytest.raises(PartyConstraintError):
+        engine.generate(1, no_repeat=2, recent=[NAMES[0:6], NAMES[6:12]])
+
+def test_dedup_runs_out_with_fewer_parties():
+    engine = build_engine(NAMES[:7])
+    parties = engine.generate(9, count=50)
+    # 7 choose 6 = 7 distinct member sets
+    assert len(parties) == 7
+    assert len({frozenset(party) for party in parties}) == 7
+
+def test_small_pool_shrinks_the_party_and_empty_pool_fails():
+    engine = build_engine(NAMES[:4])
+    assert len(engine.generate(1)[0]) == 4
+    with pytest.raises(PartyConstraintError):
+        engine.generate(1, eligible=0)
+
+@pytest.mark.parametrize('kwargs', [{'count': 0}, {'no_repeat': MAX_NO_REPEAT + 1}])
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        build_engine().generate(1, **kwargs)
+
+def test_load_roles(tmp_path):
+    path = tmp_path / 'roles.json'
+    assert load_roles(path) == {}
+    path.write_text(json.dumps({'healer': ['Viktor', 'Tai Ho'], 'tank': ['Viktor']}), encoding='utf-8')
+    assert load_roles(path) == {'Viktor': {'healer', 'tank'}, 'Tai Ho': {'healer'}}
+    path.write_text(json.dumps({'healer': 'Viktor'}), encoding='utf-8')
+    with pytest.raises(ValueError):
+        load_roles(path)
@@ -0,0 +1,52 @@
+import json
+
+from profiles import Profile, ProfileIndex, ProfileCache
+
+def profile(profile_id):
+    return Profile(profile_id, profile_id, f'{profile_id}/data', f'{profile_id}/images')
+
+def test_cache_loads_once_and_evicts_least_recently_used():
+    loads, evicted = [], []
+    cache = ProfileCache(lambda p: loads.append(p.id) or {'id': p.id}, capacity=2,
+                         on_evict=lambda profile_id, state: evicted.append((profile_id, state)))
+    s1, s2, s3 = profile('s1'), profile('s2'), profile('s3')
+    cache.get(s1)
+    cache.get(s2)
+    assert cache.get(s1) == {'id': 's1'}  # Hit: s1 is now the most recently used
+    cache.get(s3)
+    assert loads == ['s1', 's2', 's3']
+    assert evicted == [('s2', {'id': 's2'})]
+    assert cache.loaded() == ['s1', 's3']
+    assert 's2' not in cache
+
+def test_put_refreshes_recency():
+    cache = ProfileCache(lambda p: p.id, capacity=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.put('a', 3)
+    cache.put('c', 4)
+    assert cache.loaded() == ['a', 'c']
+    assert cache.values() == [3, 4]
+
+def test_capacity_is_at_least_one():
+    cache = ProfileCache(lambda p: p.id, capacity=0)
+    cache.get(profile('a'))
+    assert cache.loaded() == ['a']
+
+def test_index_resolves_paths_and_startup_profile(tmp_path, monkeypatch):
+    (tmp_path / 'profiles.json').write_text(json.dumps({
+        'default': 's2',
+        'profiles': {'s1': {'name': 'Suikoden I', 'data_dir': 'data'}, 's2': {'name': 'Suikoden II'}}
+    }), encoding='utf-8')
+    index = ProfileIndex(tmp_path)
+    assert index.profiles['s1'].data_dir == tmp_path / 'data'
+    assert index.profiles['s2'].image_dir == tmp_path / 'profiles' / 's2' / 'images'
+    monkeypatch.delenv('SUIKODEN_PROFILE', raising=False)
+    assert index.startup_profile().id == 's2'
+    monkeypatch.setenv('SUIKODEN_PROFILE', 's1')
+    assert index.startup_profile().id == 's1'
+
+def test_index_without_a_file_uses_the_builtin_profile(tmp_path):
+    index = ProfileIndex(tmp_path)
+    assert list(index.profiles) == ['suikoden1']
+    assert index.list() == [{'id': 'suikoden1', 'name': 'Suikoden I'}]
@@ -0,0 +1,66 @@
+from progress_store import ProgressJournal, encode_record, decode_record
+
+def open_journal(directory, **kwargs):
+    journal = ProgressJournal(directory, fsync=False, **kwargs)
+    return journal, journal.load()
+
+def test_record_round_trip():
+    assert decode_record(encode_record(7, 'Viktor', True)) == (7, 'Viktor', True)
+    assert decode_record(encode_record(8, 'Tai Ho', False)) == (8, 'Tai Ho', False)
+
+def test_corrupt_record_is_rejected():
+    line = encode_record(1, 'Viktor', True)
+    assert decode_record(line.replace(b'Viktor', b'Viktur')) is None
+    assert decode_record(b'\xff\xfe\n') is None
+
+def test_journal_is_replayed_after_a_crash(tmp_path):
+    journal, state = open_journal(tmp_path)
+    assert state == {}
+    journal.record('Viktor', True)
+    journal.record('Flik', True)
+    journal.record('Viktor', False)
+    # No close(): the snapshot is never written, as after a crash
+    reopened, state = open_journal(tmp_path)
+    assert state == {'Viktor': False, 'Flik': True}
+    assert reopened.seq == 3
+
+def test_torn_tail_is_ignored_and_truncated(tmp_path):
+    journal, _ = open_journal(tmp_path)
+    journal.record('Viktor', True)
+    with open(journal.journal_path, 'ab') as f:
+        f.write(encode_record(2, 'Flik', True)[:-5])  # Write cut short by a crash
+    reopened, state = open_journal(tmp_path)
+    assert state == {'Viktor': True}
+    reopened.record('Flik', True)
+    # The new record starts on a clean line and survives the next replay
+    assert open_journal(tmp_path)[1] == {'Viktor': True, 'Flik': True}
+
+def test_snapshot_plus_journal_replay(tmp_path):
+    journal, _ = open_journal(tmp_path)
+    journal.record('Viktor', True)
+    journal.record('Flik', True)
+    journal.compact()
+    journal.record('Flik', False)
+    journal.record('Gremio', True)
+    reopened, state = open_journal(tmp_path)
+    assert reopened.snapshot_seq == 2
+    assert state == {'Viktor': True, 'Flik': False, 'Gremio': True}
+
+def test_records_already_in_the_snapshot_are_skipped(tmp_path):
+    journal, _ = open_journal(tmp_path)
+    journal.record('Viktor', True)
+    journal.record('Viktor', False)
+    journal_bytes = journal.journal_path.read_bytes()
+    journal.compact()
+    # Crash between the snapshot swap and the journal truncation
+    journal.journal_path.write_bytes(journal_bytes)
+    reopened, state = open_journal(tmp_path)
+    assert state == {'Viktor': False}
+    assert reopened.seq == 2
+
+def test_close_compacts_into_the_snapshot(tmp_path):
+    journal, _ = open_journal(tmp_path)
+    journal.record('Viktor', True)
+    journal.close()
+    assert journal.journal_path.stat().st_size == 0
+    assert open_journal(tmp_path)[1] == {'Viktor': True}
@@ -0,0 +1,52 @@
+from search_index import SearchIndex, tokenize, split_name_role
+
+def build_index():
+    index = SearchIndex()
+    index.add(1, 'Viktor', ['Warrior'], 'Joins automatically at the start of the game.')
+    index.add(2, 'Flik', ['Swordsman'], 'Joins with Viktor after the Sarady village event.')
+    index.add(3, 'Tai Ho', ['Fisher'], 'Win a game of chinchirorin at Kuskus.')
+    index.add(4, 'Viki', ['Mage'], 'Found at the <Great Forest>.')
+    return index
+
+def test_tokenize_and_split():
+    assert tokenize('Tai Ho, "Kuskus"!') == ['tai', 'ho', 'kuskus']
+    assert split_name_role('Clive (Gunner)') == ('Clive', 'Gunner')
+    assert split_name_role('Viktor') == ('Viktor', None)
+
+def test_name_matches_outrank_recruitment_text():
+    results = build_index().search('viktor')
+    assert [r['id'] for r in results] == [1, 2]
+    assert results[0]['score'] > results[1]['score']
+
+def test_prefix_matching():
+    index = build_index()
+    assert {r['id'] for r in index.search('vik')} == {1, 2, 4}
+    assert index.search('vik', prefix=False) == []
+
+def test_all_terms_beat_one_term():
+    results = build_index().search('game kuskus')
+    assert results[0]['id'] == 3
+    assert results[0]['matched_terms'] == ['game', 'kuskus']
+
+def test_stopwords_only_query_still_searches():
+    assert build_index().search('the')
+
+def test_snippet_highlights_and_escapes():
+    index = build_index()
+    result = index.search('forest')[0]
+    assert result['field'] == 'recruitment_info'
+    assert result['snippet'] == 'Found at the &lt;Great <mark>Forest</mark>&gt;.'
+    raw = index.search('forest', marks=('[', ']'), escape=False)[0]
+    assert raw['snippet'] == 'Found at the <Great [Forest]>.'
+
+def test_reindex_and_remove():
+    index = build_index()
+    index.add(3, 'Tai Ho', ['Fisher'], 'Recruit him on the island.')
+    assert index.search('kuskus') == []
+    assert index.search('island')[0]['id'] == 3
+    index.remove(3)
+    assert index.search('tai') == []
+    assert 'island' not in index.postings
+
+def test_limit():
+    assert len(build_index().search('joins', limit=1)) == 1
@@ -0,0 +1,70 @@
+from session_timeline import SessionTimeline, serialize_state
+
+def record_at(timeline, t, event_type, data):
+    """Record an event at session time t"""
+    timeline.now = lambda: t
+    return timeline.record(event_type, data)
+
+def test_state_at_replays_up_to_the_time():
+    timeline = SessionTimeline()
+    record_at(timeline, 1.0, 'party_add', {'slots': {0: 'Viktor'}})
+    record_at(timeline, 2.0, 'recruit', {'id': 5, 'recruited': True})
+    record_at(timeline, 3.0, 'party_remove', {'slots': {0: None}})
+    assert timeline.state_at(0.5)['party'][0] is None
+    assert timeline.state_at(1.0)['party'][0] == 'Viktor'
+    assert timeline.state_at(2.5) == {'party': ['Viktor'] + [None] * 5, 'stars': {5}}
+    assert timeline.state_at(10.0) == timeline.state
+
+def test_replay_from_snapshots_matches_the_live_state():
+    times = [float(t) for t in range(1, 26)]
+    timeline = SessionTimeline(snapshot_every=4)
+    live = []
+    for t in times:
+        record_at(timeline, t, 'recruit', {'id': int(t) % 7, 'recruited': int(t) % 3 != 0})
+        live.append(serialize_state(timeline.state))
+    assert timeline.info()['snapshot_count'] == 1 + 25 // 4
+    for t, expected in zip(times, live):
+        assert serialize_state(timeline.state_at(t)) == expected
+        assert serialize_state(timeline.state_at(t + 0.5)) == expected
+
+def test_snapshots_are_not_changed_by_later_events():
+    timeline = SessionTimeline(snapshot_every=1)
+    record_at(timeline, 1.0, 'party_add', {'slots': {1: 'Flik'}})
+    record_at(timeline, 2.0, 'party_add', {'slots': {1: 'Gremio'}})
+    assert timeline.state_at(1.0)['party'][1] == 'Flik'
+
+def test_events_between():
+    timeline = SessionTimeline()
+    for character_id in range(4):
+        record_at(timeline, character_id + 1.0, 'recruit', {'id': character_id, 'recruited': True})
+    assert [e['seq'] for e in timeline.events_between(2.0, 3.0)] == [2, 3]
+    assert [e['seq'] for e in timeline.events_between(since_seq=2)] == [3, 4]
+    assert [e['seq'] for e in timeline.events_between(limit=1)] == [1]
+
+def test_reset_starts_from_the_given_state():
+    timeline = SessionTimeline()
+    record_at(timeline, 1.0, 'recruit', {'id': 1, 'recruited': True})
+    timeline.reset({'party': ['Viktor'] + [None] * 5, 'stars': {2}})
+    assert timeline.events == []
+    assert timeline.state_at(0.0) == {'party': ['Viktor'] + [None] * 5, 'stars': {2}}
+
+def test_only_the_last_snapshots_and_their_events_are_kept():
+    timeline = SessionTimeline(snapshot_every=5, max_snapshots=3)
+    for seq in range(1, 33):
+        record_at(timeline, float(seq), 'recruit', {'id': seq, 'recruited': True})
+    info = timeline.info()
+    # Snapshots after events 20, 25 and 30; events 21.. are kept
+    assert (info['event_count'], info['snapshot_count'], info['first_seq'], info['kept_events']) == (32, 3, 21, 12)
+    assert timeline.state_at(27.0)['stars'] == set(range(1, 28))
+    assert timeline.state_at(32.0) == timeline.state
+    # Before the kept window: the oldest kept snapshot
+    assert timeline.state_at(3.0)['stars'] == set(range(1, 21))
+    assert [e['seq'] for e in timeline.events_between(0.0, 23.0)] == [21, 22, 23]
+    assert [e['seq'] for e in timeline.events_between(since_seq=30)] == [31, 32]
+    assert [e['seq'] for e in timeline.events_between(since_seq=5, limit=1)] == [21]
+
+def test_serialize_resolves_party_names():
+    state = {'party': ['Viktor', None], 'stars': {3, 1}}
+    assert serialize_state(state) == {'party': ['Viktor', None], 'stars': [1, 3], 'recruited_count': 2}
+    resolved = serialize_state(state, lambda name: {'name': name, 'image_url': f'/static/img/{name}.png'})
+    assert resolved['party'] == [{'name': 'Viktor', 'image_url': '/static/img/Viktor.png'}, None]
@@ -0,0 +1,52 @@
+import base64
+
+import pytest
+
+from star_bitset import StarBitset
+
+def test_set_get_and_count():
+    bits = StarBitset(20)
+    assert bits.set(1, True) and bits.set(9, True) and bits.set(20, True)
+    assert not bits.set(9, True)  # Unchanged
+    assert bits.get(9) and not bits.get(10)
+    assert bits.count == 3
+    assert bits.set(9, False)
+    assert bits.count == 2
+    assert bits.recruited_ids() == [1, 20]
+
+def test_flip():
+    bits = StarBitset(8)
+    assert bits.flip(3) is True
+    assert bits.flip(3) is False
+    assert bits.count == 0
+
+@pytest.mark.parametrize('character_id', [0, 11, -1])
+def test_out_of_range_ids(character_id):
+    with pytest.raises(IndexError):
+        StarBitset(10).get(character_id)
+
+def test_bit_layout():
+    # id 1 is the lowest bit of the first byte, id 9 the lowest of the second
+    bits = StarBitset(10)
+    bits.set(1, True)
+    bits.set(9, True)
+    bits.set(10, True)
+    assert bits.to_bytes() == b'\x01\x03'
+    assert base64.b64decode(bits.to_base64()) == b'\x01\x03'
+
+def test_resize_keeps_bits_that_fit():
+    bits = StarBitset(16)
+    for character_id in (2, 8, 16):
+        bits.set(character_id, True)
+    bits.resize(8)
+    assert bits.size == 8 and len(bits.to_bytes()) == 1
+    assert bits.recruited_ids() == [2, 8] and bits.count == 2
+    bits.resize(24)
+    assert len(bits.to_bytes()) == 3
+    assert bits.recruited_ids() == [2, 8] and not bits.get(16)
+
+def test_clear():
+    bits = StarBitset(10)
+    bits.set(5, True)
+    bits.clear()
+    assert bits.count == 0 and bits.recruited_ids() == []
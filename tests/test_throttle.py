@@ -0,0 +1,76 @@
+from throttle import TokenBucket, RateLimiter, Coalescer
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_token_bucket_refills_at_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+    assert [bucket.consume()[0] for _ in range(4)] == [True, True, True, False]
+    allowed, retry_after = bucket.consume()
+    assert not allowed and retry_after == 0.5
+    clock.now = 0.5
+    assert bucket.consume() == (True, 0.0)
+    clock.now = 100.0
+    # Never refills past capacity
+    assert [bucket.consume()[0] for _ in range(4)] == [True, True, True, False]
+
+def test_rate_limiter_buckets_per_client_and_event():
+    limiter = RateLimiter(rate=1, burst=1, clock=FakeClock())
+    assert limiter.allow('a', 'add')[0]
+    assert not limiter.allow('a', 'add')[0]
+    assert limiter.allow('a', 'remove')[0]
+    assert limiter.allow('b', 'add')[0]
+    limiter.forget('a')
+    assert limiter.allow('a', 'add')[0]
+    assert not limiter.allow('b', 'add')[0]
+
+class Harness:
+    """A coalescer with a fake clock and a manually run scheduler"""
+    def __init__(self, window=1.0):
+        self.clock = FakeClock()
+        self.flushes = []
+        self.scheduled = []
+        self.coalescer = Coalescer(window, self.flush, self.schedule, self.clock)
+
+    def flush(self, keys, updates):
+        self.flushes.append((keys, updates))
+        return len(self.flushes)
+
+    def schedule(self, delay, callback):
+        self.scheduled.append((self.clock.now + delay, callback))
+
+    def run_timers(self):
+        for when, callback in self.scheduled:
+            self.clock.now = max(self.clock.now, when)
+            callback()
+        self.scheduled = []
+
+def test_first_submit_flushes_immediately():
+    harness = Harness()
+    assert harness.coalescer.submit({0}, 'a') == 1
+    assert harness.flushes == [({0}, ['a'])]
+
+def test_submits_inside_the_window_are_merged_into_one_flush():
+    harness = Harness()
+    harness.coalescer.submit({0}, 'a')
+    harness.clock.now = 0.2
+    assert harness.coalescer.submit({1}, 'b') is None
+    harness.clock.now = 0.4
+    assert harness.coalescer.submit({1, 2}, 'c') is None
+    assert len(harness.scheduled) == 1 and harness.scheduled[0][0] == 1.0
+    assert harness.coalescer.coalesced == 1
+    harness.run_timers()
+    assert harness.flushes[1] == ({1, 2}, ['b', 'c'])
+
+def test_submit_after_a_quiet_window_flushes_immediately():
+    harness = Harness()
+    harness.coalescer.submit({0}, 'a')
+    harness.clock.now = 5.0
+    assert harness.coalescer.submit({3}) == 2
+    assert harness.flushes[1] == ({3}, [])
+    assert harness.scheduled == []
@@ -0,0 +1,47 @@
+import pytest
+
+from topics import normalize_subscription, project, topic_room, TopicGroups, ROSTER_SCOPE
+
+VIKTOR = {'id': 1, 'name': 'Viktor', 'image_url': '/static/img/Viktor.png', 'recruitment_info': 'Start.'}
+
+def test_normalize_subscription():
+    assert normalize_subscription(['party', 'stars']) == {'party': None, 'stars': None}
+    assert normalize_subscription({'party': ['name', 'id', 'name']}) == {'party': ('id', 'name')}
+
+@pytest.mark.parametrize('topics', ['party', {'weather': None}, {'party': []}, {'party': 'name'}, {'party': ['']}])
+def test_invalid_subscriptions(topics):
+    with pytest.raises(ValueError):
+        normalize_subscription(topics)
+
+def test_project_party_records_keeps_bookkeeping():
+    payload = {'version': 4, 'party': [VIKTOR, None], 'character': VIKTOR, 'recruitment_info': 'Start.'}
+    projected = project('party', payload, ('name',))
+    assert projected == {'version': 4, 'party': [{'name': 'Viktor'}, None], 'character': {'name': 'Viktor'}}
+    assert payload['party'][0] is VIKTOR and 'recruitment_info' in payload  # Not modified
+
+def test_project_stars_on_its_own_keys():
+    payload = {'bitmap': 'AQ==', 'width': 8, 'recruited_count': 1, 'total': 108}
+    assert project('stars', payload, ('recruited_count', 'total')) == {'recruited_count': 1, 'total': 108}
+
+def test_no_projection_is_the_payload_itself():
+    payload = {'party': [VIKTOR]}
+    assert project('party', payload, None) is payload
+
+def test_groups_by_projection_and_scope():
+    groups = TopicGroups()
+    leave, join = groups.assign('a', 'main', {'party': ('name',), 'roster': None})
+    assert leave == set()
+    assert join == {topic_room('main', 'party', ('name',)), topic_room(ROSTER_SCOPE, 'roster', None)}
+    groups.assign('b', 'main', {'party': ('name',)})
+    groups.assign('c', 'side', {'party': None, 'roster': None})
+    assert groups.projections('main', 'party') == [('name',)]
+    assert groups.counts() == {'topic:main:party:name': 2, 'topic:*:roster:*': 2, 'topic:side:party:*': 1}
+
+def test_reassign_returns_rooms_to_leave_and_join():
+    groups = TopicGroups()
+    groups.assign('a', 'main', {'party': None, 'stars': None})
+    leave, join = groups.assign('a', 'side', {'party': None, 'roster': None})
+    assert leave == {'topic:main:party:*', 'topic:main:stars:*'}
+    assert join == {'topic:side:party:*', 'topic:*:roster:*'}
+    assert groups.remove('a') == {'topic:side:party:*', 'topic:*:roster:*'}
+    assert groups.counts() == {} and groups.subscription('a') is None
@@ -0,0 +1,169 @@
+import os
+import json
+import sys
+import itertools
+import subprocess
+import importlib
+
+import pytest
+
+from throttle import RateLimiter
+
+_channel_ids = itertools.count(1)
+
+@pytest.fixture(scope='session')
+def web():
+    return importlib.import_module('web_interface')
+
+@pytest.fixture
+def channel(web, tmp_path, monkeypatch):
+    """A fresh channel whose files live in tmp_path, with rate limiting out of the way"""
+    monkeypatch.setattr(web, 'DATA_DIR', tmp_path)
+    monkeypatch.setattr(web, 'rate_limiter', RateLimiter(1000, 1000))
+    channel = web.get_channel(f"pytest-{next(_channel_ids)}")
+    yield channel
+    web.close_channel(channel)
+    web.channels.pop(channel.id, None)
+
+@pytest.fixture
+def names(web):
+    return [character['name'] for character in list(web.characters_by_id.values())[:3]]
+
+def post_batch(web, channel, body):
+    client = web.app.test_client()
+    return client.post(f'/api/party/batch?channel={channel.id}', json=body)
+
+def test_batch_applies_every_operation_as_one_version(web, channel, names):
+    response = post_batch(web, channel, {'operations': [
+        {'op': 'clear'},
+        {'op': 'add', 'slot': 0, 'character_name': names[0]},
+        {'op': 'add', 'slot': 1, 'character_name': names[1]},
+        {'op': 'move', 'from_slot': 1, 'to_slot': 5}
+    ]})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [member and member['name'] for member in data['party']] == [names[0], None, None, None, None, names[1]]
+    assert data['version'] == channel.version == 1
+    assert data['updated_slots'] == [0, 1, 5]
+
+def test_batch_with_invalid_operation_changes_nothing(web, channel, names):
+    before = list(channel.party)
+    response = post_batch(web, channel, {'operations': [
+        {'op': 'add', 'slot': 0, 'character_name': names[0]},
+        {'op': 'add', 'slot': 9, 'character_name': names[1]}
+    ]})
+    assert response.status_code == 400
+    assert 'Operation 1' in response.get_json()['error']
+    assert channel.party == before
+    assert channel.version == 0
+
+@pytest.mark.parametrize('body', [[], {'operations': []}, {'operations': [{'op': 'explode'}]}])
+def test_batch_rejects_malformed_requests(web, channel, body):
+    assert post_batch(web, channel, body).status_code == 400
+
+def test_stale_batch_on_touched_slot_is_a_conflict(web, channel, names):
+    first = post_batch(web, channel, {'operations': [{'op': 'add', 'slot': 0, 'character_name': names[0]}]})
+    assert first.status_code == 200
+    response = post_batch(web, channel, {'base_version': 0, 'operations': [
+        {'op': 'add', 'slot': 0, 'character_name': names[1]}
+    ]})
+    assert response.status_code == 409
+    conflict = response.get_json()
+    assert conflict['conflicting_slots'] == [0]
+    assert conflict['version'] == 1 and conflict['slot_versions'][0] == 1
+    assert conflict['party'][0]['name'] == names[0]
+    assert channel.party[0]['name'] == names[0]
+
+def test_stale_batch_on_untouched_slots_is_applied(web, channel, names):
+    post_batch(web, channel, {'operations': [{'op': 'add', 'slot': 0, 'character_name': names[0]}]})
+    response = post_batch(web, channel, {'base_version': 0, 'operations': [
+        {'op': 'add', 'slot': 3, 'character_name': names[1]}
+    ]})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == 2
+    assert channel.slot_versions[0] == 1 and channel.slot_versions[3] == 2
+
+def test_invalid_base_version_is_rejected(web, channel, names):
+    response = post_batch(web, channel, {'base_version': 'latest', 'operations': [
+        {'op': 'add', 'slot': 0, 'character_name': names[0]}
+    ]})
+    assert response.status_code == 400
+
+def test_socket_add_with_stale_version_gets_party_conflict(web, channel, names):
+    client = web.socketio.test_client(web.app, query_string=f'channel={channel.id}')
+    try:
+        client.emit('add_to_party', {'slot': 2, 'character_name': names[0], 'base_version': 0})
+        client.emit('add_to_party', {'slot': 2, 'character_name': names[1], 'base_version': 0})
+        received = {event['name']: event['args'][0] for event in client.get_received()}
+    finally:
+        client.disconnect()
+    assert received['update_success']['version'] == 1
+    assert received['party_conflict']['conflicting_slots'] == [2]
+    assert channel.party[2]['name'] == names[0]
+
+def test_control_party_with_stale_version_is_an_error(web, channel, names):
+    control = web.ControlServer(web.CONTROL_COMMANDS)
+    session = {'channel': channel.id}
+    assert control.execute(f'party @0 "{names[0]}" - - - - -', session).startswith('ok ')
+    reply = control.execute(f'party @0 "{names[1]}" - - - - -', session)
+    assert reply.startswith('err Conflict:')
+    assert channel.party[0]['name'] == names[0]
+    assert control.execute(f'party @1 "{names[1]}" - - - - -', session).startswith('ok ')
+
+def open_stream(web, channel, last_event_id=None):
+    """The first frame after the retry hint, and the response (close it when done)"""
+    headers = {'Last-Event-ID': last_event_id} if last_event_id is not None else {}
+    response = web.app.test_client().get(f'/stream/party?channel={channel.id}', headers=headers, buffered=False)
+    chunks = iter(response.response)
+    assert next(chunks) == b"retry: 2000\n\n"
+    return next(chunks), response
+
+def test_stream_starts_with_a_snapshot(web, channel, names):
+    post_batch(web, channel, {'operations': [{'op': 'add', 'slot': 0, 'character_name': names[0]}]})
+    frame, response = open_stream(web, channel)
+    response.close()
+    assert frame.startswith(f"id: {channel.events.format_id(channel.events.last_id)}\nevent: snapshot\n".encode())
+    assert names[0].encode() in frame
+
+def test_stream_resumes_after_the_last_seen_event(web, channel, names):
+    channel.events.publish('party', {'version': 1})
+    channel.events.publish('party', {'version': 2})
+    frame, response = open_stream(web, channel, channel.events.format_id(1))
+    response.close()
+    assert frame == f'id: {channel.events.format_id(2)}\nevent: party\ndata: {{"version":2}}\n\n'.encode()
+
+def test_stream_resumed_with_an_id_from_before_a_restart_gets_a_snapshot(web, channel):
+    channel.events.publish('party', {'version': 1})
+    for stale_id in ('500', 'deadbeef-500', f'{channel.events.epoch}-500'):
+        frame, response = open_stream(web, channel, stale_id)
+        response.close()
+        assert b'event: snapshot\n' in frame
+
+def test_import_writes_no_log_file(web, tmp_path):
+    # Only the serving paths (python web_interface.py, the launcher's web child) log to a file
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(web.__file__))
+    subprocess.run([sys.executable, '-c', 'import web_interface'], cwd=tmp_path, env=env, check=True,
+                   capture_output=True, timeout=60)
+    assert not (tmp_path / 'web_interface.log').exists()
+
+def test_undo_after_a_rejected_edit_undoes_the_accepted_one(web, channel, names):
+    control = web.ControlServer(web.CONTROL_COMMANDS)
+    session = {'channel': channel.id}
+    control.execute(f'party @0 "{names[0]}" - - - - -', session)
+    assert control.execute(f'party @0 "{names[1]}" - - - - -', session).startswith('err Conflict:')
+    # The conflicting edit never reached the history
+    assert channel.history.info()['undo'] == 1
+    undo = json.loads(control.execute('undo', session)[3:])
+    assert undo == {'version': 2, 'party': [None] * 6}
+    assert json.loads(control.execute('redo', session)[3:])['party'][0] == names[0]
+    # A stale edit based on the version before the undo conflicts too
+    assert control.execute(f'party @1 "{names[1]}" - - - - -', session).startswith('err Conflict:')
+
+def test_timeline_keeps_names_and_serves_records(web, channel, names):
+    post_batch(web, channel, {'operations': [{'op': 'add', 'slot': 1, 'character_name': names[0]}]})
+    client = web.app.test_client()
+    events = client.get(f'/api/timeline?channel={channel.id}').get_json()['events']
+    assert events[-1]['data']['slots'] == {'1': names[0]}
+    state = client.get(f'/api/timeline/state?channel={channel.id}').get_json()
+    assert state['party'][1] == web.find_character(names[0])
+    assert channel.timeline.state['party'][1] == names[0]
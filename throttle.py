@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Throttling
+Per-client token-bucket rate limiting and write coalescing for party mutations.
+"""
+
+import time
+import threading
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `capacity`."""
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def consume(self, amount=1):
+        """Take tokens if available. Returns (allowed, seconds until enough tokens)."""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True, 0.0
+        return False, (amount - self.tokens) / self.rate
+
+class RateLimiter:
+    """One token bucket per (client, event type)."""
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def allow(self, client_id, event):
+        """Returns (allowed, retry_after_seconds)"""
+        with self._lock:
+            bucket = self._buckets.get((client_id, event))
+            if bucket is None:
+                bucket = self._buckets[(client_id, event)] = TokenBucket(self.rate, self.burst, self.clock)
+            return bucket.consume()
+
+    def forget(self, client_id):
+        """Drop every bucket belonging to a disconnected client"""
+        with self._lock:
+            for key in [k for k in self._buckets if k[0] == client_id]:
+                del self._buckets[key]
+
+class Coalescer:
+    """Throttles flushes to at most one per window, merging everything in between.
+
+    The first submit after a quiet window flushes immediately (no added
+    latency); submits inside the window are accumulated and flushed once when
+    the window ends, so only the final state is written and broadcast.
+    """
+    def __init__(self, window, flush, schedule, clock=time.monotonic):
+        self.window = window
+        self.flush = flush  # flush(keys, updates) -> result
+        self.schedule = schedule  # schedule(delay_seconds, callback)
+        self.clock = clock
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._pending_keys = set()
+        self._pending_updates = []
+        self._timer_pending = False
+        self._last_flush = float('-inf')
+
+    def submit(self, keys, update=None):
+        """Queue a change. Returns the flush result if flushed now, else None."""
+        with self._lock:
+            self._pending_keys.update(keys)
+            if update is not None:
+                self._pending_updates.append(update)
+            if self._timer_pending:
+                self.coalesced += 1
+                return None
+            wait = self._last_flush + self.window - self.clock()
+            if wait > 0:
+                self._timer_pending = True
+                self.schedule(wait, self.flush_pending)
+                return None
+        return self.flush_pending()
+
+    def flush_pending(self):
+        """Flush whatever has accumulated"""
+        with self._lock:
+            keys, updates = self._pending_keys, self._pending_updates
+            self._pending_keys, self._pending_updates = set(), []
+            self._timer_pending = False
+            self._last_flush = self.clock()
+        return self.flush(keys, updates)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Suikoden Display - Topics
+Socket.IO topic subscriptions with field projection. Subscribers are grouped
+by (scope, topic, projection) and each group is a Socket.IO room, so an
+update is projected and serialized once per group and sent only to its
+members.
+"""
+
+import threading
+
+TOPICS = ('party', 'stars', 'selection', 'roster')
+# What a client receives until it subscribes: what the control page renders, unprojected
+DEFAULT_SUBSCRIPTION = {'party': None, 'stars': None, 'roster': None}
+# The roster is shared by every channel; the other topics are scoped to the client's channel
+ROSTER_SCOPE = '*'
+MAX_PROJECTION_FIELDS = 32
+
+def topic_scope(topic, channel_id):
+    return ROSTER_SCOPE if topic == 'roster' else channel_id
+
+def normalize_subscription(topics):
+    """Validate a subscription: a list of topics (all fields) or {topic: [fields] or None}.
+
+    Returns {topic: sorted tuple of fields, or None for every field}. Raises ValueError.
+    """
+    if isinstance(topics, list):
+        topics = {topic: None for topic in topics}
+    if not isinstance(topics, dict):
+        raise ValueError("topics must be a list or an object")
+    subscription = {}
+    for topic, fields in topics.items():
+        if topic not in TOPICS:
+            raise ValueError(f"Unknown topic {topic!r}")
+        if fields is None:
+            subscription[topic] = None
+            continue
+        if (not isinstance(fields, list) or not fields or len(fields) > MAX_PROJECTION_FIELDS
+                or not all(isinstance(field, str) and field for field in fields)):
+            raise ValueError(f"Fields for {topic} must be a non-empty list of names")
+        subscription[topic] = tuple(sorted(set(fields)))
+    return subscription
+
+def topic_room(scope, topic, fields):
+    return f"topic:{scope}:{topic}:{'*' if fields is None else ','.join(fields)}"
+
+def _project_record(record, fields):
+    if not isinstance(record, dict):
+        return record
+    return {key: record[key] for key in fields if key in record}
+
+def project(topic, payload, fields):
+    """The part of a payload a projection renders.
+
+    stars payloads are projected on their own keys. For the other topics the
+    fields select keys of each character record (party members, the selected
+    or changed characters); bookkeeping keys like version are always kept.
+    """
+    if fields is None:
+        return payload
+    if topic == 'stars':
+        return {key: value for key, value in payload.items() if key in fields}
+    projected = dict(payload)
+    for key in ('party', 'added', 'changed'):
+        if isinstance(projected.get(key), list):
+            projected[key] = [_project_record(record, fields) for record in projected[key]]
+    if 'character' in projected:
+        projected['character'] = _project_record(projected['character'], fields)
+    if 'recruitment_info' in projected and 'recruitment_info' not in fields:
+        del projected['recruitment_info']
+    return projected
+
+class TopicGroups:
+    """Clients grouped by (scope, topic, projection)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._groups = {}  # (scope, topic) -> {fields: set of sids}
+        self._clients = {}  # sid -> (channel id, subscription)
+
+    def subscription(self, sid):
+        with self._lock:
+            entry = self._clients.get(sid)
+            return dict(entry[1]) if entry else None
+
+    def assign(self, sid, channel_id, subscription):
+        """Set a client's channel and subscription. Returns (rooms to leave, rooms to join)."""
+        with self._lock:
+            old_rooms = self._remove_locked(sid)
+            new_rooms = set()
+            for topic, fields in subscription.items():
+                scope = topic_scope(topic, channel_id)
+                self._groups.setdefault((scope, topic), {}).setdefault(fields, set()).add(sid)
+                new_rooms.add(topic_room(scope, topic, fields))
+            self._clients[sid] = (channel_id, dict(subscription))
+            return old_rooms - new_rooms, new_rooms - old_rooms
+
+    def remove(self, sid):
+        """Forget a client. Returns the rooms it was in."""
+        with self._lock:
+            return self._remove_locked(sid)
+
+    def _remove_locked(self, sid):
+        entry = self._clients.pop(sid, None)
+        if entry is None:
+            return set()
+        channel_id, subscription = entry
+        rooms = set()
+        for topic, fields in subscription.items():
+            scope = topic_scope(topic, channel_id)
+            groups = self._groups.get((scope, topic), {})
+            members = groups.get(fields)
+            if members is not None:
+                members.discard(sid)
+                if not members:
+                    del groups[fields]
+            rooms.add(topic_room(scope, topic, fields))
+        return rooms
+
+    def projections(self, scope, topic):
+        """Projections of the groups that currently have members"""
+        with self._lock:
+            return list(self._groups.get((scope, topic), {}))
+
+    def counts(self):
+        """Member count per (scope, topic, projection) group"""
+        with self._lock:
+            return {topic_room(scope, topic, fields): len(members)
+                    for (scope, topic), groups in self._groups.items()
+                    for fields, members in groups.items()}
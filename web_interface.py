@@ -7,59 +7,174 @@ Flask web server with SocketIO for real-time updates.
 import os
 import json
 import time
+import inspect
 import logging
 import threading
+import functools
 from pathlib import Path
-from flask import Flask, render_template, send_from_directory, jsonify, request
-from flask_socketio import SocketIO, emit
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('web_interface.log')
-    ]
-)
+from flask import Flask, render_template, send_from_directory, jsonify, request, g, Response
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from metrics import MetricsRegistry
+from log_config import setup_logging, set_logger_level, get_logger_levels
+from star_bitset import StarBitset
+from progress_store import ProgressJournal
+from session_timeline import SessionTimeline, apply_event, copy_state, serialize_state
+from search_index import SearchIndex, split_name_role
+from profiles import ProfileIndex, ProfileCache
+from throttle import RateLimiter, Coalescer
+from assets import AssetPipeline
+from data_watcher import FileWatcher
+from merge_character_data import IncrementalMerger, load_source_data, save_processed_data
+from event_stream import encode_event
+from control_socket import ControlServer, CommandError, DEFAULT_ADDRESS as DEFAULT_CONTROL_ADDRESS
+from party_random import RandomPartyEngine, load_roles, new_seed
+from party_strip import PartyStripRenderer, FORMATS as PARTY_IMAGE_FORMATS, LAYOUTS as PARTY_IMAGE_LAYOUTS
+from channels import Channel, ChannelError, DEFAULT_CHANNEL, MAX_CHANNELS, valid_channel_id, channel_data_dir
+from topics import TopicGroups, DEFAULT_SUBSCRIPTION, ROSTER_SCOPE, normalize_subscription, project, topic_room
+
+# Set up logging (records are queued and written by a background listener) only
+# when serving: here, or in the launcher's web child before it imports this module.
+# Importing it (tools, tests) writes no log file. With the debug reloader the
+# watcher process runs this as __main__ too; only the serving child writes
+# web_interface.log, so the two never rotate it at once.
+if __name__ == '__main__':
+    setup_logging('web_interface.log' if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' else None)
 logger = logging.getLogger('suikoden_web')
 
 # Create Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'suikoden_display_secret_key'
+# Add Server-Timing/X-Response-Time headers to every HTTP response when enabled
+app.config['TIMING_HEADER'] = os.environ.get('SUIKODEN_TIMING_HEADER', '0') == '1'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
 # Initialize state
 all_characters = []
-current_party = [None] * 6
+character_index = {}  # Lower-cased name -> character, for O(1) lookups
 connected_clients = set()  # Track connected clients for broadcasting
+client_channels = {}  # sid -> id of the channel (Socket.IO room) the client has joined
 
-# Global lock for thread safety when updating party data
-import threading
-party_lock = threading.Lock()
+# Party, progress and timeline state lives per channel (see channels.py), each with its own locks
+channels = {}  # channel id -> Channel, for the active profile
+channels_lock = threading.Lock()  # Guards opening channels, not their state
+
+# Topic subscriptions: clients grouped by (channel, topic, projection), one room per group
+topic_groups = TopicGroups()
+
+PARTY_SIZE = 6
+PARTY_BATCH_OPERATIONS = ('add', 'remove', 'move', 'clear')
+
+# Metrics registry (exposed on /metrics in Prometheus text format)
+metrics = MetricsRegistry()
+socketio_events_total = metrics.counter(
+    'suikoden_socketio_events_total', 'Socket.IO events received, by event name', ['event'])
+socketio_handler_seconds = metrics.histogram(
+    'suikoden_socketio_handler_seconds', 'Socket.IO handler latency in seconds', ['event'])
+socketio_handler_errors_total = metrics.counter(
+    'suikoden_socketio_handler_errors_total', 'Socket.IO handlers that raised, by event name', ['event'])
+save_party_seconds = metrics.histogram(
+    'suikoden_save_party_seconds', 'Duration of save_party_data in seconds')
+connected_clients_gauge = metrics.gauge(
+    'suikoden_connected_clients', 'Currently connected Socket.IO clients',
+    callback=lambda: len(connected_clients))
+image_requests_total = metrics.counter(
+    'suikoden_image_requests_total', 'Character image requests, by result (hit/miss)', ['result'])
+http_requests_total = metrics.counter(
+    'suikoden_http_requests_total', 'HTTP requests, by endpoint and status', ['endpoint', 'status'])
+http_request_seconds = metrics.histogram(
+    'suikoden_http_request_seconds', 'HTTP request latency in seconds', ['endpoint'])
+http_bytes_sent_total = metrics.counter(
+    'suikoden_http_bytes_sent_total', 'HTTP response bytes sent, by endpoint', ['endpoint'])
+throttled_events_total = metrics.counter(
+    'suikoden_throttled_events_total', 'Mutations rejected by the per-client rate limiter, by event', ['event'])
+sse_clients = 0  # Open /stream/party connections
+sse_clients_gauge = metrics.gauge(
+    'suikoden_sse_clients', 'Open Server-Sent Events overlay streams', callback=lambda: sse_clients)
+coalesced_updates_total = metrics.counter(
+    'suikoden_coalesced_party_updates_total', 'Party changes merged into another save/broadcast')
+channel_clients_gauge = metrics.gauge(
+    'suikoden_channel_clients', 'Socket.IO clients joined to each channel', ['channel'])
+open_channels_gauge = metrics.gauge(
+    'suikoden_open_channels', 'Channels with state loaded', callback=lambda: len(channels))
+topic_payloads_total = metrics.counter(
+    'suikoden_topic_payloads_total', 'Payloads serialized for topic subscribers (one per projection group)', ['topic'])
+control_commands_total = metrics.counter(
+    'suikoden_control_commands_total', 'Control socket commands, by command and result (ok/err)', ['command', 'result'])
+
+# Per-client token buckets for mutating events (sustained rate per second, burst size)
+RATE_LIMIT = float(os.environ.get('SUIKODEN_RATE_LIMIT', '10'))
+RATE_BURST = float(os.environ.get('SUIKODEN_RATE_BURST', '20'))
+rate_limiter = RateLimiter(RATE_LIMIT, RATE_BURST)
+
+def publish(scope, topic, event, payload, skip_sid=None):
+    """Send an update to every subscriber of topic in scope, projected and serialized once per group"""
+    for fields in topic_groups.projections(scope, topic):
+        topic_payloads_total.inc(topic=topic)
+        socketio.emit(event, project(topic, payload, fields), to=topic_room(scope, topic, fields), skip_sid=skip_sid)
+
+def instrument_event(event_name):
+    """Decorator that counts and times a Socket.IO event handler."""
+    def decorator(handler):
+        # Flask-SocketIO passes extra arguments (auth, reason) some handlers don't accept
+        param_count = len(inspect.signature(handler).parameters)
+
+        @functools.wraps(handler)
+        def wrapper(*args):
+            socketio_events_total.inc(event=event_name)
+            start = time.perf_counter()
+            try:
+                return handler(*args[:param_count])
+            except Exception:
+                socketio_handler_errors_total.inc(event=event_name)
+                raise
+            finally:
+                socketio_handler_seconds.observe(time.perf_counter() - start, event=event_name)
+        return wrapper
+    return decorator
+
+def rate_limited(event_name):
+    """Decorator that drops a client's mutation when its token bucket for event_name is empty."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args):
+            allowed, retry_after = rate_limiter.allow(request.sid, event_name)
+            if not allowed:
+                throttled_events_total.inc(event=event_name)
+                emit('rate_limited', {
+                    'event': event_name,
+                    'retry_after': round(retry_after, 3),
+                    'message': 'Too many updates, slow down'
+                })
+                return None
+            return handler(*args)
+        return wrapper
+    return decorator
 
 # Path configurations
 BASE_DIR = Path(__file__).resolve().parent
 STATIC_DIR = BASE_DIR / 'static'
-IMAGES_DIR = BASE_DIR / 'images'
-DATA_DIR = BASE_DIR / 'data'
+# Roster profiles: DATA_DIR and IMAGES_DIR always point at the active profile's directories
+profile_index = ProfileIndex(BASE_DIR)
+active_profile = profile_index.startup_profile()
+IMAGES_DIR = active_profile.image_dir
+DATA_DIR = active_profile.data_dir
 
 # Ensure directories exist
 STATIC_DIR.mkdir(exist_ok=True)
 (STATIC_DIR / 'img').mkdir(exist_ok=True)
 (STATIC_DIR / 'css').mkdir(exist_ok=True)
 (STATIC_DIR / 'js').mkdir(exist_ok=True)
-DATA_DIR.mkdir(exist_ok=True)
+DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 # Function to create an empty party structure
 def create_empty_party():
     return [None] * 6
 
 # Function to create a default party.json file
-def create_default_party_file():
+def create_default_party_file(data_dir):
     try:
         empty_party = create_empty_party()
-        with open(DATA_DIR / 'party.json', 'w', encoding='utf-8') as f:
+        with open(data_dir / 'party.json', 'w', encoding='utf-8') as f:
             json.dump(empty_party, f, ensure_ascii=False, indent=2)
         logger.info("Created default party.json file")
         return empty_party
@@ -126,32 +241,275 @@ def load_character_data():
         # Use sample data if all attempts fail
         return sample_characters
 
+def build_character_index(characters):
+    """Build a case-insensitive name -> character lookup table"""
+    return {c['name'].lower(): c for c in characters if isinstance(c, dict) and 'name' in c}
+
+def find_character(name):
+    """Look up a character by name (case-insensitive)"""
+    if not isinstance(name, str):
+        return None
+    return character_index.get(name.lower())
+
+def character_roles(c):
+    """Roles a character can fill: the "(Role)" in its name plus any role/roles fields"""
+    _, role = split_name_role(c['name'])
+    return [r for r in [role, c.get('role')] + list(c.get('roles') or []) if r]
+
+def index_character(index, c):
+    """Add (or re-index) one character in a search index"""
+    index.add(c.get('id', c['name']), c['name'], character_roles(c), c.get('recruitment_info', ''),
+              image_url=c.get('image_url'))
+
+def build_search_index(characters):
+    """Build the full-text index over names, roles and recruitment info"""
+    index = SearchIndex()
+    for c in characters:
+        if isinstance(c, dict) and 'name' in c:
+            index_character(index, c)
+    return index
+
 # Load character data
 all_characters = load_character_data()
+character_index = build_character_index(all_characters)
+search_index = build_search_index(all_characters)
 
-# Try to load party data
-try:
-    party_file = DATA_DIR / 'party.json'
-    if not party_file.exists():
-        logger.info("Party file doesn't exist, creating default party.json")
-        current_party = create_default_party_file()
-    else:
+# Recruited-stars state: one bit per character id in each channel, persisted by name in the channel's journal
+characters_by_id = {}
+
+def build_characters_by_id():
+    global characters_by_id
+    characters_by_id = {c['id']: c for c in all_characters if isinstance(c.get('id'), int) and c['id'] > 0}
+
+def _build_star_state(channel):
+    """Size a channel's bitset for the loaded roster and restore its saved progress. Caller holds its stars_lock."""
+    channel.star_bitset = StarBitset(max(characters_by_id, default=0))
+    for name, recruited in channel.stars_store.load().items():
+        character = find_character(name)
+        if recruited and character and character.get('id') in characters_by_id:
+            channel.star_bitset.set(character['id'], True)
+    logger.info(f"Recruitment progress in {channel.id}: {channel.star_bitset.count}/{len(characters_by_id)} recruited")
+
+def reset_star_state(channel):
+    with channel.stars_lock:
+        _build_star_state(channel)
+
+build_characters_by_id()
+
+# Hot reload: the merge inputs are polled and re-merged incrementally on change
+character_merger = IncrementalMerger(all_characters)
+HOT_RELOAD_ENABLED = os.environ.get('SUIKODEN_HOT_RELOAD', '1') == '1'
+
+def apply_character_diff(processed, diff):
+    """Update the roster, lookups, search index and every channel's bitset for just the changed characters"""
+    all_characters[:] = processed
+    removed_ids = []
+    for name in diff['removed']:
+        character = character_index.pop(name.lower(), None)
+        if character is None:
+            continue
+        search_index.remove(character.get('id', name))
+        if characters_by_id.pop(character.get('id'), None) is not None:
+            removed_ids.append(character['id'])
+    for character in diff['added'] + diff['changed']:
+        character_index[character['name'].lower()] = character
+        index_character(search_index, character)
+        characters_by_id[character['id']] = character
+    size = max(characters_by_id, default=0)
+    for channel in list(channels.values()):
+        with channel.stars_lock:
+            for character_id in removed_ids:
+                if character_id <= channel.star_bitset.size:
+                    channel.star_bitset.set(character_id, False)
+            if size > channel.star_bitset.size:
+                channel.star_bitset.resize(size)
+
+def reload_character_data():
+    """Re-merge characters.json/recruitment.json and push only the changed entries. Returns the diff."""
+    try:
+        characters_data, recruitment_data = load_source_data(DATA_DIR)
+    except (OSError, ValueError) as e:
+        # Mid-edit or invalid JSON: keep serving the current data
+        logger.error(f"Not reloading character data: {e}")
+        return None
+    processed, diff = character_merger.merge(characters_data, recruitment_data)
+    if not any(diff.values()):
+        return diff
+    save_processed_data(processed, DATA_DIR)
+    apply_character_diff(processed, diff)
+    publish(ROSTER_SCOPE, 'roster', 'characters_patch', diff)
+    logger.info(f"Reloaded character data: {len(diff['added'])} added, "
+                f"{len(diff['changed'])} changed, {len(diff['removed'])} removed")
+    return diff
+
+def watch_profile_data():
+    """Start polling the active profile's merge inputs"""
+    watcher = FileWatcher([DATA_DIR / 'characters.json', DATA_DIR / 'recruitment.json'],
+                          callback=lambda changed: reload_character_data())
+    if HOT_RELOAD_ENABLED:
+        watcher.start()
+    return watcher
+
+data_watcher = watch_profile_data()
+
+def load_party_data(data_dir):
+    """Load a channel's party.json"""
+    try:
+        party_file = data_dir / 'party.json'
+        if not party_file.exists():
+            logger.info("Party file doesn't exist, creating default party.json")
+            return create_default_party_file(data_dir)
         with open(party_file, 'r', encoding='utf-8') as f:
-            current_party = json.load(f)
-        logger.info(f"Loaded party data: {len([p for p in current_party if p])} members")
-except Exception as e:
-    logger.warning(f"Failed to load party data, using empty party: {e}")
-    current_party = create_empty_party()
+            party = json.load(f)
+        # Slots that aren't character records (hand edits, older bad saves) load as empty
+        party = [member if isinstance(member, dict) and member.get('name') else None for member in party[:PARTY_SIZE]]
+        party += [None] * (PARTY_SIZE - len(party))
+        logger.info(f"Loaded party data: {len([p for p in party if p])} members")
+        return party
+    except Exception as e:
+        logger.warning(f"Failed to load party data, using empty party: {e}")
+        return create_empty_party()
+
+# Session timeline (per channel): every party and recruitment mutation, with snapshots for replay
+TIMELINE_EVENT_TYPES = {'full_update': 'external'}
+
+def member_name(member):
+    """What the timeline keeps for a party slot: the character's name (records are looked up on replay)"""
+    return member.get('name') if isinstance(member, dict) else None
+
+def timeline_member(name):
+    """A timeline party name as the character record clients render"""
+    return find_character(name) or {'name': name}
+active_replays = {}  # sid -> threading.Event used to stop that client's replay
+
+# Read-only overlay streams: compact party/progress events kept in a ring buffer for resume.
+# Kept per channel id (not per Channel) so viewers survive a profile switch.
+overlay_streams = {}
+SSE_KEEPALIVE_SECONDS = 15
+
+# Per-request timing for metrics and the optional timing header
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.endpoint or 'unknown'
+    start = getattr(g, 'request_start', None)
+    if start is not None:
+        elapsed = time.perf_counter() - start
+        http_request_seconds.observe(elapsed, endpoint=endpoint)
+        if app.config['TIMING_HEADER']:
+            response.headers['Server-Timing'] = f"app;dur={elapsed * 1000:.2f}"
+            response.headers['X-Response-Time'] = f"{elapsed * 1000:.2f}ms"
+    http_requests_total.inc(endpoint=endpoint, status=response.status_code)
+    if response.content_length:
+        http_bytes_sent_total.inc(response.content_length, endpoint=endpoint)
+    return response
+
+# Route for Prometheus metrics
+@app.route('/metrics')
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# Liveness check polled by the launcher's supervisor
+@app.route('/healthz')
+def healthz():
+    return jsonify({"status": "ok"})
+
+# API route to read or change logger levels at runtime
+@app.route('/api/logging', methods=['GET', 'POST'])
+def logging_levels():
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        name = data.get('logger', 'root')
+        try:
+            level = set_logger_level(name, data.get('level', 'INFO'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        logger.info(f"Log level for {name} set to {level}")
+    return jsonify({"levels": get_logger_levels()})
+
+# Unknown or invalid ?channel= on any HTTP route
+@app.errorhandler(ChannelError)
+def channel_error(e):
+    return jsonify({"error": str(e)}), 404
+
+def request_channel():
+    """The channel named by ?channel= (the default channel when absent). Raises ChannelError."""
+    return get_channel(request.args.get('channel', DEFAULT_CHANNEL))
+
+def client_channel():
+    """The channel the current Socket.IO client has joined"""
+    return get_channel(client_channels.get(request.sid, DEFAULT_CHANNEL))
+
+def _stars_payload(channel):
+    return {
+        'bitmap': channel.star_bitset.to_base64(),
+        'width': channel.star_bitset.size,
+        'recruited_count': channel.star_bitset.count,
+        'total': len(characters_by_id)
+    }
+
+def stars_snapshot(channel):
+    """Full recruitment state: the whole bitmap plus the recruited counter"""
+    with channel.stars_lock:
+        return _stars_payload(channel)
+
+def set_star_recruited(channel, character, recruited=None):
+    """Set (or toggle when recruited is None) a character's recruited bit in a channel.
+
+    Persists and broadcasts a single-bit flip to the channel's room. Returns
+    the flip payload, or None if the bit was already in the requested state.
+    """
+    character_id = character['id']
+    with channel.stars_lock:
+        if recruited is None:
+            recruited = channel.star_bitset.flip(character_id)
+        elif not channel.star_bitset.set(character_id, recruited):
+            return None
+        channel.stars_store.record(character['name'], recruited)
+        flip = {
+            'id': character_id,
+            'recruited': bool(recruited),
+            'recruited_count': channel.star_bitset.count,
+            'total': len(characters_by_id)
+        }
+        channel.timeline.record('recruit', {'id': character_id, 'name': character['name'], 'recruited': bool(recruited)})
+        publish(channel.id, 'stars', 'stars_updated', flip)
+        channel.events.publish('star', flip)
+    logger.info(f"{character['name']} marked as {'recruited' if recruited else 'not recruited'} "
+                f"in {channel.id} ({flip['recruited_count']}/{flip['total']})")
+    return flip
+
+# API route to get recruitment progress
+@app.route('/api/stars', methods=['GET'])
+def get_stars():
+    channel = request_channel()
+    snapshot = stars_snapshot(channel)
+    if request.args.get('names') == '1':
+        with channel.stars_lock:
+            snapshot['recruited'] = [characters_by_id[i]['name'] for i in channel.star_bitset.recruited_ids()
+                                     if i in characters_by_id]
+    return jsonify(snapshot)
 
 # Route for the main page
 @app.route('/')
 def index():
     try:
-        return render_template('index.html')
+        return serve_page('index.html')
     except Exception as e:
         logger.error(f"Error rendering index template: {e}")
         return "Error loading page. Check logs for details.", 500
 
+# Fingerprinted CSS/JS: the URL changes with the content, so it can be cached forever
+@app.route('/assets/<path:filename>')
+def send_asset(filename):
+    asset = asset_pipeline.get(filename)
+    if asset is None:
+        return jsonify({"error": "Asset not found"}), 404
+    return asset_response(asset, 'public, max-age=31536000, immutable')
+
 # Route for static files (fallback)
 @app.route('/static/<path:path>')
 def send_static(path):
@@ -161,11 +519,15 @@ def send_static(path):
 @app.route('/static/img/<path:filename>')
 def send_image(filename):
     # Check both static/img and images directories
-    if os.path.exists(os.path.join('static', 'img', filename)):
+    # The active profile's images win, so rosters sharing file names don't mix portraits
+    if os.path.exists(IMAGES_DIR / filename):
+        image_requests_total.inc(result='hit')
+        return send_from_directory(IMAGES_DIR, filename)
+    elif os.path.exists(os.path.join('static', 'img', filename)):
+        image_requests_total.inc(result='hit')
         return send_from_directory(os.path.join('static', 'img'), filename)
-    elif os.path.exists(os.path.join('images', filename)):
-        return send_from_directory('images', filename)
     else:
+        image_requests_total.inc(result='miss')
         return send_from_directory(os.path.join('static', 'img'), 'placeholder.png')
 
 # API route to get all characters
@@ -176,14 +538,113 @@ def get_characters():
 # API route to get current party
 @app.route('/api/party', methods=['GET'])
 def get_party():
-    return jsonify({"party": current_party})
+    channel = request_channel()
+    with channel.lock:
+        return jsonify({"party": channel.party, "version": channel.version, "slot_versions": channel.slot_versions})
+
+# API route for the party as a single image (/api/party/image.png?layout=row|grid)
+@app.route('/api/party/image.<fmt>', methods=['GET'])
+def get_party_image(fmt):
+    layout = request.args.get('layout', 'row')
+    if fmt not in PARTY_IMAGE_FORMATS or layout not in PARTY_IMAGE_LAYOUTS:
+        return jsonify({"error": "Unsupported format or layout"}), 400
+    channel = request_channel()
+    try:
+        etag, data = channel_strip(channel).get(fmt, layout)
+    except Exception as e:
+        logger.error(f"Error rendering party image: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+    response = Response(data, mimetype=PARTY_IMAGE_FORMATS[fmt][1])
+    response.set_etag(etag)
+    # Pollers always revalidate; unchanged parties cost a 304 with no body
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def channel_strip(channel):
+    """The channel's composited party image for OBS image sources, rendered in the background once requested"""
+    with channel.lock:
+        if channel.strip is None:
+            channel.strip = PartyStripRenderer([IMAGES_DIR, STATIC_DIR / 'img'], IMAGES_DIR / 'Rune')
+            channel.strip.update(channel.version, channel.party)
+            channel.strip.start()
+        return channel.strip
+
+def compact_party(channel):
+    """Just what an overlay draws: name and image for each slot"""
+    with channel.lock:
+        # Anything that isn't a character record (e.g. from an old party.json) shows as an empty slot
+        return [{'name': member.get('name'), 'image_url': member.get('image_url')} if isinstance(member, dict) else None
+                for member in channel.party]
+
+def overlay_snapshot_frame(channel):
+    """A 'snapshot' event with the full party and progress, for new or lagging viewers"""
+    event_id = channel.events.last_id  # Read first: replaying later events onto the snapshot is harmless
+    with channel.lock:
+        snapshot = {'version': channel.version, 'party': compact_party(channel)}
+    stars = stars_snapshot(channel)
+    snapshot['recruited_count'] = stars['recruited_count']
+    snapshot['total'] = stars['total']
+    return event_id, encode_event(channel.events.format_id(event_id), 'snapshot', snapshot)
+
+# Server-Sent Events stream of party and progress changes for read-only overlays
+@app.route('/stream/party')
+def stream_party():
+    channel = request_channel()
+    # Ids from another epoch (before a restart) or malformed ones get a snapshot
+    last_id = channel.events.parse_id(request.headers.get('Last-Event-ID', request.args.get('last_event_id')))
+
+    def generate(last_id):
+        global sse_clients
+        sse_clients += 1
+        try:
+            yield b"retry: 2000\n\n"
+            frames = channel.events.since(last_id) if last_id is not None else None
+            while True:
+                if frames is None:
+                    # New viewer, or resumed from an id the ring buffer no longer holds
+                    last_id, frame = overlay_snapshot_frame(get_channel(channel.id))
+                    yield frame
+                elif frames:
+                    last_id += len(frames)
+                    yield b"".join(frames)
+                else:
+                    yield b": keepalive\n\n"
+                frames = channel.events.wait(last_id, SSE_KEEPALIVE_SECONDS)
+        finally:
+            sse_clients -= 1
+
+    response = Response(generate(last_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Lightweight overlay page driven by /stream/party (no Socket.IO, no CDN)
+@app.route('/overlay')
+def overlay():
+    return serve_page('overlay.html')
+
+# API route for ranked full-text search over names, roles and recruitment info
+@app.route('/api/search', methods=['GET'])
+def search_characters():
+    query = request.args.get('q', '')
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 200)
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    start = time.perf_counter()
+    results = search_index.search(query, limit=limit, prefix=request.args.get('prefix', '1') != '0')
+    return jsonify({
+        "query": query,
+        "results": results,
+        "elapsed_us": round((time.perf_counter() - start) * 1e6, 1)
+    })
 
 # API route to get character details
 @app.route('/api/character/<name>', methods=['GET'])
 def get_character(name):
     # Improved character lookup with better error handling
     try:
-        character = next((c for c in all_characters if c['name'].lower() == name.lower()), None)
+        character = find_character(name)
         if character:
             return jsonify(character)
         return jsonify({"error": "Character not found"}), 404
@@ -193,31 +654,146 @@ def get_character(name):
 
 # Socket.IO event: client connection
 @socketio.on('connect')
+@instrument_event('connect')
 def handle_connect():
     client_id = request.sid
-    logger.info(f"Client connected: {client_id}")
+    # Clients pick their channel with ?channel= on the Socket.IO URL
+    try:
+        channel = get_channel(request.args.get('channel') or DEFAULT_CHANNEL)
+    except ChannelError as e:
+        logger.warning(f"Refused client {client_id}: {e}")
+        raise ConnectionRefusedError(str(e))
+    logger.info(f"Client connected: {client_id} (channel {channel.id})")
     connected_clients.add(client_id)
-    emit('server_info', {'message': 'Connected to Suikoden Display server'})
+    join_channel(client_id, channel)
+    emit('server_info', {'message': f'Connected to Suikoden Display server (channel {channel.id})'})
+
+def join_channel(sid, channel):
+    """Move a client into a channel's room (and its topic groups), leaving the ones it was in"""
+    previous = channels.get(client_channels.get(sid))
+    if previous is not None:
+        previous.clients.discard(sid)
+        leave_room(previous.room, sid=sid)
+        channel_clients_gauge.set(len(previous.clients), channel=previous.id)
+    join_room(channel.room, sid=sid)
+    channel.clients.add(sid)
+    client_channels[sid] = channel.id
+    channel_clients_gauge.set(len(channel.clients), channel=channel.id)
+    subscribe_client(sid, channel.id, topic_groups.subscription(sid) or DEFAULT_SUBSCRIPTION)
+
+def subscribe_client(sid, channel_id, subscription):
+    """Put a client in the topic group rooms for its subscription"""
+    leave, join = topic_groups.assign(sid, channel_id, subscription)
+    for room in leave:
+        leave_room(room, sid=sid)
+    for room in join:
+        join_room(room, sid=sid)
+
+# Socket.IO event: choose which topics (and which fields of them) this client receives
+@socketio.on('subscribe')
+@instrument_event('subscribe')
+def handle_subscribe(data):
+    try:
+        subscription = normalize_subscription(data.get('topics') if isinstance(data, dict) else None)
+    except ValueError as e:
+        emit('server_error', {'message': str(e)})
+        return
+    subscribe_client(request.sid, client_channels.get(request.sid, DEFAULT_CHANNEL), subscription)
+    logger.info(f"Client {request.sid} subscribed to {', '.join(subscription) or 'nothing'}")
+    emit('subscribed', {'topics': {topic: list(fields) if fields else None for topic, fields in subscription.items()}})
 
 # Socket.IO event: client disconnection
 @socketio.on('disconnect')
+@instrument_event('disconnect')
 def handle_disconnect():
     client_id = request.sid
     logger.info(f"Client disconnected: {client_id}")
     if client_id in connected_clients:
         connected_clients.remove(client_id)
+    channel = channels.get(client_channels.pop(client_id, None))
+    if channel is not None:
+        channel.clients.discard(client_id)
+        channel_clients_gauge.set(len(channel.clients), channel=channel.id)
+    topic_groups.remove(client_id)
+    rate_limiter.forget(client_id)
+    replay_stop = active_replays.pop(client_id, None)
+    if replay_stop:
+        replay_stop.set()
 
 # Socket.IO event: request initial data
 @socketio.on('request_initial_data')
+@instrument_event('request_initial_data')
 def handle_initial_data():
     logger.info("Sending initial data to client")
-    emit('initial_data', {
-        'characters': all_characters,
-        'party': current_party
-    })
+    emit_initial_data(client_channel())
+
+def emit_initial_data(channel):
+    with channel.lock:
+        emit('initial_data', {
+            'characters': all_characters,
+            'channel': channel.id,
+            'party': channel.party,
+            'version': channel.version,
+            'stars': stars_snapshot(channel)
+        })
+
+# Socket.IO event: move to another channel and receive its state
+@socketio.on('join_channel')
+@instrument_event('join_channel')
+def handle_join_channel(data):
+    try:
+        if not isinstance(data, dict):
+            emit('server_error', {'message': 'Invalid data format'})
+            return
+        channel = get_channel(data.get('channel'))
+        # A running replay belongs to the old channel
+        replay_stop = active_replays.pop(request.sid, None)
+        if replay_stop:
+            replay_stop.set()
+        join_channel(request.sid, channel)
+        logger.info(f"Client {request.sid} joined channel {channel.id}")
+        emit_initial_data(channel)
+    except ChannelError as e:
+        emit('server_error', {'message': str(e)})
+
+# Socket.IO event: request the full recruitment bitmap (resync)
+@socketio.on('request_stars')
+@instrument_event('request_stars')
+def handle_request_stars():
+    emit('stars_updated', stars_snapshot(client_channel()))
+
+# Socket.IO event: mark a star as recruited / not recruited
+@socketio.on('set_star_recruited')
+@instrument_event('set_star_recruited')
+@rate_limited('set_star_recruited')
+def handle_set_star_recruited(data):
+    try:
+        if not isinstance(data, dict):
+            emit('server_error', {'message': 'Invalid data format'})
+            return
+
+        character_id = data.get('character_id')
+        if character_id is not None:
+            character = characters_by_id.get(character_id)
+        else:
+            character = find_character(data.get('character_name'))
+        if not character or character.get('id') not in characters_by_id:
+            emit('server_error', {'message': 'Character not found'})
+            return
+
+        recruited = data.get('recruited')
+        if recruited is not None and not isinstance(recruited, bool):
+            emit('server_error', {'message': 'recruited must be true or false'})
+            return
+
+        set_star_recruited(client_channel(), character, recruited)
+    except Exception as e:
+        logger.error(f"Error updating recruitment: {e}")
+        emit('server_error', {'message': f"Error updating recruitment: {str(e)}"})
 
 # Socket.IO event: select character
 @socketio.on('select_character')
+@instrument_event('select_character')
 def handle_select_character(data):
     try:
         character_name = data.get('character_name')
@@ -229,13 +805,17 @@ def handle_select_character(data):
         logger.info(f"Character selected: {character_name}")
         
         # Find character in list with case-insensitive comparison
-        character = next((c for c in all_characters if c['name'].lower() == character_name.lower()), None)
+        character = find_character(character_name)
         
         if character:
-            emit('character_selected', {
+            selection = {
                 'character': character,
                 'recruitment_info': character.get('recruitment_info', 'No recruitment information available.')
-            })
+            }
+            emit('character_selected', selection)
+            # Character-card overlays in the same channel follow the selection
+            publish(client_channels.get(request.sid, DEFAULT_CHANNEL), 'selection', 'character_selected',
+                    selection, skip_sid=request.sid)
         else:
             logger.warning(f"Character not found: {character_name}")
             emit('server_error', {'message': f"Character {character_name} not found"})
@@ -245,6 +825,8 @@ def handle_select_character(data):
 
 # Socket.IO event: add character to party
 @socketio.on('add_to_party')
+@instrument_event('add_to_party')
+@rate_limited('add_to_party')
 def handle_add_to_party(data):
     try:
         # Input validation
@@ -263,37 +845,33 @@ def handle_add_to_party(data):
             return
             
         # Find character in the available characters list
-        character = next((c for c in all_characters if c['name'].lower() == character_name.lower()), None)
+        character = find_character(character_name)
         
         if not character:
             emit('server_error', {'message': f"Character {character_name} not found"})
             return
             
-        # Add to party
-        current_party[slot] = character
-        
-        # Save party data and check success
-        if save_party_data():
-            # Create updated party information
-            party_update = {
-                'party': current_party,
-                'updated_slot': slot,
-                'action': 'add',
-                'character': character
-            }
-            
-            # Broadcast party update to all clients
-            socketio.emit('party_updated', party_update)
-            logger.info(f"Added {character_name} to party slot {slot}")
-            emit('update_success', {'message': f"{character_name} added to party"})
-        else:
-            emit('server_error', {'message': 'Failed to save party data'})
+        # Add to party, save and broadcast (serialized under the channel's lock)
+        party_update = commit_party_change(
+            client_channel(),
+            [{'op': 'add', 'slot': slot, 'character_name': character_name}],
+            data.get('base_version'),
+            {'updated_slot': slot, 'action': 'add', 'character': character}
+        )
+        logger.info(f"Added {character_name} to party slot {slot}")
+        emit('update_success', {'message': f"{character_name} added to party", 'version': party_update['version']})
+    except PartyConflict as conflict:
+        emit('party_conflict', conflict.payload())
+    except PartyUpdateError as e:
+        emit('server_error', {'message': str(e)})
     except Exception as e:
         logger.error(f"Error adding character to party: {e}")
         emit('server_error', {'message': f"Error adding character: {str(e)}"})
 
 # Socket.IO event: remove character from party
 @socketio.on('remove_from_party')
+@instrument_event('remove_from_party')
+@rate_limited('remove_from_party')
 def handle_remove_from_party(data):
     try:
         # Input validation
@@ -307,35 +885,35 @@ def handle_remove_from_party(data):
             emit('server_error', {'message': 'Invalid party slot'})
             return
             
-        if not current_party[slot]:
-            emit('server_error', {'message': 'No character in that slot'})
-            return
-            
-        character_name = current_party[slot]['name']
-        current_party[slot] = None
-        
-        # Save party data and check success
-        if save_party_data():
-            # Create updated party information
-            party_update = {
-                'party': current_party,
-                'updated_slot': slot,
-                'action': 'remove',
-                'character_name': character_name
-            }
-            
-            # Broadcast party update to all clients
-            socketio.emit('party_updated', party_update)
-            logger.info(f"Removed {character_name} from party slot {slot}")
-            emit('update_success', {'message': f"{character_name} removed from party"})
-        else:
-            emit('server_error', {'message': 'Failed to save party data'})
+        # Hold the lock across the read and the write so the slot cannot change in between
+        channel = client_channel()
+        with channel.lock:
+            check_party_version(channel, data.get('base_version'), [slot])
+            if not channel.party[slot]:
+                emit('server_error', {'message': 'No character in that slot'})
+                return
+                
+            character_name = channel.party[slot]['name']
+            party_update = commit_party_change(
+                channel,
+                [{'op': 'remove', 'slot': slot}],
+                data.get('base_version'),
+                {'updated_slot': slot, 'action': 'remove', 'character_name': character_name}
+            )
+        logger.info(f"Removed {character_name} from party slot {slot}")
+        emit('update_success', {'message': f"{character_name} removed from party", 'version': party_update['version']})
+    except PartyConflict as conflict:
+        emit('party_conflict', conflict.payload())
+    except PartyUpdateError as e:
+        emit('server_error', {'message': str(e)})
     except Exception as e:
         logger.error(f"Error removing character from party: {e}")
         emit('server_error', {'message': f"Error removing character: {str(e)}"})
 
 # Socket.IO event: move character within party
 @socketio.on('move_character')
+@instrument_event('move_character')
+@rate_limited('move_character')
 def handle_move_character(data):
     try:
         # Input validation
@@ -354,58 +932,555 @@ def handle_move_character(data):
             emit('server_error', {'message': 'Invalid party slot'})
             return
             
-        if not current_party[from_slot]:
-            emit('server_error', {'message': 'No character in source slot'})
-            return
-            
-        # Store character being moved
-        character = current_party[from_slot]
-        # Store character being replaced (if any)
-        replaced = current_party[to_slot]
-        
-        # Make the swap
-        current_party[to_slot] = character
-        current_party[from_slot] = replaced
-        
-        # Save party data and check success
-        if save_party_data():
-            # Create updated party information
-            party_update = {
-                'party': current_party,
-                'updated_slots': [from_slot, to_slot],
-                'action': 'move',
-                'character_name': character['name']
-            }
-            
-            # Broadcast party update to all clients
-            socketio.emit('party_updated', party_update)
-            logger.info(f"Moved {character['name']} from slot {from_slot} to slot {to_slot}")
-            emit('update_success', {'message': f"{character['name']} moved to slot {to_slot + 1}"})
-        else:
-            emit('server_error', {'message': 'Failed to save party data'})
+        # Hold the lock across the read and the write so the slots cannot change in between
+        channel = client_channel()
+        with channel.lock:
+            check_party_version(channel, data.get('base_version'), [from_slot, to_slot])
+            if not channel.party[from_slot]:
+                emit('server_error', {'message': 'No character in source slot'})
+                return
+                
+            # Store character being moved (the swap itself is done by the operation)
+            character = channel.party[from_slot]
+            party_update = commit_party_change(
+                channel,
+                [{'op': 'move', 'from_slot': from_slot, 'to_slot': to_slot}],
+                data.get('base_version'),
+                {'updated_slots': [from_slot, to_slot], 'action': 'move', 'character_name': character['name']}
+            )
+        logger.info(f"Moved {character['name']} from slot {from_slot} to slot {to_slot}")
+        emit('update_success', {'message': f"{character['name']} moved to slot {to_slot + 1}", 'version': party_update['version']})
+    except PartyConflict as conflict:
+        emit('party_conflict', conflict.payload())
+    except PartyUpdateError as e:
+        emit('server_error', {'message': str(e)})
     except Exception as e:
         logger.error(f"Error moving character in party: {e}")
         emit('server_error', {'message': f"Error moving character: {str(e)}"})
 
-# Helper function to save party data
-def save_party_data():
+# Helper function to save a channel's party data
+def save_party_data(channel):
+    start = time.perf_counter()
     try:
-        # Use a lock to ensure thread safety
-        with party_lock:
-            with open(DATA_DIR / 'party.json', 'w', encoding='utf-8') as f:
-                json.dump(current_party, f, ensure_ascii=False, indent=2)
-            logger.info("Party data saved successfully")
+        # The channel's lock only: saving one channel never waits on another
+        with channel.lock:
+            with open(channel.data_dir / 'party.json', 'w', encoding='utf-8') as f:
+                json.dump(channel.party, f, ensure_ascii=False, indent=2)
+            logger.info(f"Party data saved successfully ({channel.id})")
             return True
     except Exception as e:
         logger.error(f"Error saving party data: {e}")
         return False
+    finally:
+        save_party_seconds.observe(time.perf_counter() - start)
+
+# Party writes and broadcasts are coalesced: at most one save/broadcast per window
+PARTY_COALESCE_WINDOW = float(os.environ.get('SUIKODEN_COALESCE_MS', '50')) / 1000.0
+
+def _run_later(delay, callback):
+    socketio.sleep(delay)
+    try:
+        callback()
+    except Exception as e:
+        logger.error(f"Error flushing coalesced party changes: {e}")
+
+def _schedule_flush(delay, callback):
+    socketio.start_background_task(_run_later, delay, callback)
+
+def flush_party_changes(channel, slots, updates):
+    """Persist a channel's party once and broadcast one update covering every queued change to its room"""
+    with channel.lock:
+        saved = save_party_data(channel)
+        if not saved:
+            # The in-memory party stays authoritative; the next flush retries the save
+            logger.error("Coalesced party save failed")
+        if updates:
+            # Final state only, described by the last change plus every slot touched
+            party_update = dict(updates[-1])
+            party_update.update({
+                'party': channel.party,
+                'version': channel.version,
+                'changed_slots': sorted(slots)
+            })
+            if len(updates) > 1:
+                party_update['coalesced'] = len(updates)
+                coalesced_updates_total.inc(len(updates) - 1)
+            publish(channel.id, 'party', 'party_updated', party_update)
+        channel.events.publish('party', {'version': channel.version, 'party': compact_party(channel)})
+        return saved
+
+def open_channel(channel_id):
+    """Load a channel's files from the active profile and give it a timeline and coalescer"""
+    channel = Channel(channel_id, channel_data_dir(DATA_DIR, channel_id), PARTY_SIZE)
+    channel.data_dir.mkdir(parents=True, exist_ok=True)
+    channel.party = load_party_data(channel.data_dir)
+    channel.stars_store = ProgressJournal(channel.data_dir, name='web_stars_progress')
+    reset_star_state(channel)
+    channel.timeline = SessionTimeline({'party': [member_name(member) for member in channel.party],
+                                        'stars': set(channel.star_bitset.recruited_ids())})
+    channel.coalescer = Coalescer(PARTY_COALESCE_WINDOW, functools.partial(flush_party_changes, channel), _schedule_flush)
+    channel.events = overlay_streams.setdefault(channel_id, channel.events)
+    return channel
+
+def get_channel(channel_id=DEFAULT_CHANNEL):
+    """An open channel, opened on first use. Raises ChannelError for bad ids or when MAX_CHANNELS are open."""
+    channel = channels.get(channel_id)
+    if channel is not None:
+        return channel
+    if not valid_channel_id(channel_id):
+        raise ChannelError(f"Invalid channel {channel_id!r}")
+    with channels_lock:
+        channel = channels.get(channel_id)
+        if channel is None:
+            if len(channels) >= MAX_CHANNELS:
+                raise ChannelError(f"Too many channels (max {MAX_CHANNELS})")
+            channel = channels[channel_id] = open_channel(channel_id)
+            logger.info(f"Opened channel {channel_id} in {channel.data_dir}")
+        return channel
+
+def close_channel(channel):
+    """Write out pending party changes and release the channel's files and renderer"""
+    with channel.lock:
+        channel.coalescer.flush_pending()
+    channel.stars_store.close()
+    if channel.strip is not None:
+        channel.strip.stop()
+
+get_channel(DEFAULT_CHANNEL)
+
+class PartyUpdateError(ValueError):
+    """A party change was invalid or could not be saved."""
+
+class PartyConflict(Exception):
+    """A party change was based on a stale version of the slots it touches."""
+    def __init__(self, channel, base_version, conflicting_slots):
+        super().__init__(f"Party changed since version {base_version}")
+        self.channel = channel
+        self.base_version = base_version
+        self.conflicting_slots = conflicting_slots
+
+    def payload(self):
+        """Current state sent back with the rejection, so the client can rebase without a resync."""
+        with self.channel.lock:
+            return {
+                'message': str(self),
+                'base_version': self.base_version,
+                'conflicting_slots': self.conflicting_slots,
+                'party': list(self.channel.party),
+                'version': self.channel.version,
+                'slot_versions': list(self.channel.slot_versions)
+            }
+
+def _valid_slot(slot):
+    return isinstance(slot, int) and not isinstance(slot, bool) and 0 <= slot < PARTY_SIZE
+
+def _operation_slots(operation):
+    """Slots an operation reads or writes (used for conflict detection)."""
+    if not isinstance(operation, dict):
+        return []
+    if operation.get('op') == 'clear':
+        return list(range(PARTY_SIZE))
+    if operation.get('op') == 'move':
+        return [s for s in (operation.get('from_slot'), operation.get('to_slot')) if _valid_slot(s)]
+    slot = operation.get('slot')
+    return [slot] if _valid_slot(slot) else []
+
+def check_party_version(channel, base_version, slots):
+    """Reject a change whose base version predates the last write to any slot it touches.
+
+    Clients that don't send a base_version are not checked.
+    """
+    if base_version is None:
+        return
+    if not isinstance(base_version, int) or isinstance(base_version, bool):
+        raise PartyUpdateError("Invalid base_version")
+    with channel.lock:
+        conflicting = sorted({s for s in slots if channel.slot_versions[s] > base_version})
+    if conflicting:
+        raise PartyConflict(channel, base_version, conflicting)
+
+def apply_party_operations(party, operations):
+    """Apply add/remove/move/clear operations to a copy of the party.
+
+    Returns (new_party, updated_slots). Raises PartyUpdateError describing the
+    first invalid operation, in which case nothing has been changed.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise PartyUpdateError("Operations must be a non-empty list")
+
+    new_party = list(party)
+    updated_slots = set()
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise PartyUpdateError(f"Operation {index} is not an object")
+        op = operation.get('op')
+        if op not in PARTY_BATCH_OPERATIONS:
+            raise PartyUpdateError(f"Operation {index} has unknown op {op!r}")
+
+        if op == 'add':
+            slot = operation.get('slot')
+            if not _valid_slot(slot):
+                raise PartyUpdateError(f"Operation {index}: invalid party slot")
+            character = find_character(operation.get('character_name'))
+            if not character:
+                raise PartyUpdateError(f"Operation {index}: character {operation.get('character_name')} not found")
+            new_party[slot] = character
+            updated_slots.add(slot)
+        elif op == 'remove':
+            slot = operation.get('slot')
+            if not _valid_slot(slot):
+                raise PartyUpdateError(f"Operation {index}: invalid party slot")
+            if not new_party[slot]:
+                raise PartyUpdateError(f"Operation {index}: no character in slot {slot}")
+            new_party[slot] = None
+            updated_slots.add(slot)
+        elif op == 'move':
+            from_slot = operation.get('from_slot')
+            to_slot = operation.get('to_slot')
+            if not _valid_slot(from_slot) or not _valid_slot(to_slot):
+                raise PartyUpdateError(f"Operation {index}: invalid party slot")
+            if not new_party[from_slot]:
+                raise PartyUpdateError(f"Operation {index}: no character in source slot")
+            new_party[from_slot], new_party[to_slot] = new_party[to_slot], new_party[from_slot]
+            updated_slots.update((from_slot, to_slot))
+        elif op == 'clear':
+            for slot in range(PARTY_SIZE):
+                if new_party[slot]:
+                    new_party[slot] = None
+                    updated_slots.add(slot)
+
+    return new_party, sorted(updated_slots)
+
+def _commit_new_party(channel, new_party, updated_slots, update_fields, broadcast=True, record_history=True):
+    """Swap in a channel's new_party, bump versions, then persist and broadcast through its coalescer.
+
+    Caller holds channel.lock. Versions, history and the timeline update
+    immediately so compare-and-set stays exact; the save and broadcast may be
+    merged with other changes made within PARTY_COALESCE_WINDOW.
+    """
+    if record_history:
+        channel.history.record({slot: (channel.party[slot], new_party[slot]) for slot in updated_slots})
+    channel.party[:] = new_party
+    channel.version += 1
+    for slot in updated_slots:
+        channel.slot_versions[slot] = channel.version
+
+    action = update_fields.get('action', 'update')
+    channel.timeline.record(TIMELINE_EVENT_TYPES.get(action, action), {
+        'slots': {slot: member_name(channel.party[slot]) for slot in updated_slots},
+        'version': channel.version
+    })
+
+    if channel.strip is not None:
+        channel.strip.update(channel.version, channel.party)
+
+    party_update = dict(update_fields)
+    party_update.update({
+        'party': channel.party,
+        'version': channel.version,
+        'changed_slots': list(updated_slots)
+    })
+    # Flushed now unless a flush happened within the window; False means the save failed
+    if channel.coalescer.submit(updated_slots, party_update if broadcast else None) is False:
+        raise PartyUpdateError('Failed to save party data')
+    return party_update
+
+def commit_party_change(channel, operations, base_version=None, update_fields=None):
+    """Check the base version, validate and apply operations, then persist and broadcast once.
+
+    The whole read-modify-write runs under the channel's lock. Raises PartyConflict
+    for stale writes and PartyUpdateError for invalid operations or failed saves.
+    """
+    with channel.lock:
+        if isinstance(operations, list):
+            touched = [slot for operation in operations for slot in _operation_slots(operation)]
+            check_party_version(channel, base_version, touched)
+        new_party, updated_slots = apply_party_operations(channel.party, operations)
+        return _commit_new_party(channel, new_party, updated_slots, update_fields or {})
+
+def step_party_history(channel, direction):
+    """Undo or redo the channel's last party edit as one committed change"""
+    with channel.lock:
+        slots = channel.history.undo() if direction == 'undo' else channel.history.redo()
+        if slots is None:
+            raise PartyUpdateError(f"Nothing to {direction}")
+        new_party = list(channel.party)
+        for slot, member in slots.items():
+            new_party[slot] = member
+        party_update = _commit_new_party(channel, new_party, sorted(slots), {
+            'action': direction,
+            'history': channel.history.info()
+        }, record_history=False)
+    logger.info(f"{direction.capitalize()} in {channel.id} (slots {party_update['changed_slots']})")
+    return party_update
+
+def commit_party_batch(channel, operations, base_version=None):
+    """Apply a batch of operations to a channel's party as one transaction"""
+    party_update = commit_party_change(channel, operations, base_version, {
+        'action': 'batch',
+        'operation_count': len(operations)
+    })
+    logger.info(f"Applied party batch of {len(operations)} operations in {channel.id} (slots {party_update['changed_slots']})")
+    return party_update
+
+# Socket.IO event: apply several party operations as one transaction
+@socketio.on('party_batch')
+@instrument_event('party_batch')
+@rate_limited('party_batch')
+def handle_party_batch(data):
+    try:
+        if not isinstance(data, dict):
+            emit('server_error', {'message': 'Invalid data format'})
+            return
+
+        party_update = commit_party_batch(client_channel(), data.get('operations'), data.get('base_version'))
+        emit('update_success', {
+            'message': f"Party updated ({party_update['operation_count']} operations)",
+            'version': party_update['version']
+        })
+    except PartyConflict as conflict:
+        emit('party_conflict', conflict.payload())
+    except PartyUpdateError as e:
+        emit('server_error', {'message': str(e)})
+    except Exception as e:
+        logger.error(f"Error applying party batch: {e}")
+        emit('server_error', {'message': f"Error applying party batch: {str(e)}"})
+
+# API route to apply several party operations as one transaction
+@app.route('/api/party/batch', methods=['POST'])
+def post_party_batch():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Invalid data format"}), 400
+    channel = request_channel()
+    allowed, retry_after = rate_limiter.allow(request.remote_addr, 'party_batch')
+    if not allowed:
+        throttled_events_total.inc(event='http_party_batch')
+        response = jsonify({"error": "Too many requests", "retry_after": round(retry_after, 3)})
+        response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+        return response, 429
+    try:
+        party_update = commit_party_batch(channel, data.get('operations'), data.get('base_version'))
+    except PartyConflict as conflict:
+        return jsonify(conflict.payload()), 409
+    except PartyUpdateError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error applying party batch: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+    return jsonify({
+        "party": party_update['party'],
+        "updated_slots": party_update['changed_slots'],
+        "version": party_update['version']
+    })
+
+# Socket.IO events: undo / redo the last party edit in the client's channel
+@socketio.on('undo')
+@instrument_event('undo')
+@rate_limited('undo')
+def handle_undo():
+    handle_history_step('undo')
+
+@socketio.on('redo')
+@instrument_event('redo')
+@rate_limited('redo')
+def handle_redo():
+    handle_history_step('redo')
+
+def handle_history_step(direction):
+    try:
+        party_update = step_party_history(client_channel(), direction)
+        emit('update_success', {
+            'message': 'Party change undone' if direction == 'undo' else 'Party change redone',
+            'version': party_update['version']
+        })
+    except PartyUpdateError as e:
+        emit('server_error', {'message': str(e)})
+    except Exception as e:
+        logger.error(f"Error during party {direction}: {e}")
+        emit('server_error', {'message': f"Error during {direction}: {str(e)}"})
+
+# Random parties: one engine per roster, rebuilt when the characters or the profile's roles.json change
+random_engine = None
+random_engine_key = None
+random_engine_lock = threading.Lock()
+
+def get_random_engine():
+    """The random party engine for the current roster and roles"""
+    global random_engine, random_engine_key
+    roles_path = DATA_DIR / 'roles.json'
+    try:
+        roles_mtime = roles_path.stat().st_mtime_ns
+    except OSError:
+        roles_mtime = None
+    characters = list(all_characters)
+    key = (tuple(c['name'] for c in characters), str(roles_path), roles_mtime)
+    with random_engine_lock:
+        if key != random_engine_key:
+            try:
+                roles = load_roles(roles_path)
+            except (OSError, ValueError) as e:
+                logger.error(f"Ignoring roles.json: {e}")
+                roles = {}
+            for c in characters:
+                roles.setdefault(c['name'], set()).update(character_roles(c))
+            random_engine = RandomPartyEngine(key[0], roles)
+            random_engine_key = key
+        return random_engine
+
+def _int_option(options, key, default):
+    value = options.get(key)
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        raise PartyUpdateError(f"{key} must be an integer")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise PartyUpdateError(f"{key} must be an integer")
+
+def _bool_option(options, key):
+    value = options.get(key, False)
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+def draw_random_parties(channel, options):
+    """Draw random parties for a channel under the rules in options (a JSON body or query args).
+
+    Rules: seed, count, recruited_only, roles (list or comma-separated) and
+    no_repeat (nobody from the last K parties). The seed, roster fingerprint
+    and the recent parties the draw excluded are returned with the parties,
+    so anyone can re-draw the same result.
+    """
+    engine = get_random_engine()
+    seed = _int_option(options, 'seed', None)
+    if seed is None:
+        seed = new_seed()
+    count = _int_option(options, 'count', 1)
+    no_repeat = _int_option(options, 'no_repeat', 0)
+    roles = options.get('roles') or []
+    if isinstance(roles, str):
+        roles = [role.strip() for role in roles.split(',') if role.strip()]
+    if not isinstance(roles, list) or not all(isinstance(role, str) for role in roles):
+        raise PartyUpdateError("roles must be a list of role names")
+    recruited_only = _bool_option(options, 'recruited_only')
+
+    eligible = None
+    if recruited_only:
+        with channel.stars_lock:
+            recruited = channel.star_bitset.recruited_ids()
+        eligible = engine.mask_of(characters_by_id[i]['name'] for i in recruited if i in characters_by_id)
+    # A verifier passes back the recent parties from the original response
+    recent = options.get('recent')
+    if not isinstance(recent, list):
+        with channel.lock:
+            recent = [list(party) for party in channel.rerolls]
+    recent = recent[-no_repeat:] if no_repeat > 0 else []
+    try:
+        parties = engine.generate(seed, count, PARTY_SIZE, eligible, roles, no_repeat, recent)
+    except ValueError as e:
+        raise PartyUpdateError(str(e))
+    return {
+        'seed': seed,
+        'roster': engine.fingerprint,
+        'rules': {'recruited_only': recruited_only, 'roles': roles, 'no_repeat': no_repeat},
+        'recent': recent,
+        'parties': parties
+    }
+
+def reroll_party(channel, options):
+    """Draw under the rules in options and commit the first party as one (undoable) change"""
+    with channel.lock:
+        draw = draw_random_parties(channel, options)
+        names = draw['parties'][0]
+        new_party = [find_character(name) for name in names] + [None] * (PARTY_SIZE - len(names))
+        updated_slots = [slot for slot in range(PARTY_SIZE) if channel.party[slot] != new_party[slot]]
+        channel.rerolls.append(names)
+        party_update = _commit_new_party(channel, new_party, updated_slots, {
+            'action': 'random',
+            'seed': draw['seed'],
+            'roster': draw['roster']
+        })
+    logger.info(f"Random party in {channel.id} (seed {draw['seed']}): {', '.join(names)}")
+    return draw, party_update
+
+# API route to draw random parties; POST with "apply": true also sets the first one as the party
+@app.route('/api/party/random', methods=['GET', 'POST'])
+def random_party():
+    if request.method == 'GET':
+        options = request.args
+    else:
+        options = request.get_json(silent=True)
+        if options is None:
+            options = {}
+        if not isinstance(options, dict):
+            return jsonify({"error": "Invalid data format"}), 400
+    channel = request_channel()
+    apply = request.method == 'POST' and _bool_option(options, 'apply')
+    if apply:
+        allowed, retry_after = rate_limiter.allow(request.remote_addr, 'random_party')
+        if not allowed:
+            throttled_events_total.inc(event='http_random_party')
+            response = jsonify({"error": "Too many requests", "retry_after": round(retry_after, 3)})
+            response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+            return response, 429
+    try:
+        if not apply:
+            return jsonify(draw_random_parties(channel, options))
+        draw, party_update = reroll_party(channel, options)
+    except PartyUpdateError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error drawing random party: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+    draw.update({"party": party_update['party'], "version": party_update['version']})
+    return jsonify(draw)
+
+# Socket.IO event: reroll the client's channel party under the given rules
+@socketio.on('random_party')
+@instrument_event('random_party')
+@rate_limited('random_party')
+def handle_random_party(data=None):
+    try:
+        if data is not None and not isinstance(data, dict):
+            emit('server_error', {'message': 'Invalid data format'})
+            return
+        draw, party_update = reroll_party(client_channel(), data or {})
+        emit('update_success', {
+            'message': f"Random party (seed {draw['seed']})",
+            'version': party_update['version']
+        })
+    except PartyUpdateError as e:
+        emit('server_error', {'message': str(e)})
+    except Exception as e:
+        logger.error(f"Error drawing random party: {e}")
+        emit('server_error', {'message': f"Error drawing random party: {str(e)}"})
+
+def resolve_party_entries(entries):
+    """Map client party entries (character objects with a name, or null) to roster characters.
+
+    Raises PartyUpdateError for anything else or for names not in the roster.
+    """
+    party = []
+    for slot, entry in enumerate(entries):
+        if entry is None:
+            party.append(None)
+            continue
+        if not isinstance(entry, dict):
+            raise PartyUpdateError(f"Slot {slot} must be a character or null")
+        character = find_character(entry.get('name'))
+        if character is None:
+            raise PartyUpdateError(f"Character {entry.get('name')} not found")
+        party.append(character)
+    return party
 
 # Add a new Socket.IO event for external party updates
 @socketio.on('external_party_update')
+@instrument_event('external_party_update')
+@rate_limited('external_party_update')
 def handle_external_party_update(data):
     try:
-        global current_party
-        
         # Validate the incoming data
         if not isinstance(data, dict) or 'party' not in data:
             emit('server_error', {'message': 'Invalid party data format'})
@@ -415,28 +1490,545 @@ def handle_external_party_update(data):
         new_party = data['party']
         
         # Validate party length
-        if len(new_party) != 6:
+        if not isinstance(new_party, list) or len(new_party) != 6:
             emit('server_error', {'message': 'Party must have exactly 6 slots'})
             return
             
-        # Update party and save to disk
-        current_party = new_party
-        if save_party_data():
-            # Broadcast to all clients except sender
-            party_update = {
-                'party': current_party,
+        # Every entry must be a known character (or empty); store the roster's record, not the client's
+        new_party = resolve_party_entries(new_party)
+        
+        # Replace the party in place under the lock, then save and broadcast
+        channel = client_channel()
+        with channel.lock:
+            check_party_version(channel, data.get('base_version'), range(PARTY_SIZE))
+            changed_slots = [i for i in range(PARTY_SIZE) if new_party[i] != channel.party[i]]
+            party_update = _commit_new_party(channel, new_party, changed_slots, {
                 'source': 'external',
                 'action': 'full_update'
-            }
-            emit('party_updated', party_update, broadcast=True, include_self=False)
-            emit('update_success', {'message': 'Party updated successfully'})
-            logger.info(f"Party externally updated by {request.sid}")
-        else:
-            emit('server_error', {'message': 'Failed to save party data'})
+            }, broadcast=False)
+        # Broadcast to the rest of the channel
+        publish(channel.id, 'party', 'party_updated', party_update, skip_sid=request.sid)
+        emit('update_success', {'message': 'Party updated successfully', 'version': party_update['version']})
+        logger.info(f"Party externally updated by {request.sid}")
+    except PartyConflict as conflict:
+        emit('party_conflict', conflict.payload())
+    except PartyUpdateError as e:
+        emit('server_error', {'message': str(e)})
     except Exception as e:
         logger.error(f"Error handling external party update: {e}")
         emit('server_error', {'message': str(e)})
 
+# API route to read the session timeline
+@app.route('/api/timeline', methods=['GET'])
+def get_timeline():
+    try:
+        start = float(request.args.get('start', 0))
+        end = float(request.args['end']) if 'end' in request.args else None
+        since = int(request.args.get('since', 0))
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+    except ValueError:
+        return jsonify({"error": "Invalid query parameters"}), 400
+    channel = request_channel()
+    return jsonify({
+        "channel": channel.id,
+        "session": channel.timeline.info(),
+        "events": channel.timeline.events_between(start, end, since_seq=since, limit=limit)
+    })
+
+# API route to rebuild the state at a point in the session
+@app.route('/api/timeline/state', methods=['GET'])
+def get_timeline_state():
+    channel = request_channel()
+    try:
+        t = float(request.args.get('t', channel.timeline.now()))
+    except ValueError:
+        return jsonify({"error": "Invalid time"}), 400
+    state = serialize_state(channel.timeline.state_at(t), timeline_member)
+    state['t'] = t
+    return jsonify(state)
+
+def _replay_sleep(seconds, stop):
+    """Sleep in short steps so a replay can be stopped promptly"""
+    deadline = time.monotonic() + seconds
+    while not stop.is_set():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return True
+        socketio.sleep(min(remaining, 0.1))
+    return False
+
+def run_replay(channel, sid, start, end, speed, broadcast, stop):
+    """Re-stream a channel's session between start and end at speed x (to its room when broadcast)"""
+    target = channel.room if broadcast else sid
+    try:
+        state = channel.timeline.state_at(start)
+        replay_state = serialize_state(state, timeline_member)
+        replay_state.update({'t': start, 'speed': speed})
+        socketio.emit('replay_state', replay_state, to=target)
+
+        previous_t = start
+        for event in channel.timeline.events_between(start, end):
+            if event['t'] <= start:
+                continue  # Already folded into the starting state
+            if not _replay_sleep((event['t'] - previous_t) / speed, stop):
+                break
+            previous_t = event['t']
+            apply_event(state, event)
+            replay_event = serialize_state(state, timeline_member)
+            replay_event['event'] = event
+            socketio.emit('replay_event', replay_event, to=target)
+        else:
+            socketio.emit('replay_finished', {'t': previous_t}, to=target)
+    except Exception as e:
+        logger.error(f"Error replaying session: {e}")
+    finally:
+        if active_replays.get(sid) is stop:
+            active_replays.pop(sid, None)
+
+# Socket.IO event: replay the session (or part of it) at Nx speed
+@socketio.on('replay_session')
+@instrument_event('replay_session')
+def handle_replay_session(data):
+    try:
+        data = data if isinstance(data, dict) else {}
+        start = float(data.get('from', 0))
+        end = float(data['to']) if data.get('to') is not None else None
+        speed = float(data.get('speed', 1))
+        if speed <= 0 or start < 0:
+            emit('server_error', {'message': 'Invalid replay range or speed'})
+            return
+
+        # Only one replay per client; a new request replaces the old one
+        previous = active_replays.pop(request.sid, None)
+        if previous:
+            previous.set()
+        stop = threading.Event()
+        active_replays[request.sid] = stop
+        socketio.start_background_task(run_replay, client_channel(), request.sid, start, end, speed,
+                                       bool(data.get('broadcast')), stop)
+        logger.info(f"Replaying session from {start}s at {speed}x for {request.sid}")
+    except (TypeError, ValueError):
+        emit('server_error', {'message': 'Invalid replay parameters'})
+
+# Socket.IO event: stop a running replay
+@socketio.on('stop_replay')
+@instrument_event('stop_replay')
+def handle_stop_replay():
+    stop = active_replays.pop(request.sid, None)
+    if stop:
+        stop.set()
+
+# Roster profiles: warm server state for recently used profiles, loaded lazily on first switch
+def capture_profile_state():
+    """Everything that belongs to the active profile, including its open channels"""
+    return {
+        'characters': list(all_characters),
+        'character_index': character_index,
+        'search_index': search_index,
+        'characters_by_id': characters_by_id,
+        'character_merger': character_merger,
+        'channels': dict(channels)
+    }
+
+def load_profile_characters():
+    """Processed characters for the active profile, merging its source files if needed"""
+    if (DATA_DIR / 'characters_processed.json').exists() or not (DATA_DIR / 'characters.json').exists():
+        return load_character_data()
+    try:
+        processed, _ = IncrementalMerger().merge(*load_source_data(DATA_DIR))
+        save_processed_data(processed, DATA_DIR)
+        return processed
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to merge profile data: {e}")
+        return load_character_data()
+
+def load_profile_state(profile):
+    """Build server state for a profile from its files (DATA_DIR already points at it)"""
+    characters = load_profile_characters()
+    return {
+        'characters': characters,
+        'character_index': build_character_index(characters),
+        'search_index': build_search_index(characters),
+        'characters_by_id': None,  # Built once the profile is active
+        'character_merger': IncrementalMerger(characters),
+        'channels': {}  # Opened on demand
+    }
+
+def evict_profile_state(profile_id, state):
+    for channel in state['channels'].values():
+        close_channel(channel)
+
+profile_cache = ProfileCache(load_profile_state, on_evict=evict_profile_state)
+profile_cache.put(active_profile.id, capture_profile_state())
+
+def switch_profile(profile_id):
+    """Make another profile active. Returns False if it already is; raises ValueError if unknown."""
+    global active_profile, DATA_DIR, IMAGES_DIR, data_watcher
+    global character_index, search_index, characters_by_id, character_merger
+    profile = profile_index.get(profile_id)
+    if profile is None:
+        raise ValueError(f"Unknown profile {profile_id}")
+    if profile.id == active_profile.id:
+        return False
+
+    start = time.perf_counter()
+    with channels_lock:
+        # Persist the outgoing parties to their own profile before the paths change
+        for channel in channels.values():
+            with channel.lock:
+                channel.coalescer.flush_pending()
+        data_watcher.stop()
+        profile_cache.put(active_profile.id, capture_profile_state())
+
+        active_profile = profile
+        DATA_DIR, IMAGES_DIR = profile.data_dir, profile.image_dir
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        state = profile_cache.get(profile)
+
+        all_characters[:] = state['characters']
+        character_index = state['character_index']
+        search_index = state['search_index']
+        character_merger = state['character_merger']
+        if state['characters_by_id'] is None:
+            build_characters_by_id()
+        else:
+            characters_by_id = state['characters_by_id']
+        channels.clear()
+        channels.update(state['channels'])
+
+    # Viewers stay in their channel: open it in the new profile and hand them its state
+    watched = set(client_channels.values()) | {DEFAULT_CHANNEL}
+    for channel_id in watched:
+        channel = get_channel(channel_id)
+        channel.clients = {sid for sid, joined in client_channels.items() if joined == channel_id}
+        with channel.lock:
+            stars = stars_snapshot(channel)
+            channel.events.publish('profile', {
+                'profile': profile.id,
+                'version': channel.version,
+                'party': compact_party(channel),
+                'recruited_count': stars['recruited_count'],
+                'total': stars['total']
+            })
+            socketio.emit('profile_changed', {
+                'profile': profile.to_dict(),
+                'characters': all_characters,
+                'channel': channel.id,
+                'party': channel.party,
+                'version': channel.version,
+                'stars': stars
+            }, to=channel.room)
+    data_watcher = watch_profile_data()
+    logger.info(f"Switched to profile {profile.id} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return True
+
+# API route to list roster profiles
+@app.route('/api/profiles', methods=['GET'])
+def get_profiles():
+    return jsonify({
+        "active": active_profile.id,
+        "profiles": profile_index.list(),
+        "loaded": profile_cache.loaded()
+    })
+
+# API route to switch the active roster profile
+@app.route('/api/profiles/active', methods=['POST'])
+def set_active_profile():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('profile'), str):
+        return jsonify({"error": "Invalid data format"}), 400
+    try:
+        switch_profile(data['profile'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error switching profile: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+    return jsonify({"active": active_profile.id})
+
+# Socket.IO event: switch the active roster profile for everyone
+@socketio.on('switch_profile')
+@instrument_event('switch_profile')
+@rate_limited('switch_profile')
+def handle_switch_profile(data):
+    try:
+        if not isinstance(data, dict) or not isinstance(data.get('profile'), str):
+            emit('server_error', {'message': 'Invalid data format'})
+            return
+        switch_profile(data['profile'])
+    except ValueError as e:
+        emit('server_error', {'message': str(e)})
+    except Exception as e:
+        logger.error(f"Error switching profile: {e}")
+        emit('server_error', {'message': f"Error switching profile: {str(e)}"})
+
+# API route to list the open channels and their audiences
+@app.route('/api/channels', methods=['GET'])
+def get_channels():
+    return jsonify({
+        "default": DEFAULT_CHANNEL,
+        "max_channels": MAX_CHANNELS,
+        "channels": [channel.to_dict() for channel in list(channels.values())],
+        "topic_groups": topic_groups.counts()
+    })
+
+# Control socket: newline-delimited commands for stream-deck buttons and scripts (see control_socket.py)
+CONTROL_ADDRESS = os.environ.get('SUIKODEN_CONTROL_ADDRESS', DEFAULT_CONTROL_ADDRESS)  # Empty disables it
+control_server = None
+presets_lock = threading.Lock()
+
+def _control_channel(session):
+    return get_channel(session.get('channel', DEFAULT_CHANNEL))
+
+def _control_slot(value):
+    try:
+        slot = int(value)
+    except ValueError:
+        raise CommandError(f"Invalid party slot {value!r}")
+    if not _valid_slot(slot):
+        raise CommandError(f"Party slot must be 0-{PARTY_SIZE - 1}")
+    return slot
+
+def _party_reply(party_update):
+    return {
+        'version': party_update['version'],
+        'party': [member['name'] if member else None for member in party_update['party']]
+    }
+
+def control_channel(session, channel_id=None):
+    """channel [id]: show or switch the channel this connection controls"""
+    if channel_id is not None:
+        get_channel(channel_id)  # Raises ChannelError (a ValueError) for a bad id
+        session['channel'] = channel_id
+    return {'channel': session.get('channel', DEFAULT_CHANNEL)}
+
+def control_add(session, slot, *name_words):
+    """add SLOT NAME: put a character in a slot (the name may be left unquoted)"""
+    if not name_words:
+        raise CommandError("Usage: add SLOT NAME")
+    name = ' '.join(name_words)
+    character = find_character(name)
+    if not character:
+        raise CommandError(f"Character {name} not found")
+    slot = _control_slot(slot)
+    return _party_reply(commit_party_change(_control_channel(session),
+                                            [{'op': 'add', 'slot': slot, 'character_name': character['name']}],
+                                            update_fields={'updated_slot': slot, 'action': 'add', 'character': character}))
+
+def control_remove(session, slot):
+    slot = _control_slot(slot)
+    channel = _control_channel(session)
+    with channel.lock:
+        if not channel.party[slot]:
+            raise CommandError("No character in that slot")
+        return _party_reply(commit_party_change(channel, [{'op': 'remove', 'slot': slot}], update_fields={
+            'updated_slot': slot, 'action': 'remove', 'character_name': channel.party[slot]['name']}))
+
+def control_move(session, from_slot, to_slot):
+    from_slot, to_slot = _control_slot(from_slot), _control_slot(to_slot)
+    channel = _control_channel(session)
+    with channel.lock:
+        if not channel.party[from_slot]:
+            raise CommandError("No character in source slot")
+        return _party_reply(commit_party_change(channel, [{'op': 'move', 'from_slot': from_slot, 'to_slot': to_slot}],
+                                                update_fields={'updated_slots': [from_slot, to_slot], 'action': 'move',
+                                                               'character_name': channel.party[from_slot]['name']}))
+
+def control_clear(session):
+    return _party_reply(commit_party_batch(_control_channel(session), [{'op': 'clear'}]))
+
+def control_recruit(session, *args):
+    """recruit NAME [on|off|toggle]: mark a star (toggles by default)"""
+    state = None
+    if len(args) > 1 and args[-1].lower() in ('on', 'off', 'toggle'):
+        state = {'on': True, 'off': False, 'toggle': None}[args[-1].lower()]
+        args = args[:-1]
+    if not args:
+        raise CommandError("Usage: recruit NAME [on|off|toggle]")
+    name = ' '.join(args)
+    character = find_character(name)
+    if not character or character.get('id') not in characters_by_id:
+        raise CommandError(f"Character {name} not found")
+    channel = _control_channel(session)
+    flip = set_star_recruited(channel, character, state)
+    if flip is None:
+        # Already in the requested state
+        with channel.stars_lock:
+            flip = {'recruited': channel.star_bitset.get(character['id']),
+                    'recruited_count': channel.star_bitset.count, 'total': len(characters_by_id)}
+    return {'name': character['name'], 'recruited': flip['recruited'],
+            'recruited_count': flip['recruited_count'], 'total': flip['total']}
+
+def load_presets():
+    """Named parties from the profile's presets.json: {"name": ["Viktor", null, ...]}"""
+    try:
+        with open(DATA_DIR / 'presets.json', 'r', encoding='utf-8') as f:
+            presets = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        raise CommandError(f"presets.json is invalid: {e}")
+    if not isinstance(presets, dict):
+        raise CommandError("presets.json must map preset names to parties")
+    return presets
+
+def replace_party(channel, members, update_fields, base_version=None):
+    """Set every slot of a channel's party from a list of names (None for empty) as one change.
+
+    With base_version, raises PartyConflict if a slot this changes was written after it.
+    """
+    if len(members) > PARTY_SIZE:
+        raise CommandError(f"A party has at most {PARTY_SIZE} members")
+    new_party = []
+    for member in list(members) + [None] * (PARTY_SIZE - len(members)):
+        character = find_character(member) if member else None
+        if member and not character:
+            raise CommandError(f"Character {member} not found")
+        new_party.append(character)
+    with channel.lock:
+        updated_slots = [slot for slot in range(PARTY_SIZE) if channel.party[slot] != new_party[slot]]
+        check_party_version(channel, base_version, updated_slots)
+        return _commit_new_party(channel, new_party, updated_slots, update_fields)
+
+def apply_party_preset(channel, name):
+    """Replace a channel's party with a saved preset as one change"""
+    with presets_lock:
+        members = load_presets().get(name)
+    if not isinstance(members, list):
+        raise CommandError(f"Unknown preset {name!r}")
+    party_update = replace_party(channel, members, {'action': 'preset', 'preset': name})
+    logger.info(f"Loaded preset {name} in {channel.id}")
+    return party_update
+
+def save_party_preset(channel, name):
+    """Store a channel's current party in presets.json under name"""
+    with channel.lock:
+        members = [member['name'] if member else None for member in channel.party]
+    with presets_lock:
+        presets = load_presets()
+        presets[name] = members
+        tmp_path = DATA_DIR / 'presets.json.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(presets, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, DATA_DIR / 'presets.json')
+    logger.info(f"Saved preset {name} from {channel.id}")
+    return members
+
+def control_preset(session, *args):
+    """preset NAME | preset save NAME | preset list"""
+    if args == ('list',):
+        with presets_lock:
+            return sorted(load_presets())
+    if len(args) == 2 and args[0] == 'save':
+        return {'preset': args[1], 'party': save_party_preset(_control_channel(session), args[1])}
+    if len(args) != 1:
+        raise CommandError("Usage: preset NAME | preset save NAME | preset list")
+    return _party_reply(apply_party_preset(_control_channel(session), args[0]))
+
+def control_party(session, *members):
+    """party [@VERSION] NAME|- ...: set the whole party at once, - for an empty slot.
+
+    With @VERSION, slots changed since that party version are a conflict and nothing is applied.
+    """
+    base_version = None
+    if members and members[0].startswith('@'):
+        if not members[0][1:].isdigit():
+            raise CommandError(f"Invalid base version {members[0]!r}")
+        base_version, members = int(members[0][1:]), members[1:]
+    members = [None if member == '-' else member for member in members]
+    try:
+        return _party_reply(replace_party(_control_channel(session), members,
+                                          {'source': 'external', 'action': 'full_update'}, base_version))
+    except PartyConflict as conflict:
+        raise CommandError(f"Conflict: {conflict} in slots {conflict.conflicting_slots}, "
+                           f"now at version {conflict.channel.version}")
+
+def control_history(direction):
+    return lambda session: _party_reply(step_party_history(_control_channel(session), direction))
+
+def control_random(session, *args):
+    """random [key=value ...]: reroll with the /api/party/random rules, e.g. random seed=42 no_repeat=3"""
+    options = {}
+    for arg in args:
+        key, sep, value = arg.partition('=')
+        if not sep:
+            raise CommandError(f"Expected key=value, got {arg!r}")
+        options[key] = value
+    draw, party_update = reroll_party(_control_channel(session), options)
+    reply = _party_reply(party_update)
+    reply['seed'] = draw['seed']
+    return reply
+
+CONTROL_COMMANDS = {
+    'channel': control_channel,
+    'add': control_add,
+    'remove': control_remove,
+    'move': control_move,
+    'clear': control_clear,
+    'party': control_party,
+    'recruit': control_recruit,
+    'preset': control_preset,
+    'random': control_random,
+    'undo': control_history('undo'),
+    'redo': control_history('redo')
+}
+
+def start_control_server():
+    """Start the control socket once per process (no-op when SUIKODEN_CONTROL_ADDRESS is empty)"""
+    global control_server
+    if not CONTROL_ADDRESS or control_server is not None:
+        return control_server
+    server = ControlServer(CONTROL_COMMANDS, CONTROL_ADDRESS, on_command=lambda name, ok:
+                           control_commands_total.inc(command=name, result='ok' if ok else 'err'))
+    try:
+        server.start()
+    except (OSError, ValueError) as e:
+        logger.error(f"Control socket unavailable on {CONTROL_ADDRESS}: {e}")
+        return None
+    control_server = server
+    return control_server
+
+# Static asset pipeline: fingerprinted, precompressed CSS/JS and pages rendered once at startup
+asset_pipeline = AssetPipeline(STATIC_DIR)
+ASSET_PIPELINE_ENABLED = os.environ.get('SUIKODEN_ASSET_PIPELINE', '1') == '1'
+PRERENDERED_PAGES = ('index.html', 'overlay.html')
+
+def build_assets():
+    """Fingerprint and compress the assets, then pre-render every page against them"""
+    if not ASSET_PIPELINE_ENABLED:
+        return
+    try:
+        asset_pipeline.build()
+        with app.test_request_context('/'):
+            for name in PRERENDERED_PAGES:
+                asset_pipeline.add_page(name, render_template(name))
+    except Exception as e:
+        # Pages fall back to render_template per request
+        logger.error(f"Error building static assets: {e}")
+
+def asset_response(asset, cache_control):
+    """Serve an in-memory asset, negotiating encoding and answering If-None-Match with 304"""
+    encoding, data, etag = asset.negotiate(request.accept_encodings)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(data, mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+def serve_page(name):
+    page = asset_pipeline.page(name)
+    if page is None:
+        return render_template(name)
+    # Pages are revalidated on every load; unchanged ones cost a 304
+    return asset_response(page, 'no-cache')
+
+build_assets()
+
 # Main entry point
 if __name__ == '__main__':
     # First run the character data merge if needed
@@ -460,6 +2052,12 @@ if __name__ == '__main__':
                 
                 # Reload character data after merging
                 all_characters = load_character_data()
+                character_index = build_character_index(all_characters)
+                search_index = build_search_index(all_characters)
+                character_merger = IncrementalMerger(all_characters)
+                build_characters_by_id()
+                for channel in channels.values():
+                    reset_star_state(channel)
             else:
                 logger.warning("Could not load merge_character_data module")
         except Exception as e:
@@ -572,7 +2170,11 @@ if __name__ == '__main__':
     
     # Ensure party.json exists
     if not (DATA_DIR / 'party.json').exists():
-        create_default_party_file()
+        create_default_party_file(DATA_DIR)
+    
+    # With the debug reloader, only the child process that serves requests opens the control socket
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_control_server()
     
     try:
         logger.info("Starting Suikoden Display web server...")